@@ -1,6 +1,15 @@
-from .viewer import ViewerWidget, Viewer
+# The viewer classes need Qt, they are imported on first use so that PyIGL_viewer.remote can be
+# used from processes without Qt.
+def __getattr__(name):
+    if name in ("Viewer", "ViewerWidget"):
+        from . import viewer
+
+        return getattr(viewer, name)
+    raise AttributeError(f"module {__name__} has no attribute {name}")
+
 
 if __name__ == "__main__":
+    from .viewer import ViewerWidget
     import numpy as np
     import sys
     from PyQt5.QtWidgets import QOpenGLWidget, QApplication
@@ -1 +1,9 @@
-from .mesh import GlMeshCore, GlMeshPrefab, GlMeshInstance, MeshGroup, GlMeshCoreId, GlMeshPrefabId, GlMeshInstanceId
+from .mesh import GlMeshCore, GlMeshPrefab, GlMeshInstance, InstanceTable, MeshGroup, GlMeshCoreId, GlMeshPrefabId, GlMeshInstanceId
+from .animation import AnimationClip
+from .deformation import BlendShapes, Skin
+from .normals import MeshNormals
+from .memory import GpuMemoryManager
+from .pool import GeometryPools
+from .gl_state import GlState
+from .scene_graph import SceneGraph
+from .slot_map import SlotAllocator, SlotMap, handle_indices
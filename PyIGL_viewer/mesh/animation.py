@@ -0,0 +1,88 @@
+from OpenGL import GL as gl
+import numpy as np
+
+from .texture_buffer import ANIMATION_TEXTURE_UNIT, TextureBuffer, check_texture_buffer_size
+
+
+#################################################################################################
+# An animation clip holds all the frames of a precomputed vertex animation on the GPU.
+# The (T, N, 3) positions are uploaded once in a texture buffer, the vertex shaders fetch the
+# positions of the current frames through the vertexIndex attribute of the mesh core.
+# Playback, scrubbing and looping only change the frame offsets and blend factor uniforms.
+
+class AnimationClip:
+    def __init__(self, frames, frame_rate=30.0, loop=True, interpolate=True):
+        if frames.ndim != 3 or frames.shape[2] != 3:
+            raise ValueError('Animation frames must be an array of shape (T, N, 3)')
+        if frames.shape[0] == 0:
+            raise ValueError('Animation clips need at least one frame')
+        self.number_frames = frames.shape[0]
+        self.number_vertices = frames.shape[1]
+        self.frame_rate = frame_rate
+        self.loop = loop
+        self.interpolate = interpolate
+        self.playing = False
+        self.frame = 0.0
+
+        self.frames = TextureBuffer(
+            np.ascontiguousarray(frames, dtype=np.float32).reshape((-1,)), gl.GL_R32F, ANIMATION_TEXTURE_UNIT
+        )
+
+    def check_size(self):
+        check_texture_buffer_size(self.number_frames * self.number_vertices * 3, 'Animation clip')
+
+    #################################################################################################
+    # Playback
+
+    def play(self):
+        self.playing = True
+
+    def pause(self):
+        self.playing = False
+
+    def seek(self, frame):
+        self.frame = self.wrap_frame(float(frame))
+
+    def duration(self):
+        return self.number_frames / self.frame_rate
+
+    def wrap_frame(self, frame):
+        if self.loop:
+            return frame % self.number_frames
+        return min(max(frame, 0.0), self.number_frames - 1.0)
+
+    def advance(self, elapsed):
+        if not self.playing:
+            return
+        frame = self.frame + elapsed * self.frame_rate
+        if not self.loop and frame >= self.number_frames - 1:
+            self.playing = False
+        self.frame = self.wrap_frame(frame)
+
+    def keyframes(self):
+        # Returns the two frames around the playback position and the blend factor between them.
+        first_frame = int(self.frame)
+        if not self.interpolate:
+            return first_frame, first_frame, 0.0
+        second_frame = first_frame + 1
+        if second_frame >= self.number_frames:
+            second_frame = 0 if self.loop else first_frame
+        return first_frame, second_frame, self.frame - first_frame
+
+    #################################################################################################
+    # GL resources
+
+    def bind(self, shader):
+        self.frames.bind()
+        first_frame, second_frame, blend = self.keyframes()
+        frame_size = self.number_vertices * 3
+        shader.set_builtin_uniform(gl.glUniform2i, "animationOffsets", first_frame * frame_size, second_frame * frame_size)
+        shader.set_builtin_uniform(gl.glUniform1f, "animationBlend", blend)
+
+    def buffers(self):
+        return self.frames.buffers()
+
+    def delete(self):
+        self.frames.delete()
+
+#################################################################################################
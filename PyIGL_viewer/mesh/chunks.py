@@ -0,0 +1,103 @@
+from OpenGL import GL as gl
+import numpy as np
+
+from .memory import free_buffers
+from .pool import PoolBuffer
+
+
+#################################################################################################
+# Large meshes are split into chunks of whole faces, each flattened vertex buffer of the mesh is
+# then a list of independent sub-buffers, one per chunk. Chunks are uploaded and evicted on their
+# own, updates only upload the chunks whose data changed, and chunks outside of the view frustum
+# of an instance are not drawn.
+
+# Meshes with more flattened vertices are chunked when no chunk size is given
+MAX_UNCHUNKED_VERTICES = 1 << 21
+DEFAULT_CHUNK_ELEMENTS = 1 << 18
+
+def chunk_ranges(number_elements, element_size, chunk_size):
+    # Returns the (first, count) ranges of flattened vertices of each chunk, or None for a single buffer.
+    # chunk_size is a number of faces, None chunks large meshes automatically and 0 never chunks.
+    if chunk_size is None:
+        if number_elements * element_size <= MAX_UNCHUNKED_VERTICES:
+            return None
+        chunk_size = DEFAULT_CHUNK_ELEMENTS
+    if chunk_size <= 0 or chunk_size >= number_elements:
+        return None
+    first_elements = np.arange(0, number_elements, chunk_size)
+    counts = np.minimum(chunk_size, number_elements - first_elements)
+    return [(int(first) * element_size, int(count) * element_size) for first, count in zip(first_elements, counts)]
+
+class ChunkedBuffer:
+    def __init__(self, value, ranges):
+        self.ranges = ranges
+        self.chunks = [gl.arrays.vbo.VBO(np.ascontiguousarray(value[first:first + count])) for first, count in ranges]
+
+    def set_array(self, value, changed_chunks=None):
+        # Only the chunks whose data differs are uploaded again.
+        for chunk, (first, count) in enumerate(self.ranges):
+            if changed_chunks is not None and not changed_chunks[chunk]:
+                continue
+            chunk_value = value[first:first + count]
+            chunk_buffer = self.chunks[chunk]
+            if changed_chunks is None and chunk_buffer.data is not None and np.array_equal(chunk_buffer.data, chunk_value):
+                continue
+            chunk_buffer.set_array(np.ascontiguousarray(chunk_value))
+
+    def set_chunk(self, chunk, value):
+        self.chunks[chunk].set_array(np.ascontiguousarray(value))
+
+def chunk_buffer(vertex_buffer, chunk):
+    # Returns the GL buffer of a chunk and the byte offset of its first vertex.
+    # Unchunked buffers hold the whole mesh, drawn as a single chunk.
+    # Pooled meshes start at an offset of their pool buffer.
+    if isinstance(vertex_buffer, ChunkedBuffer):
+        return vertex_buffer.chunks[chunk], 0
+    if isinstance(vertex_buffer, PoolBuffer):
+        return vertex_buffer.buffer_offset()
+    return vertex_buffer, 0
+
+def chunked_vertex_buffer(value, ranges):
+    if ranges is None:
+        return gl.arrays.vbo.VBO(value)
+    return ChunkedBuffer(value, ranges)
+
+def expand_chunks(vertex_buffers):
+    # Lists the GL buffers of chunked buffers, for memory accounting and deletion.
+    # Pooled buffers belong to their geometry pool and are left out.
+    expanded = []
+    for vertex_buffer in vertex_buffers:
+        if isinstance(vertex_buffer, PoolBuffer):
+            continue
+        if isinstance(vertex_buffer, ChunkedBuffer):
+            expanded += vertex_buffer.chunks
+        else:
+            expanded.append(vertex_buffer)
+    return expanded
+
+def free_chunked_buffers(vertex_buffers):
+    free_buffers(expand_chunks(vertex_buffers))
+
+#################################################################################################
+
+#################################################################################################
+# Frustum culling of chunks against their bounding boxes
+
+def bounding_box_corners(bbox_min, bbox_max):
+    # Returns the (C, 8, 4) homogeneous corners of C bounding boxes.
+    selectors = np.array([[(i >> axis) & 1 for axis in range(3)] for i in range(8)], dtype=bool)
+    corners = np.where(selectors[np.newaxis], bbox_max[:, np.newaxis], bbox_min[:, np.newaxis])
+    return np.concatenate([corners, np.ones(corners.shape[:2] + (1,), dtype=corners.dtype)], axis=2)
+
+def visible_chunks(mvp_matrices, corners):
+    # Returns an (I, C) array telling which chunks can be seen by each instance.
+    # A chunk is culled when all its corners lie outside of the same clip plane.
+    clip_corners = np.einsum("iab,cnb->icna", mvp_matrices, corners)
+    w = clip_corners[..., 3]
+    outside = np.zeros(clip_corners.shape[:2], dtype=bool)
+    for axis in range(3):
+        outside |= np.all(clip_corners[..., axis] < -w, axis=2)
+        outside |= np.all(clip_corners[..., axis] > w, axis=2)
+    return ~outside
+
+#################################################################################################
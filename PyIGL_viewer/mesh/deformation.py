@@ -0,0 +1,126 @@
+from OpenGL import GL as gl
+import numpy as np
+
+from .chunks import chunk_buffer, expand_chunks, free_chunked_buffers
+from .texture_buffer import BLEND_SHAPE_TEXTURE_UNIT, BONE_TEXTURE_UNIT, TextureBuffer, check_texture_buffer_size
+
+
+#################################################################################################
+# Blend shapes deform the mesh in the vertex shader by a weighted sum of delta targets.
+# The (K, N, 3) deltas are uploaded once in a texture buffer, only the non-zero weights
+# and the offsets of their targets are sent as uniforms when the weights change.
+
+# Matches MAX_BLEND_SHAPES in deformation.glsl
+MAX_ACTIVE_BLEND_SHAPES = 64
+
+class BlendShapes:
+    def __init__(self, deltas, weights=None):
+        if deltas.ndim != 3 or deltas.shape[2] != 3:
+            raise ValueError('Blend shape deltas must be an array of shape (K, N, 3)')
+        self.number_shapes = deltas.shape[0]
+        self.number_vertices = deltas.shape[1]
+        self.deltas = TextureBuffer(
+            np.ascontiguousarray(deltas, dtype=np.float32).reshape((-1,)), gl.GL_R32F, BLEND_SHAPE_TEXTURE_UNIT
+        )
+        self.set_weights(weights if weights is not None else np.zeros(self.number_shapes, dtype=np.float32))
+
+    def check_size(self):
+        check_texture_buffer_size(self.number_shapes * self.number_vertices * 3, 'Blend shapes')
+
+    def set_weights(self, weights):
+        weights = np.asarray(weights, dtype=np.float32).reshape((-1,))
+        if weights.shape[0] != self.number_shapes:
+            raise ValueError(f'Expected {self.number_shapes} blend shape weights, got {weights.shape[0]}')
+        active_shapes = np.flatnonzero(weights)
+        if active_shapes.shape[0] > MAX_ACTIVE_BLEND_SHAPES:
+            raise ValueError(f'At most {MAX_ACTIVE_BLEND_SHAPES} blend shapes can have a non-zero weight')
+        self.active_offsets = (active_shapes * self.number_vertices * 3).astype(np.int32)
+        self.active_weights = weights[active_shapes]
+
+    def bind(self, shader):
+        self.deltas.bind()
+        count = self.active_weights.shape[0]
+        shader.set_builtin_uniform(gl.glUniform1i, "blendShapeCount", count)
+        if count > 0:
+            shader.set_builtin_uniform(gl.glUniform1iv, "blendShapeOffsets", count, self.active_offsets)
+            shader.set_builtin_uniform(gl.glUniform1fv, "blendShapeWeights", count, self.active_weights)
+
+    def buffers(self):
+        return self.deltas.buffers()
+
+    def delete(self):
+        self.deltas.delete()
+
+#################################################################################################
+
+#################################################################################################
+# Linear blend skinning in the vertex shader.
+# Each vertex is influenced by up to four bones, whose indices and weights are vertex attributes.
+# The bone matrices are stored as their first three rows in a texture buffer, posing the mesh
+# only uploads 12 floats per bone.
+
+BONE_INDEX_LOCATION = 2
+BONE_WEIGHT_LOCATION = 3
+MAX_BONE_INFLUENCES = 4
+
+class Skin:
+    def __init__(self, bone_indices, bone_weights, bone_matrices):
+        if bone_indices.ndim != 2 or bone_indices.shape != bone_weights.shape:
+            raise ValueError('Bone indices and weights must be arrays of the same shape (N, J)')
+        self.number_vertices = bone_indices.shape[0]
+        self.number_bones = bone_matrices.shape[0]
+        if bone_indices.size > 0 and (np.max(bone_indices) >= self.number_bones or np.min(bone_indices) < 0):
+            raise ValueError(f'Bone indices must be between 0 and {self.number_bones - 1}')
+        self.bone_indices, self.bone_weights = self.limit_influences(bone_indices, bone_weights)
+        self.bone_index_buffer = None
+        self.bone_weight_buffer = None
+        self.bone_matrices = TextureBuffer(self.encode_bone_matrices(bone_matrices), gl.GL_RGBA32F, BONE_TEXTURE_UNIT)
+
+    @staticmethod
+    def limit_influences(bone_indices, bone_weights):
+        # Keeps the four largest weights of each vertex and normalizes them.
+        if bone_weights.shape[1] > MAX_BONE_INFLUENCES:
+            largest = np.argsort(-bone_weights, axis=1)[:, :MAX_BONE_INFLUENCES]
+            bone_indices = np.take_along_axis(bone_indices, largest, axis=1)
+            bone_weights = np.take_along_axis(bone_weights, largest, axis=1)
+        padding = ((0, 0), (0, MAX_BONE_INFLUENCES - bone_weights.shape[1]))
+        bone_indices = np.pad(bone_indices, padding).astype(np.uint16)
+        bone_weights = np.pad(bone_weights, padding).astype(np.float32)
+        total = np.sum(bone_weights, axis=1, keepdims=True)
+        bone_weights /= np.where(total > 0.0, total, 1.0)
+        return bone_indices, bone_weights
+
+    def encode_bone_matrices(self, bone_matrices):
+        if bone_matrices.shape not in [(self.number_bones, 4, 4), (self.number_bones, 3, 4)]:
+            raise ValueError(f'Bone matrices must be an array of shape ({self.number_bones}, 4, 4) or ({self.number_bones}, 3, 4)')
+        return np.ascontiguousarray(bone_matrices[:, :3, :], dtype=np.float32).reshape((-1,))
+
+    def check_size(self):
+        check_texture_buffer_size(self.number_bones * 3, 'Bone matrices')
+
+    def set_bone_matrices(self, bone_matrices):
+        self.bone_matrices.set_array(self.encode_bone_matrices(bone_matrices))
+
+    def upload_attributes(self, mesh_core):
+        self.bone_index_buffer = mesh_core.create_vertex_buffer(mesh_core.flatten_vertex_attribute(self.bone_indices))
+        self.bone_weight_buffer = mesh_core.create_vertex_buffer(mesh_core.flatten_vertex_attribute(self.bone_weights))
+
+    def bind_buffers(self, gl_state, chunk=0):
+        bone_index_buffer, offset = chunk_buffer(self.bone_index_buffer, chunk)
+        gl_state.vertex_attribute(
+            BONE_INDEX_LOCATION, bone_index_buffer, MAX_BONE_INFLUENCES, gl.GL_UNSIGNED_SHORT, False, offset=offset, integer=True
+        )
+        bone_weight_buffer, offset = chunk_buffer(self.bone_weight_buffer, chunk)
+        gl_state.vertex_attribute(BONE_WEIGHT_LOCATION, bone_weight_buffer, MAX_BONE_INFLUENCES, gl.GL_FLOAT, False, offset=offset)
+
+    def bind(self, shader):
+        self.bone_matrices.bind()
+
+    def buffers(self):
+        return expand_chunks([self.bone_index_buffer, self.bone_weight_buffer]) + self.bone_matrices.buffers()
+
+    def delete(self):
+        free_chunked_buffers([self.bone_index_buffer, self.bone_weight_buffer])
+        self.bone_matrices.delete()
+
+#################################################################################################
@@ -0,0 +1,132 @@
+import numpy as np
+from OpenGL import GL as gl
+
+from .chunks import chunked_vertex_buffer
+
+
+#################################################################################################
+# Compact vertex attribute encodings.
+# The OpenGL type of an attribute buffer is deduced from the dtype of its data,
+# so encoded attributes can be stored and bound like any other attribute.
+
+ATTRIBUTE_TYPES = {
+    np.dtype(np.float32): (gl.GL_FLOAT, False),
+    np.dtype(np.float16): (gl.GL_HALF_FLOAT, False),
+    np.dtype(np.int16): (gl.GL_SHORT, True),
+    np.dtype(np.uint8): (gl.GL_UNSIGNED_BYTE, True),
+}
+
+COLOR_ATTRIBUTES = ["vertexColor", "pointColor"]
+
+INT16_MAX = np.iinfo(np.int16).max
+UINT8_MAX = np.iinfo(np.uint8).max
+
+
+def attribute_type(value):
+    return ATTRIBUTE_TYPES[value.dtype]
+
+
+def attribute_buffer(value, chunk_ranges=None):
+    if value.dtype not in ATTRIBUTE_TYPES:
+        value = value.astype(np.float32)
+    gl_type, normalized = attribute_type(value)
+    return (chunked_vertex_buffer(value, chunk_ranges), value.shape[1], gl_type, normalized)
+
+
+def update_attribute_buffer(vertex_buffer, value):
+    # Sends new values to an existing buffer, unchanged chunks of chunked buffers are skipped.
+    if value.dtype not in ATTRIBUTE_TYPES:
+        value = value.astype(np.float32)
+    gl_type, normalized = attribute_type(value)
+    vertex_buffer.set_array(value)
+    return (vertex_buffer, value.shape[1], gl_type, normalized)
+
+
+def pad_components(value, components=4):
+    # Compact attributes are padded to 4 components to keep every vertex 4-byte aligned.
+    if value.shape[1] >= components:
+        return value
+    padding = np.zeros((value.shape[0], components - value.shape[1]), dtype=value.dtype)
+    return np.concatenate([value, padding], axis=1)
+
+
+def position_bounds(vertices):
+    if vertices.shape[0] == 0:
+        return np.zeros(3, dtype=np.float32), np.ones(3, dtype=np.float32)
+    bbox_min = np.min(vertices, axis=0)
+    bbox_max = np.max(vertices, axis=0)
+    center = 0.5 * (bbox_min + bbox_max)
+    half_extent = 0.5 * (bbox_max - bbox_min)
+    half_extent[half_extent == 0] = 1.0
+    return center.astype(np.float32), half_extent.astype(np.float32)
+
+
+def encode_positions(vertices, center, half_extent, precision):
+    # Positions are stored relative to the bounding box and decoded in the vertex shader
+    # with position = positionOffset + positionScale * encoded.
+    local_positions = (vertices - center) / half_extent
+    if precision == "half":
+        return pad_components(local_positions.astype(np.float16))
+    if precision == "int16":
+        quantized = np.round(np.clip(local_positions, -1.0, 1.0) * INT16_MAX)
+        return pad_components(quantized.astype(np.int16))
+    raise ValueError(f"Unknown position precision {precision}")
+
+
+def octahedral_encode(normals):
+    normals = normals / np.maximum(np.sum(np.abs(normals), axis=1, keepdims=True), 1e-12)
+    encoded = normals[:, :2].copy()
+    sign_not_zero = np.where(encoded >= 0.0, 1.0, -1.0)
+    lower_hemisphere = normals[:, 2] < 0.0
+    folded = (1.0 - np.abs(encoded[:, ::-1])) * sign_not_zero
+    encoded = np.where(lower_hemisphere[:, np.newaxis], folded, encoded)
+    return np.round(np.clip(encoded, -1.0, 1.0) * INT16_MAX).astype(np.int16)
+
+
+def octahedral_decode(encoded):
+    encoded = np.maximum(encoded.astype(np.float32) / INT16_MAX, -1.0)
+    normals = np.concatenate(
+        [encoded, 1.0 - np.sum(np.abs(encoded), axis=1, keepdims=True)], axis=1
+    )
+    sign_not_zero = np.where(normals[:, :2] >= 0.0, 1.0, -1.0)
+    lower_hemisphere = normals[:, 2] < 0.0
+    folded = (1.0 - np.abs(normals[:, 1::-1])) * sign_not_zero
+    normals[:, :2] = np.where(lower_hemisphere[:, np.newaxis], folded, normals[:, :2])
+    return normals / np.linalg.norm(normals, axis=1, keepdims=True)
+
+
+def encode_colors(colors):
+    if colors.dtype == np.uint8:
+        return pad_components(colors)
+    quantized = np.round(np.clip(colors, 0.0, 1.0) * UINT8_MAX).astype(np.uint8)
+    return pad_components(quantized)
+
+
+def rgba_colors(colors):
+    # Colors are floats in [0, 1] or uint8, with 3 or 4 components, or RGBA packed in one uint32 per
+    # vertex with red in the lowest byte. They are stored as 4 uint8 and normalized by the GPU.
+    colors = np.asarray(colors)
+    if colors.dtype == np.uint32 and colors.ndim == 1:
+        return colors.view(np.uint8).reshape((-1, 4))
+    if colors.ndim != 2 or colors.shape[1] not in (3, 4):
+        raise ValueError(f"Cannot read RGBA colors from an array of shape {colors.shape}")
+    if colors.dtype != np.uint8:
+        colors = np.round(np.clip(colors, 0.0, 1.0) * UINT8_MAX).astype(np.uint8)
+    if colors.shape[1] == 3:
+        alpha = np.full((colors.shape[0], 1), UINT8_MAX, dtype=np.uint8)
+        colors = np.concatenate([colors, alpha], axis=1)
+    return colors
+
+
+def encode_attribute(name, value, precision):
+    if precision == "full":
+        return value
+    if precision != "compact":
+        raise ValueError(f"Unknown attribute precision {precision}")
+    if name == "normal" and value.shape[1] == 3:
+        return octahedral_encode(value)
+    if name in COLOR_ATTRIBUTES:
+        return encode_colors(value)
+    return value
+
+#################################################################################################
@@ -0,0 +1,90 @@
+import ctypes
+from OpenGL import GL as gl
+
+
+#################################################################################################
+# Shadow of the GL state set by the viewer. Each call is only issued when the value it sets
+# differs from the last one, which saves most of the PyOpenGL call overhead of a frame where
+# consecutive draws share a program, raster state or vertex buffers.
+# A GL state is shared by everything drawn in one GL context. Uniform values are shadowed
+# by each shader program, see ShaderProgram.set_uniform.
+
+class GlState:
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        # Forgets the whole state, e.g. at the start of a frame when other code may have changed it.
+        self.program = None
+        self.polygon_mode = None
+        self.line_width = None
+        self.point_size = None
+        self.program_point_size = None
+        self.reset_bindings()
+
+    def reset_bindings(self):
+        # Buffers deleted or evicted between frames can leave stale bindings.
+        self.array_buffer = None
+        self.enabled_attributes = {}
+        self.attribute_pointers = {}
+
+    def use_program(self, program):
+        if self.program != program:
+            gl.glUseProgram(program)
+            self.program = program
+
+    def set_polygon_mode(self, polygon_mode):
+        if self.polygon_mode != polygon_mode:
+            gl.glPolygonMode(gl.GL_FRONT_AND_BACK, polygon_mode)
+            self.polygon_mode = polygon_mode
+
+    def set_line_width(self, line_width):
+        if self.line_width != line_width:
+            gl.glLineWidth(line_width)
+            self.line_width = line_width
+
+    def set_point_size(self, point_size):
+        if self.point_size != point_size:
+            gl.glPointSize(point_size)
+            self.point_size = point_size
+
+    def set_program_point_size(self, enabled):
+        # Point sprite shaders write gl_PointSize, the other ones use the glPointSize value.
+        if self.program_point_size != enabled:
+            if enabled:
+                gl.glEnable(gl.GL_PROGRAM_POINT_SIZE)
+            else:
+                gl.glDisable(gl.GL_PROGRAM_POINT_SIZE)
+            self.program_point_size = enabled
+
+    def bind_buffer(self, vertex_buffer):
+        # Buffers with pending data are always bound, binding uploads their data.
+        if self.array_buffer is vertex_buffer and vertex_buffer.copied:
+            return
+        vertex_buffer.bind()
+        self.array_buffer = vertex_buffer
+
+    def enable_attribute(self, location):
+        if not self.enabled_attributes.get(location, False):
+            gl.glEnableVertexAttribArray(location)
+            self.enabled_attributes[location] = True
+
+    def disable_attribute(self, location):
+        if self.enabled_attributes.get(location, True):
+            gl.glDisableVertexAttribArray(location)
+            self.enabled_attributes[location] = False
+
+    def vertex_attribute(self, location, vertex_buffer, size, gl_type, normalized, stride=0, offset=0, integer=False):
+        # Integer attributes are read as ints by the shaders, they are set with glVertexAttribIPointer.
+        self.enable_attribute(location)
+        self.bind_buffer(vertex_buffer)
+        pointer = (vertex_buffer.buffers[0], size, gl_type, normalized, stride, offset, integer)
+        if self.attribute_pointers.get(location) == pointer:
+            return
+        if integer:
+            gl.glVertexAttribIPointer(location, size, gl_type, stride, ctypes.c_void_p(offset))
+        else:
+            gl.glVertexAttribPointer(location, size, gl_type, normalized, stride, ctypes.c_void_p(offset))
+        self.attribute_pointers[location] = pointer
+
+#################################################################################################
@@ -0,0 +1,51 @@
+import numpy as np
+from OpenGL import GL as gl
+
+from .encoding import attribute_type
+
+
+#################################################################################################
+# An interleaved buffer packs several vertex attributes into a single vertex buffer.
+# Each vertex is stored as one record, fields are aligned to 4 bytes as recommended by OpenGL.
+
+class InterleavedBuffer:
+    def __init__(self, arrays):
+        self.vertex_buffer = None
+        self.update(arrays)
+
+    def update(self, arrays):
+        names = list(arrays.keys())
+        formats = []
+        offsets = []
+        offset = 0
+        for name in names:
+            array = arrays[name]
+            formats.append((array.dtype, (array.shape[1],)))
+            offsets.append(offset)
+            offset += 4 * ((array.dtype.itemsize * array.shape[1] + 3) // 4)
+        record_type = np.dtype({"names": names, "formats": formats, "offsets": offsets, "itemsize": offset})
+
+        # Vectorized copy of every attribute into its field of the structured array.
+        number_vertices = arrays[names[0]].shape[0]
+        records = np.zeros(number_vertices, dtype=record_type)
+        for name in names:
+            records[name] = arrays[name]
+
+        self.stride = record_type.itemsize
+        self.layout = {}
+        for name, offset in zip(names, offsets):
+            gl_type, normalized = attribute_type(arrays[name])
+            self.layout[name] = (arrays[name].shape[1], gl_type, normalized, offset)
+
+        data = records.view(np.uint8)
+        if self.vertex_buffer is None:
+            self.vertex_buffer = gl.arrays.vbo.VBO(data)
+        else:
+            self.vertex_buffer.set_array(data)
+
+    def bind(self, gl_state, locations):
+        for name, location in locations.items():
+            size, gl_type, normalized, offset = self.layout[name]
+            gl_state.vertex_attribute(location, self.vertex_buffer, size, gl_type, normalized, self.stride, offset)
+
+#################################################################################################
@@ -0,0 +1,139 @@
+#################################################################################################
+# GPU memory accounting for the buffers allocated by the viewer.
+# Mesh cores, groups and prefabs own their buffers and free them explicitly when removed.
+# The memory manager measures what is resident on the GPU and, under a memory budget,
+# evicts the buffers of the least recently drawn meshes. Evicted buffers keep their host data
+# and are uploaded again the next time they are bound.
+# Mesh groups marked as GPU resident drop the host copy of their buffers once uploaded,
+# such buffers can not be evicted anymore.
+
+def buffer_resident(vertex_buffer):
+    return bool(vertex_buffer.buffers) and vertex_buffer.copied
+
+
+def buffer_bytes(vertex_buffer):
+    if not buffer_resident(vertex_buffer):
+        return 0
+    return vertex_buffer.size
+
+
+def host_bytes(vertex_buffer):
+    if vertex_buffer.data is None:
+        return 0
+    return vertex_buffer.data.nbytes
+
+
+def release_host_copy(vertex_buffer):
+    if buffer_resident(vertex_buffer):
+        vertex_buffer.data = None
+
+
+def free_buffer(vertex_buffer):
+    vertex_buffer.delete()
+    # Clearing the copy flag makes the next bind allocate the buffer and upload the data again.
+    vertex_buffer.copied = False
+
+
+def free_buffers(vertex_buffers):
+    for vertex_buffer in vertex_buffers:
+        free_buffer(vertex_buffer)
+
+
+class GpuMemoryManager:
+    # Keeps a running total of the resident bytes of the groups and prefabs. Each one is measured
+    # when it is drawn, after its buffers are uploaded. Owners whose buffers change or are evicted
+    # are measured again at their next draw, removed owners are forgotten.
+    def __init__(self, budget=None):
+        self.budget = budget
+        self.frame = 0
+        self.measured_bytes = {}
+        self.total_bytes = 0
+        # Owners measured again at their next draw
+        self.stale = set()
+
+    def set_budget(self, budget):
+        self.budget = budget
+
+    def measure(self, owner):
+        if owner not in self.measured_bytes:
+            owner_bytes = sum(buffer_bytes(b) for b in owner.buffers())
+            self.measured_bytes[owner] = owner_bytes
+            self.total_bytes += owner_bytes
+
+    def measured(self, owner):
+        return owner in self.measured_bytes and owner not in self.stale
+
+    def forget(self, owner):
+        self.total_bytes -= self.measured_bytes.pop(owner, 0)
+        self.stale.discard(owner)
+
+    def forget_group(self, group):
+        self.forget(group)
+        for prefab in group.mesh_prefabs.values():
+            self.forget(prefab)
+
+    def invalidate_group(self, group):
+        # Called when the buffers of a group or of its prefabs may change.
+        self.stale.add(group)
+        self.stale.update(group.mesh_prefabs.values())
+
+    def clear(self):
+        self.measured_bytes = {}
+        self.total_bytes = 0
+        self.stale = set()
+
+    def mark_drawn(self, group, prefab):
+        group.last_drawn_frame = self.frame
+        prefab.last_drawn_frame = self.frame
+        if self.measured(group) and self.measured(prefab):
+            return
+        # Host copies can only be dropped once the buffers are uploaded
+        if group.gpu_resident:
+            group.release_host_copies()
+        for owner in (group, prefab):
+            if not self.measured(owner):
+                self.forget(owner)
+                self.measure(owner)
+
+    def report(self, mesh_groups):
+        report = {"total": 0, "cores": {}}
+        for core_id, group in mesh_groups.items():
+            core_bytes = sum(buffer_bytes(b) for b in group.buffers())
+            prefab_bytes = {}
+            for prefab_id, prefab in group.mesh_prefabs.items():
+                prefab_bytes[prefab_id] = sum(buffer_bytes(b) for b in prefab.buffers())
+            report["cores"][core_id] = {
+                "core": core_bytes,
+                "prefabs": prefab_bytes,
+                "host": group.host_bytes(),
+            }
+            report["total"] += core_bytes + sum(prefab_bytes.values())
+        return report
+
+    def end_frame(self, mesh_groups):
+        if self.budget is not None and self.total_bytes > self.budget:
+            self.enforce_budget(mesh_groups)
+        self.frame += 1
+
+    def enforce_budget(self, mesh_groups):
+        # Prefabs and groups that were not drawn during this frame are candidates for eviction,
+        # hidden meshes are never drawn and come first, then the least recently drawn ones.
+        candidates = []
+        for group in mesh_groups.values():
+            for prefab in group.mesh_prefabs.values():
+                if prefab.last_drawn_frame < self.frame:
+                    candidates.append((prefab.last_drawn_frame, prefab))
+            if group.last_drawn_frame < self.frame:
+                candidates.append((group.last_drawn_frame, group))
+        candidates.sort(key=lambda candidate: candidate[0])
+
+        for _, owner in candidates:
+            if self.total_bytes <= self.budget:
+                return
+            free_buffers([b for b in owner.buffers() if b.data is not None])
+            # Buffers without a host copy stay resident
+            self.forget(owner)
+            self.measure(owner)
+            self.stale.add(owner)
+
+#################################################################################################
@@ -1,59 +1,306 @@
 from OpenGL import GL as gl
-from ..viewer.shader import ShaderProgram
-from itertools import chain
+from .normals import MeshNormals
+from .encoding import attribute_buffer, attribute_type, encode_attribute, encode_positions, position_bounds, update_attribute_buffer
+from .interleaved import InterleavedBuffer
+from .memory import free_buffers, host_bytes, release_host_copy
+from .texture_buffer import ANIMATION_TEXTURE_UNIT, BLEND_SHAPE_TEXTURE_UNIT, BONE_TEXTURE_UNIT
+from .deformation import BONE_INDEX_LOCATION, BONE_WEIGHT_LOCATION
+from .chunks import bounding_box_corners, chunk_buffer, chunk_ranges, chunked_vertex_buffer, expand_chunks, visible_chunks
+from .pool import POOL_SLOT_LOCATION, POOL_TEXTURE_UNIT, PoolBuffer, pool_attribute_buffer
+from .slot_map import SlotAllocator, handle_indices
 import numpy as np
 
-import datetime
-import uuid
-
 
 #################################################################################################
 # A mesh core contains the vertex positions and the topology of the triangle mesh.
 
+# Attribute location of the original vertex index of each flattened vertex, read by animation clips and blend shapes.
+VERTEX_INDEX_LOCATION = 1
+
 class GlMeshCoreId:
-    def __init__(self):
-        self.core_id = datetime.datetime.now().strftime('%Y%m%d%H%M%S%f') + str(uuid.uuid4())
+    __slots__ = ("core_id",)
+
+    def __init__(self, handle):
+        self.core_id = handle
 
 class GlMeshCore:
-    def __init__(self, vertices, faces):
-        self.number_vertices = vertices.shape[0]
-        self.number_elements = faces.shape[0]
+    def __init__(self, vertices, faces, precision="full", chunk_size=None, geometry_pools=None):
+        self.precision = precision
+        self.position_offset = np.zeros(3, dtype=np.float32)
+        self.position_scale = np.ones(3, dtype=np.float32)
 
-        self.element_size = faces.shape[1]
+        self.number_vertices = vertices.shape[0]
+        if faces is None:
+            # Point clouds without faces draw each vertex once, their vertex buffer is never flattened.
+            self.number_elements = self.number_vertices
+            self.element_size = 1
+        else:
+            self.number_elements = faces.shape[0]
+            self.element_size = faces.shape[1]
+        self.index_buffer = None
         if self.element_size == 1:
             self.drawing_mode = gl.GL_POINTS 
         elif self.element_size == 3:
             self.drawing_mode = gl.GL_TRIANGLES 
         else:
+            # Polygons are drawn as an indexed set of unique edges.
+            # Edges shared by neighboring faces are only emitted once, and the vertex buffer stays unexpanded.
             self.drawing_mode = gl.GL_LINES 
-            new_faces = np.zeros((self.number_elements, 2 * self.element_size), dtype=np.int32)
-            for s in range(self.element_size):
-                new_faces[:, 2 * s] = faces[:, s]
-                new_faces[:, 2 * s - 1] = faces[:, s]
-            faces = new_faces
-            self.element_size *= 2
-
-        self.elements = faces.reshape((-1,))
+            self.faces = faces
+            self.face_vertex_count = np.bincount(faces.reshape((-1,)), minlength=self.number_vertices)
+            edges = self.unique_edges(faces)
+            self.index_buffer = gl.arrays.vbo.VBO(edges.reshape((-1,)).astype(np.uint32), target=gl.GL_ELEMENT_ARRAY_BUFFER)
+            self.draw_count = edges.size
+
+        # Only flattened meshes are split into chunks, all their flattened buffers share the chunk ranges.
+        self.chunk_ranges = None
+        if self.index_buffer is None:
+            self.elements = None if faces is None else faces.reshape((-1,))
+            self.draw_count = self.number_elements * self.element_size
+            self.chunk_ranges = chunk_ranges(self.number_elements, self.element_size, chunk_size)
         flat_vertices = self.flatten_vertex_attribute(vertices)
-        self.flat_vertex_buffer = gl.arrays.vbo.VBO(flat_vertices)
+        if self.chunk_ranges is not None:
+            # The previous vertices tell which chunks an update touches.
+            self.vertices = vertices.copy()
+            self.chunk_starts = np.array([first for first, count in self.chunk_ranges])
+            self.chunk_min = np.minimum.reduceat(flat_vertices, self.chunk_starts, axis=0)
+            self.chunk_max = np.maximum.reduceat(flat_vertices, self.chunk_starts, axis=0)
+        flat_vertices = self.encode_vertices(vertices, flat_vertices)
+        # Small flattened meshes at full precision can be stored in a shared geometry pool.
+        self.pool_range = None
+        if geometry_pools is not None and self.precision == "full" and self.chunk_ranges is None and self.index_buffer is None:
+            self.pool_range = geometry_pools.allocate(flat_vertices.shape[0])
+        if self.pool_range is not None:
+            self.flat_vertex_buffer = PoolBuffer(self.pool_range, "position")
+            self.flat_vertex_buffer.set_array(flat_vertices)
+        else:
+            self.flat_vertex_buffer = self.create_vertex_buffer(flat_vertices)
+        self.position_size = flat_vertices.shape[1]
+        self.position_type, self.position_normalized = attribute_type(flat_vertices)
+        # Vertex updates are flattened in place into this array, allocated at the first update
+        self.flat_vertices = None
+
+        # Deformations applied in the vertex shaders
+        self.animation_clip = None
+        self.blend_shapes = None
+        self.skin = None
+        self.vertex_index_buffer = None
+
+    @staticmethod
+    def unique_edges(faces):
+        edges = np.stack([faces, np.roll(faces, -1, axis=1)], axis=2).reshape((-1, 2))
+        edges = np.sort(edges, axis=1)
+        return np.unique(edges, axis=0)
 
     def flatten_vertex_attribute(self, attribute):
+        if self.index_buffer is not None or self.elements is None:
+            return attribute
         flat_attribute = attribute[self.elements]
         return flat_attribute
 
+    def flatten_vertices(self, vertices):
+        # Same as flatten_vertex_attribute without allocating on each update, the vertex buffer
+        # of full precision meshes keeps a reference to the returned array.
+        if self.index_buffer is not None or self.elements is None:
+            return vertices
+        if self.flat_vertices is None or self.flat_vertices.dtype != vertices.dtype:
+            self.flat_vertices = np.empty((self.elements.shape[0], vertices.shape[1]), dtype=vertices.dtype)
+        np.take(vertices, self.elements, axis=0, out=self.flat_vertices)
+        return self.flat_vertices
+
     def flatten_face_attribute(self, attribute):
+        if self.index_buffer is not None:
+            # Indexed edges have no per-face vertices, so face values are averaged onto the vertices.
+            vertex_attribute = np.zeros((self.number_vertices,) + attribute.shape[1:], dtype=attribute.dtype)
+            np.add.at(vertex_attribute, self.faces, attribute[:, np.newaxis])
+            count = np.maximum(self.face_vertex_count, 1).reshape((-1,) + (1,) * (attribute.ndim - 1))
+            return (vertex_attribute / count).astype(attribute.dtype)
+        if self.elements is None:
+            return attribute
         flat_attribute = np.repeat(attribute, self.element_size, axis=0)
         return flat_attribute
 
-    def bind_buffers(self):
-        gl.glEnableVertexAttribArray(0)
-        self.flat_vertex_buffer.bind()
-        gl.glVertexAttribPointer(0, 3, gl.GL_FLOAT, False, 0, None)
+    def encode_vertices(self, vertices, flat_vertices):
+        if self.precision != "full":
+            # The bounding box is taken on the unexpanded vertices and refreshed on every update.
+            self.position_offset, self.position_scale = position_bounds(vertices)
+        return self.encode_flat_vertices(flat_vertices)
+
+    def encode_flat_vertices(self, flat_vertices):
+        if self.precision == "full":
+            return flat_vertices
+        return encode_positions(flat_vertices, self.position_offset, self.position_scale, self.precision)
+
+    def create_vertex_buffer(self, flat_value):
+        return chunked_vertex_buffer(flat_value, self.chunk_ranges)
+
+    def number_chunks(self):
+        if self.chunk_ranges is None:
+            return 1
+        return len(self.chunk_ranges)
+
+    def deformed(self):
+        return self.animation_clip is not None or self.blend_shapes is not None or self.skin is not None
+
+    def visible_chunks(self, mvp_matrices):
+        # Chunk bounds only hold for the undeformed positions.
+        if self.chunk_ranges is None or self.deformed():
+            return np.ones((mvp_matrices.shape[0], self.number_chunks()), dtype=bool)
+        return visible_chunks(mvp_matrices, bounding_box_corners(self.chunk_min, self.chunk_max))
+
+    def bind_buffers(self, gl_state, bind_positions=True, chunk=0):
+        if bind_positions:
+            vertex_buffer, offset = chunk_buffer(self.flat_vertex_buffer, chunk)
+            gl_state.vertex_attribute(0, vertex_buffer, self.position_size, self.position_type, self.position_normalized, offset=offset)
+        gl_state.disable_attribute(POOL_SLOT_LOCATION)
+        if self.animation_clip is not None or self.blend_shapes is not None:
+            vertex_index_buffer, offset = chunk_buffer(self.vertex_index_buffer, chunk)
+            gl_state.vertex_attribute(VERTEX_INDEX_LOCATION, vertex_index_buffer, 1, gl.GL_INT, False, offset=offset, integer=True)
+        else:
+            gl_state.disable_attribute(VERTEX_INDEX_LOCATION)
+        if self.skin is not None:
+            self.skin.bind_buffers(gl_state, chunk)
+        else:
+            gl_state.disable_attribute(BONE_INDEX_LOCATION)
+            gl_state.disable_attribute(BONE_WEIGHT_LOCATION)
+        if self.index_buffer is not None:
+            self.index_buffer.bind()
+
+    def bind_uniforms(self, shader):
+        shader.set_builtin_uniform(gl.glUniform3fv, "positionOffset", 1, self.position_offset)
+        shader.set_builtin_uniform(gl.glUniform3fv, "positionScale", 1, self.position_scale)
+        # Deformation samplers always point to their own units, samplers of different types can not share one.
+        shader.set_builtin_uniform(gl.glUniform1i, "animationFrames", ANIMATION_TEXTURE_UNIT)
+        shader.set_builtin_uniform(gl.glUniform1i, "blendShapeDeltas", BLEND_SHAPE_TEXTURE_UNIT)
+        shader.set_builtin_uniform(gl.glUniform1i, "boneMatrices", BONE_TEXTURE_UNIT)
+        shader.set_builtin_uniform(gl.glUniform1i, "poolMatrices", POOL_TEXTURE_UNIT)
+        shader.set_builtin_uniform(gl.glUniform1i, "pooled", False)
+        shader.set_builtin_uniform(gl.glUniform1i, "animated", self.animation_clip is not None)
+        shader.set_builtin_uniform(gl.glUniform1i, "skinned", self.skin is not None)
+        if self.animation_clip is not None:
+            self.animation_clip.bind(shader)
+        if self.blend_shapes is not None:
+            self.blend_shapes.bind(shader)
+        else:
+            shader.set_builtin_uniform(gl.glUniform1i, "blendShapeCount", 0)
+        if self.skin is not None:
+            self.skin.bind(shader)
+
+    def check_deformation(self, deformation, description):
+        if deformation.number_vertices != self.number_vertices:
+            raise ValueError(f'{description} has {deformation.number_vertices} vertices, the mesh has {self.number_vertices}')
+        deformation.check_size()
+
+    def create_vertex_indices(self):
+        if self.vertex_index_buffer is None:
+            vertex_indices = self.flatten_vertex_attribute(np.arange(self.number_vertices, dtype=np.int32))
+            self.vertex_index_buffer = self.create_vertex_buffer(vertex_indices)
+
+    def set_animation_clip(self, animation_clip):
+        self.check_deformation(animation_clip, 'Animation clip')
+        self.remove_animation_clip()
+        self.animation_clip = animation_clip
+        self.create_vertex_indices()
+
+    def remove_animation_clip(self):
+        if self.animation_clip is not None:
+            self.animation_clip.delete()
+            self.animation_clip = None
+
+    def set_blend_shapes(self, blend_shapes):
+        self.check_deformation(blend_shapes, 'Blend shapes')
+        self.remove_blend_shapes()
+        self.blend_shapes = blend_shapes
+        self.create_vertex_indices()
+
+    def remove_blend_shapes(self):
+        if self.blend_shapes is not None:
+            self.blend_shapes.delete()
+            self.blend_shapes = None
+
+    def set_skin(self, skin):
+        self.check_deformation(skin, 'Skin')
+        self.remove_skin()
+        skin.upload_attributes(self)
+        self.skin = skin
+
+    def remove_skin(self):
+        if self.skin is not None:
+            self.skin.delete()
+            self.skin = None
+
+    def remove_deformations(self):
+        self.remove_animation_clip()
+        self.remove_blend_shapes()
+        self.remove_skin()
+
+    def release_pool_range(self):
+        if self.pool_range is not None:
+            self.pool_range.pool.free(self.pool_range)
+            self.pool_range = None
+
+    def buffers(self):
+        vertex_buffers = [self.flat_vertex_buffer]
+        if self.index_buffer is not None:
+            vertex_buffers.append(self.index_buffer)
+        if self.vertex_index_buffer is not None:
+            vertex_buffers.append(self.vertex_index_buffer)
+        vertex_buffers = expand_chunks(vertex_buffers)
+        for deformation in [self.animation_clip, self.blend_shapes, self.skin]:
+            if deformation is not None:
+                vertex_buffers += deformation.buffers()
+        return vertex_buffers
+
+    def topology_bytes(self):
+        # Topology arrays stay on the host, they are needed to flatten later vertex updates.
+        if self.index_buffer is not None:
+            return self.faces.nbytes + self.face_vertex_count.nbytes
+        elements_bytes = 0 if self.elements is None else self.elements.nbytes
+        if self.flat_vertices is not None and self.precision != "full":
+            # The flattened vertices of encoded meshes are not the data of their vertex buffer
+            elements_bytes += self.flat_vertices.nbytes
+        if self.chunk_ranges is not None:
+            return elements_bytes + self.vertices.nbytes
+        return elements_bytes
+
+    def draw(self, chunk=0):
+        if self.index_buffer is not None:
+            gl.glDrawElements(self.drawing_mode, self.draw_count, gl.GL_UNSIGNED_INT, None)
+        elif self.chunk_ranges is not None:
+            gl.glDrawArrays(self.drawing_mode, 0, self.chunk_ranges[chunk][1])
+        else:
+            gl.glDrawArrays(self.drawing_mode, 0, self.draw_count)
 
     def update_vertices(self, vertices):
-        flat_vertices = self.flatten_vertex_attribute(vertices)
+        if self.chunk_ranges is not None:
+            self.update_chunked_vertices(vertices)
+            return
+        flat_vertices = self.encode_vertices(vertices, self.flatten_vertices(vertices))
         self.flat_vertex_buffer.set_array(flat_vertices)
 
+    def update_chunked_vertices(self, vertices):
+        # Only the chunks with a face touching a moved vertex are flattened and uploaded again.
+        changed_vertices = np.any(vertices != self.vertices, axis=1)
+        if self.elements is not None:
+            changed_vertices = changed_vertices[self.elements]
+        changed_chunks = np.logical_or.reduceat(changed_vertices, self.chunk_starts)
+        np.copyto(self.vertices, vertices)
+        if self.precision != "full":
+            position_offset, position_scale = self.position_offset, self.position_scale
+            self.position_offset, self.position_scale = position_bounds(vertices)
+            if not (np.array_equal(position_offset, self.position_offset) and np.array_equal(position_scale, self.position_scale)):
+                # Encoded positions are relative to the bounding box of the whole mesh.
+                changed_chunks[:] = True
+        for chunk in np.flatnonzero(changed_chunks):
+            first, count = self.chunk_ranges[chunk]
+            if self.elements is None:
+                flat_vertices = vertices[first:first + count]
+            else:
+                flat_vertices = vertices[self.elements[first:first + count]]
+            self.chunk_min[chunk] = np.min(flat_vertices, axis=0)
+            self.chunk_max[chunk] = np.max(flat_vertices, axis=0)
+            self.flat_vertex_buffer.set_chunk(chunk, self.encode_flat_vertices(flat_vertices))
+
 #################################################################################################
         
 #################################################################################################
@@ -61,26 +308,59 @@ class GlMeshCore:
 # It defines the appearance of a given mesh.
 
 class GlMeshPrefabId:
-    def __init__(self, core_id):
+    __slots__ = ("core_id", "prefab_id")
+
+    def __init__(self, core_id, handle):
         self.core_id = core_id.core_id
-        self.prefab_id = datetime.datetime.now().strftime('%Y%m%d%H%M%S%f') + str(uuid.uuid4())
+        self.prefab_id = handle
 
 class GlMeshPrefab:
-    def __init__(self, attributes, uniforms, shader, fill, copy_from=None):
+    def __init__(
+        self, attributes, uniforms, shader, fill, copy_from=None, shared_buffers={}, precision="full", interleaved=False,
+        chunk_ranges=None
+    ):
         self.fill = fill
+        self.precision = precision
+        self.chunk_ranges = chunk_ranges
+        self.interleaved = interleaved
+        self.interleaved_buffer = None
+        self.last_drawn_frame = -1
         self.shader = shader
         self.attributes = attributes
         self.uniforms = uniforms
-
+        self.uniform_key = None
+        # Set by update_uniform, the uniform values are only sent again when they changed
+        # or when another prefab used the shader in between.
+        self.uniforms_dirty = True
+
+        # Buffers copied from another prefab or shared by the mesh group are not owned by this prefab.
+        # The owner of a copied buffer knows its copies, it hands the buffer over to one of them
+        # instead of freeing or overwriting it.
         self.vertex_buffers = {}
+        self.owned_attributes = set()
+        self.copied_from = {}
+        self.copies = {}
         for attribute in self.shader.attributes:
             if not attribute in attributes:
                 if copy_from is not None and attribute in copy_from.vertex_buffers:
                     self.vertex_buffers[attribute] = copy_from.vertex_buffers[attribute]
+                    owner = copy_from if attribute in copy_from.owned_attributes else copy_from.copied_from.get(attribute)
+                    if owner is not None:
+                        self.copied_from[attribute] = owner
+                        owner.copies.setdefault(attribute, []).append(self)
+                elif attribute in shared_buffers:
+                    self.vertex_buffers[attribute] = shared_buffers[attribute]
                 else:
                     raise ValueError(f'Attribute {attribute} missing from mesh prefab data')
             else:
-                self.vertex_buffers[attribute] = (gl.arrays.vbo.VBO(attributes[attribute]), attributes[attribute].shape[1])
+                self.vertex_buffers[attribute] = attribute_buffer(
+                    encode_attribute(attribute, attributes[attribute], precision), chunk_ranges
+                )
+                self.owned_attributes.add(attribute)
+
+        self.attribute_locations = {"position": 0}
+        for attribute in self.vertex_buffers:
+            self.attribute_locations[attribute] = self.shader.attributes[attribute]
 
         self.uniform_values = {}
         for uniform in self.shader.uniforms:
@@ -92,48 +372,155 @@ class GlMeshPrefab:
             else:
                 self.uniform_values[uniform] = uniforms[uniform]
 
+        # Sampler values are shared by the prefabs using them, their textures are deleted with the last one.
+        for uniform in self.shader.samplers:
+            self.uniform_values[uniform].acquire()
+
     def get_shader(self):
         return self.shader
 
-    def bind_vertex_attributes(self):
+    def has_host_data(self, core):
+        vertex_buffers = [core.flat_vertex_buffer] + [self.vertex_buffers[attribute][0] for attribute in self.vertex_buffers]
+        return all(vertex_buffer.data is not None for vertex_buffer in vertex_buffers)
+
+    def interleave(self, core):
+        # The separate attribute buffers are never bound in interleaved mode, so they are not allocated on the GPU.
+        # Their host data is packed together with the core positions into a single buffer.
+        arrays = {"position": core.flat_vertex_buffer.data}
+        for attribute in self.vertex_buffers:
+            arrays[attribute] = self.vertex_buffers[attribute][0].data
+        if self.interleaved_buffer is None:
+            self.interleaved_buffer = InterleavedBuffer(arrays)
+        else:
+            self.interleaved_buffer.update(arrays)
+
+    def bind_vertex_attributes(self, gl_state, chunk=0):
+        if self.interleaved_buffer is not None:
+            self.interleaved_buffer.bind(gl_state, self.attribute_locations)
+            return
         for attribute in self.vertex_buffers:
             attribute_location = self.shader.attributes[attribute]
-            gl.glEnableVertexAttribArray(attribute_location)
-            attribute_buffer = self.vertex_buffers[attribute][0]
-            attribute_size = self.vertex_buffers[attribute][1]
-            attribute_buffer.bind()
-            gl.glVertexAttribPointer(attribute_location, attribute_size, gl.GL_FLOAT, False, 0, None)
+            vertex_buffer, attribute_size, attribute_type, attribute_normalized = self.vertex_buffers[attribute]
+            vertex_buffer, offset = chunk_buffer(vertex_buffer, chunk)
+            gl_state.vertex_attribute(attribute_location, vertex_buffer, attribute_size, attribute_type, attribute_normalized, offset=offset)
 
     def bind_uniform_(self, location, value):
+        if type(value) is bool:
+            self.shader.set_uniform(gl.glUniform1i, location, value)
+            return
         shape = value.shape
         if len(shape) == 1:
             if shape[0] == 1:
-                gl.glUniform1fv(location, 1, value)
+                self.shader.set_uniform(gl.glUniform1fv, location, 1, value)
             if shape[0] == 2:
-                gl.glUniform2fv(location, 1, value)
+                self.shader.set_uniform(gl.glUniform2fv, location, 1, value)
             if shape[0] == 3:
-                gl.glUniform3fv(location, 1, value)
+                self.shader.set_uniform(gl.glUniform3fv, location, 1, value)
             if shape[0] == 4:
-                gl.glUniform4fv(location, 1, value)
+                self.shader.set_uniform(gl.glUniform4fv, location, 1, value)
 
         if len(shape) == 2:
             if shape[0] == shape[1] and shape[0] == 2:
-                gl.glUniformMatrix2fv(location, 1, gl.GL_FALSE, value)
+                self.shader.set_uniform(gl.glUniformMatrix2fv, location, 1, gl.GL_FALSE, value)
             if shape[0] == shape[1] and shape[0] == 3:
-                gl.glUniformMatrix3fv(location, 1, gl.GL_FALSE, value)
+                self.shader.set_uniform(gl.glUniformMatrix3fv, location, 1, gl.GL_FALSE, value)
             if shape[0] == shape[1] and shape[0] == 4:
-                gl.glUniformMatrix4fv(location, 1, gl.GL_FALSE, value)
+                self.shader.set_uniform(gl.glUniformMatrix4fv, location, 1, gl.GL_FALSE, value)
 
     def bind_uniforms(self):
+        if "normal" in self.vertex_buffers:
+            # Octahedral normals only have two components, the shader decodes them when this flag is set.
+            octahedral_normals = self.vertex_buffers["normal"][1] == 2
+            self.shader.set_builtin_uniform(gl.glUniform1i, "octahedralNormals", octahedral_normals)
+
+        bind_values = self.uniforms_dirty or self.shader.uniform_owner is not self
+        texture_unit = 0
         for uniform in self.uniform_values:
             uniform_location = self.shader.uniforms[uniform]
-            self.bind_uniform_(uniform_location, self.uniform_values[uniform])
+            if uniform in self.shader.samplers:
+                # Sampler uniforms hold texture objects, each one is bound to its own texture unit.
+                self.uniform_values[uniform].bind(texture_unit)
+                self.shader.set_uniform(gl.glUniform1i, uniform_location, texture_unit)
+                texture_unit += 1
+            elif bind_values:
+                self.bind_uniform_(uniform_location, self.uniform_values[uniform])
+        self.shader.uniform_owner = self
+        self.uniforms_dirty = False
 
     def update_uniform(self, name, value):
+        if name in self.shader.samplers:
+            value.acquire()
+            self.uniform_values[name].release()
         self.uniform_values[name] = value
+        self.uniform_key = None
+        self.uniforms_dirty = True
+
+    def poolable(self):
+        # Prefabs reading all their attributes from a geometry pool can be drawn together with other pooled meshes.
+        if self.interleaved_buffer is not None or len(self.owned_attributes) > 0 or len(self.shader.samplers) > 0:
+            return False
+        return all(isinstance(self.vertex_buffers[attribute][0], PoolBuffer) for attribute in self.vertex_buffers)
+
+    def get_uniform_key(self):
+        # Pooled prefabs with equal uniform values share a draw call.
+        if self.uniform_key is None:
+            self.uniform_key = tuple((name, np.asarray(value).tobytes()) for name, value in self.uniform_values.items())
+        return self.uniform_key
+
+    def hand_over(self, attribute):
+        # Gives an owned buffer to the first prefab that copied it, returns False if there is none.
+        copies = self.copies.pop(attribute, [])
+        if len(copies) == 0:
+            return False
+        self.owned_attributes.discard(attribute)
+        new_owner = copies[0]
+        del new_owner.copied_from[attribute]
+        new_owner.owned_attributes.add(attribute)
+        for copy in copies[1:]:
+            copy.copied_from[attribute] = new_owner
+        if len(copies) > 1:
+            new_owner.copies[attribute] = copies[1:]
+        return True
+
+    def stop_copying(self, attribute):
+        owner = self.copied_from.pop(attribute, None)
+        if owner is not None:
+            owner.copies[attribute].remove(self)
+            if len(owner.copies[attribute]) == 0:
+                del owner.copies[attribute]
 
     def update_attribute(self, name, value):
-        self.vertex_buffers[name] = (gl.arrays.vbo.VBO(value), value.shape[1])
+        # The owned buffer is updated in place, prefabs that copied it keep the previous values.
+        value = encode_attribute(name, value, self.precision)
+        self.stop_copying(name)
+        if name in self.owned_attributes and not self.hand_over(name):
+            self.vertex_buffers[name] = update_attribute_buffer(self.vertex_buffers[name][0], value)
+        else:
+            self.vertex_buffers[name] = attribute_buffer(value, self.chunk_ranges)
+            self.owned_attributes.add(name)
+
+    def buffers(self):
+        owned_buffers = expand_chunks([self.vertex_buffers[attribute][0] for attribute in self.owned_attributes])
+        if self.interleaved_buffer is not None:
+            owned_buffers.append(self.interleaved_buffer.vertex_buffer)
+        return owned_buffers
+
+    def release_host_copies(self):
+        if self.interleaved_buffer is not None:
+            # The attribute arrays are kept to rebuild the interleaved buffer on later updates.
+            release_host_copy(self.interleaved_buffer.vertex_buffer)
+        else:
+            for vertex_buffer in self.buffers():
+                release_host_copy(vertex_buffer)
+
+    def delete(self):
+        for attribute in list(self.copied_from):
+            self.stop_copying(attribute)
+        for attribute in list(self.copies):
+            self.hand_over(attribute)
+        free_buffers(self.buffers())
+        for uniform in self.shader.samplers:
+            self.uniform_values[uniform].release()
 
 #################################################################################################
 
@@ -142,27 +529,128 @@ class GlMeshPrefab:
 # It also contains a visibility flag that determines whether the mesh will be drawn or not.
 
 class GlMeshInstanceId:
-    def __init__(self, prefab_id):
+    __slots__ = ("core_id", "prefab_id", "instance_id")
+
+    def __init__(self, prefab_id, handle):
         self.core_id = prefab_id.core_id
         self.prefab_id = prefab_id.prefab_id
-        self.instance_id = datetime.datetime.now().strftime('%Y%m%d%H%M%S%f') + str(uuid.uuid4())
+        self.instance_id = handle
 
 class GlMeshInstance:
-    def __init__(self, model_matrix):
-        self.model_matrix = model_matrix
-        self.visibility= True
+    # Lightweight view on one row of an instance table.
+    __slots__ = ("table", "index")
+
+    def __init__(self, table, index):
+        self.table = table
+        self.index = index
 
     def set_model_matrix(self, new_model):
-        self.model_matrix = new_model
+        self.table.set_model_matrices(self.index, new_model)
 
     def get_model_matrix(self):
-        return self.model_matrix
+        return self.table.model_matrices[self.index]
 
     def get_visibility(self):
-        return self.visibility
+        return bool(self.table.visibility[self.index])
 
     def set_visibility(self, visibility):
-        self.visibility = visibility
+        self.table.visibility[self.index] = visibility
+
+# The model matrices, visibility flags and prefab handles of all instances are stored in contiguous arrays.
+# Instances are grouped by prefab lazily, the grouping is only recomputed after instances are added or removed.
+
+class InstanceTable(SlotAllocator):
+    def __init__(self):
+        super().__init__()
+        self.alive = np.zeros(0, dtype=bool)
+        self.visibility = np.zeros(0, dtype=bool)
+        self.prefabs = np.zeros(0, dtype=np.int64)
+        self.nodes = np.zeros(0, dtype=np.int64)
+        self.model_matrices = np.zeros((0, 4, 4), dtype=np.float32)
+        self.prefab_instances = None
+
+    def ensure_capacity(self, capacity):
+        current = self.alive.shape[0]
+        if capacity <= current:
+            return
+        capacity = max(capacity, 2 * current)
+        extra = capacity - current
+        self.alive = np.concatenate([self.alive, np.zeros(extra, dtype=bool)])
+        self.visibility = np.concatenate([self.visibility, np.zeros(extra, dtype=bool)])
+        self.prefabs = np.concatenate([self.prefabs, np.zeros(extra, dtype=np.int64)])
+        self.nodes = np.concatenate([self.nodes, -np.ones(extra, dtype=np.int64)])
+        self.model_matrices = np.concatenate([self.model_matrices, np.zeros((extra, 4, 4), dtype=np.float32)])
+
+    def indices(self, handles):
+        handles = np.asarray(handles, dtype=np.int64)
+        valid = self.valid(handles)
+        if not np.all(valid):
+            raise KeyError(f"Invalid mesh instance handles {handles[~valid]}")
+        return handle_indices(handles)
+
+    def insert(self, handles, prefab_handle, model_matrices):
+        indices = self.indices(handles)
+        if indices.shape[0] == 0:
+            return
+        self.ensure_capacity(int(np.max(indices)) + 1)
+        self.alive[indices] = True
+        self.visibility[indices] = True
+        self.prefabs[indices] = prefab_handle
+        self.nodes[indices] = -1
+        self.set_model_matrices(indices, model_matrices)
+        self.prefab_instances = None
+
+    def set_model_matrices(self, indices, model_matrices):
+        if model_matrices is None:
+            model_matrices = np.eye(4, dtype=np.float32)
+        self.model_matrices[indices] = model_matrices
+
+    def remove(self, handles):
+        indices = self.indices(handles)
+        self.remove_indices(indices)
+
+    def remove_indices(self, indices):
+        self.alive[indices] = False
+        self.visibility[indices] = False
+        self.nodes[indices] = -1
+        self.release(indices)
+        self.prefab_instances = None
+
+    def remove_prefab(self, prefab_handle):
+        self.remove_indices(np.nonzero(self.alive & (self.prefabs == prefab_handle))[0])
+
+    def clear(self):
+        self.remove_indices(np.nonzero(self.alive)[0])
+
+    def attach(self, handles, node_index):
+        # A node index of -1 detaches the instances, they keep their last model matrix.
+        self.nodes[self.indices(handles)] = node_index
+
+    def detach_nodes(self, node_indices):
+        self.nodes[np.isin(self.nodes, node_indices)] = -1
+
+    def apply_scene_graph(self, scene_graph, updated_nodes):
+        attached = np.nonzero(self.alive & (self.nodes >= 0))[0]
+        attached = attached[updated_nodes[self.nodes[attached]]]
+        self.model_matrices[attached] = scene_graph.world_matrices[self.nodes[attached]]
+
+    def get(self, handle):
+        return GlMeshInstance(self, int(self.indices([handle])[0]))
+
+    def group_by_prefab(self):
+        if self.prefab_instances is None:
+            indices = np.nonzero(self.alive)[0]
+            indices = indices[np.argsort(self.prefabs[indices], kind="stable")]
+            prefabs, starts = np.unique(self.prefabs[indices], return_index=True)
+            self.prefab_instances = dict(zip(prefabs.tolist(), np.split(indices, starts[1:])))
+        return self.prefab_instances
+
+    def instances_of(self, prefab_handle):
+        return self.group_by_prefab().get(prefab_handle, np.zeros(0, dtype=np.int64))
+
+    def visible_instances_of(self, prefab_handle):
+        indices = self.instances_of(prefab_handle)
+        return indices[self.visibility[indices]]
 
 #################################################################################################
 
@@ -170,44 +658,72 @@ class GlMeshInstance:
 # A mesh group contains all the prefabs and instances related to a mesh core.
 
 class MeshGroup:
-    def __init__(self, vertices, faces):
-        self.mesh_core = GlMeshCore(vertices, faces)
+    def __init__(
+        self, vertices, faces, normals=None, precision="full", gpu_resident=False, mesh_instances=None, chunk_size=None,
+        geometry_pools=None
+    ):
+        self.mesh_core = GlMeshCore(vertices, faces, precision, chunk_size, geometry_pools)
+        self.gpu_resident = gpu_resident
         self.mesh_prefabs = {}
-        self.mesh_instances = {}
+        # The instance table can be shared between all the mesh groups of a viewer.
+        self.mesh_instances = mesh_instances if mesh_instances is not None else InstanceTable()
+        self.last_drawn_frame = -1
+
+        # Buffers owned by the group and shared by all its prefabs, e.g. normals computed by the viewer.
+        self.shared_buffers = {}
+        self.mesh_normals = None
+        if normals is not None:
+            self.mesh_normals = MeshNormals(faces, vertices.shape[0], normals)
+            if self.mesh_core.pool_range is not None:
+                self.shared_buffers["normal"] = pool_attribute_buffer(self.mesh_core.pool_range, "normal", self.flatten_normals(vertices))
+            else:
+                self.shared_buffers["normal"] = attribute_buffer(self.flatten_normals(vertices), self.mesh_core.chunk_ranges)
 
-    def add_prefab(self, prefab_id, vertex_attributes, face_attributes, uniforms, shader, fill, copy_from):
+    def add_prefab(
+        self, prefab_id, vertex_attributes, face_attributes, uniforms, shader, fill, copy_from, precision="full", interleaved=False
+    ):
         attributes = {}
         for key in vertex_attributes:
             attributes[key] = self.mesh_core.flatten_vertex_attribute(vertex_attributes[key])
         for key in face_attributes:
             attributes[key] = self.mesh_core.flatten_face_attribute(face_attributes[key])
 
-        self.mesh_prefabs[prefab_id.prefab_id] = GlMeshPrefab(attributes, uniforms, shader, fill, copy_from)
-        self.mesh_instances[prefab_id.prefab_id] = {}
+        # Interleaving packs the whole mesh into one buffer, chunked and pooled meshes keep separate attribute buffers.
+        interleaved = interleaved and self.mesh_core.chunk_ranges is None and self.mesh_core.pool_range is None
+        prefab = GlMeshPrefab(
+            attributes, uniforms, shader, fill, copy_from, self.shared_buffers, precision, interleaved, self.mesh_core.chunk_ranges
+        )
+        if interleaved and not prefab.has_host_data(self.mesh_core):
+            # GPU resident groups may have dropped the host data to interleave, the attributes then stay in separate buffers.
+            prefab.interleaved = False
+        if prefab.interleaved:
+            prefab.interleave(self.mesh_core)
+        self.mesh_prefabs[prefab_id.prefab_id] = prefab
 
     def add_instance(self, instance_id, model_matrix):
-        # if instance_id.prefab_id not in self.mesh_instances:
-            # self.mesh_instances[instance_id.prefab_id] = {}
-        self.mesh_instances[instance_id.prefab_id][instance_id.instance_id] = GlMeshInstance(model_matrix)
+        self.mesh_instances.insert([instance_id.instance_id], instance_id.prefab_id, model_matrix)
+
+    def add_instances(self, prefab_id, handles, model_matrices):
+        self.mesh_instances.insert(handles, prefab_id.prefab_id, model_matrices)
 
     def get_prefab(self, prefab_id):
         return self.mesh_prefabs[prefab_id.prefab_id]
 
     def get_instance(self, instance_id):
-        return self.mesh_instances[instance_id.prefab_id][instance_id.instance_id]
+        return self.mesh_instances.get(instance_id.instance_id)
 
     def remove_prefab(self, prefab_id):
-        self.mesh_prefabs.pop(prefab_id.prefab_id)
-        self.mesh_instances.pop(prefab_id.prefab_id)
+        self.mesh_prefabs.pop(prefab_id.prefab_id).delete()
+        self.mesh_instances.remove_prefab(prefab_id.prefab_id)
 
     def remove_instance(self, instance_id):
-        self.mesh_instances[instance_id.prefab_id].pop(instance_id.instance_id)
+        self.mesh_instances.remove([instance_id.instance_id])
 
     def get_prefab_length(self):
         return len(self.mesh_prefabs)
 
     def get_instance_length(self, prefab_id):
-        return len(self.mesh_instances[prefab_id.prefab_id])
+        return len(self.mesh_instances.instances_of(prefab_id.prefab_id))
 
     def number_vertices(self):
         return self.mesh_core.number_vertices
@@ -215,28 +731,70 @@ class MeshGroup:
     def number_elements(self):
         return self.mesh_core.number_elements
     
-    def bind_vertex_attributes(self):
-        self.mesh_core.bind_buffers()
+    def bind_vertex_attributes(self, gl_state):
+        self.mesh_core.bind_buffers(gl_state)
+
+    def buffers(self):
+        return self.mesh_core.buffers() + expand_chunks([buffer[0] for buffer in self.shared_buffers.values()])
+
+    def delete(self):
+        for prefab_handle, prefab in self.mesh_prefabs.items():
+            prefab.delete()
+            self.mesh_instances.remove_prefab(prefab_handle)
+        self.mesh_core.remove_deformations()
+        free_buffers(self.buffers())
+        self.mesh_core.release_pool_range()
+
+    def release_host_copies(self):
+        for prefab in self.mesh_prefabs.values():
+            prefab.release_host_copies()
+        if any(prefab.interleaved for prefab in self.mesh_prefabs.values()):
+            # Interleaved prefabs read the core positions and shared attributes when they are rebuilt.
+            return
+        for vertex_buffer in self.buffers():
+            release_host_copy(vertex_buffer)
+
+    def host_bytes(self):
+        vertex_buffers = self.buffers()
+        for prefab in self.mesh_prefabs.values():
+            vertex_buffers += prefab.buffers()
+        total = sum(host_bytes(vertex_buffer) for vertex_buffer in vertex_buffers)
+        total += self.mesh_core.topology_bytes()
+        if self.mesh_normals is not None:
+            total += self.mesh_normals.host_bytes()
+        return total
+
+    def flatten_normals(self, vertices):
+        normals = self.mesh_normals.compute(vertices)
+        if self.mesh_normals.mode == "face":
+            return self.mesh_core.flatten_face_attribute(normals)
+        return self.mesh_core.flatten_vertex_attribute(normals)
 
     def update_vertices(self, vertices):
         self.mesh_core.update_vertices(vertices)
+        if self.mesh_normals is not None:
+            self.shared_buffers["normal"][0].set_array(self.flatten_normals(vertices))
+        for prefab in self.mesh_prefabs.values():
+            if prefab.interleaved:
+                prefab.interleave(self.mesh_core)
+
+    def update_prefab_attribute(self, prefab_id, name, flat_value):
+        prefab = self.get_prefab(prefab_id)
+        prefab.update_attribute(name, flat_value)
+        if prefab.interleaved:
+            prefab.interleave(self.mesh_core)
 
     def update_prefab_vertex_attribute(self, prefab_id, name, value):
         flat_value = self.mesh_core.flatten_vertex_attribute(value)
-        self.get_prefab(prefab_id).update_attribute(name, flat_value)
+        self.update_prefab_attribute(prefab_id, name, flat_value)
 
     def update_prefab_face_attribute(self, prefab_id, name, value):
         flat_value = self.mesh_core.flatten_face_attribute(value)
-        self.get_prefab(prefab_id).update_attribute(name, flat_value)
+        self.update_prefab_attribute(prefab_id, name, flat_value)
 
     def __iter__(self):
-        iterators = []
-        for prefab_id, prefab in self.mesh_prefabs.items():
-            count_instances = len(self.mesh_instances[prefab_id])
-            cores = [self.mesh_core] * count_instances
-            prefabs = [prefab] * count_instances
-            instances = self.mesh_instances[prefab_id].values()
-            iterators.append(zip(cores, prefabs, instances))
-        return chain(*iterators)
+        # Yields each prefab with the table indices of its visible instances.
+        for prefab_handle, prefab in self.mesh_prefabs.items():
+            yield self.mesh_core, prefab, self.mesh_instances.visible_instances_of(prefab_handle)
 
 #################################################################################################
@@ -0,0 +1,56 @@
+import numpy as np
+
+
+#################################################################################################
+# Mesh normals computed by the viewer from the vertex positions of a triangle mesh core.
+# The face-to-vertex adjacency is built once, so refreshing the normals after a vertex update
+# only requires a few vectorized NumPy operations.
+
+class MeshNormals:
+    def __init__(self, faces, number_vertices, mode):
+        if mode not in ("face", "vertex"):
+            raise ValueError(f"Unknown normal mode {mode}, expected 'face' or 'vertex'")
+        if faces.shape[1] != 3:
+            raise ValueError("Normals can only be computed for triangle meshes")
+        self.faces = faces
+        self.mode = mode
+
+        if self.mode == "vertex":
+            # Compressed adjacency: faces sorted by incident vertex, with one offset per vertex.
+            flat_faces = faces.reshape((-1,))
+            self.incident_faces = np.argsort(flat_faces, kind="stable") // 3
+            incident_count = np.bincount(flat_faces, minlength=number_vertices)
+            self.connected = incident_count > 0
+            offsets = np.concatenate([[0], np.cumsum(incident_count)[:-1]])
+            self.incident_offsets = offsets[self.connected]
+            self.number_vertices = number_vertices
+
+    def host_bytes(self):
+        total = self.faces.nbytes
+        if self.mode == "vertex":
+            total += self.incident_faces.nbytes + self.incident_offsets.nbytes + self.connected.nbytes
+        return total
+
+    @staticmethod
+    def normalize(normals):
+        norm = np.linalg.norm(normals, axis=1, keepdims=True)
+        norm[norm == 0] = 1.0
+        return normals / norm
+
+    def compute(self, vertices):
+        v0 = vertices[self.faces[:, 0]]
+        v1 = vertices[self.faces[:, 1]]
+        v2 = vertices[self.faces[:, 2]]
+        # The cross product length is twice the face area, which gives the area weighting for free.
+        face_normals = np.cross(v1 - v0, v2 - v0)
+        if self.mode == "face":
+            return self.normalize(face_normals).astype(np.float32)
+
+        vertex_normals = np.zeros((self.number_vertices, 3), dtype=face_normals.dtype)
+        if self.incident_offsets.shape[0] > 0:
+            vertex_normals[self.connected] = np.add.reduceat(
+                face_normals[self.incident_faces], self.incident_offsets, axis=0
+            )
+        return self.normalize(vertex_normals).astype(np.float32)
+
+#################################################################################################
@@ -0,0 +1,204 @@
+from OpenGL import GL as gl
+import numpy as np
+
+from .memory import buffer_resident
+from .texture_buffer import POOL_TEXTURE_UNIT, TextureBuffer
+
+
+#################################################################################################
+# A geometry pool stores the flattened positions and normals of many small meshes in a few large
+# shared buffers. Each mesh lives in a range of the pool and gets a slot, written in the poolSlot
+# attribute of its vertices. Compatible prefabs of the meshes of a pool are drawn together with
+# one glMultiDrawArrays call per instance layer, the vertex shaders read the matrices of each draw
+# from a texture buffer indexed by the layer and the pool slot.
+# Pools store de-indexed vertices like the other mesh cores, whose face attributes and flat normals
+# are flattened per triangle corner, so there are no shared index buffers.
+
+POOL_SLOT_LOCATION = 4
+DEFAULT_POOL_VERTICES = 1 << 20
+# Larger meshes keep their own buffers
+MAX_POOLED_VERTICES = 1 << 16
+
+class PoolRange:
+    __slots__ = ("pool", "first", "count", "slot")
+
+    def __init__(self, pool, first, count, slot):
+        self.pool = pool
+        self.first = first
+        self.count = count
+        self.slot = slot
+
+class PoolBuffer:
+    # Attribute of one mesh in a pool, bound like a vertex buffer at an offset.
+    def __init__(self, pool_range, name):
+        self.pool_range = pool_range
+        self.name = name
+
+    def set_array(self, value):
+        pool_range = self.pool_range
+        pool_range.pool.write(self.name, pool_range.first, value)
+
+    def buffer_offset(self):
+        vertex_buffer = self.pool_range.pool.vertex_buffers[self.name]
+        return vertex_buffer, self.pool_range.first * vertex_buffer.data.strides[0]
+
+def pool_attribute_buffer(pool_range, name, value):
+    # Same layout as the attribute buffers of the encoding module.
+    pool_buffer = PoolBuffer(pool_range, name)
+    pool_buffer.set_array(value)
+    return (pool_buffer, 3, gl.GL_FLOAT, False)
+
+def upload_rows(vertex_buffer, first, count):
+    # Sends rows of the host data of a resident buffer. The copy write target keeps the array buffer
+    # binding shadowed by GlState.
+    rows = vertex_buffer.data[first:first + count]
+    gl.glBindBuffer(gl.GL_COPY_WRITE_BUFFER, vertex_buffer.buffers[0])
+    gl.glBufferSubData(gl.GL_COPY_WRITE_BUFFER, first * vertex_buffer.data.strides[0], rows.nbytes, rows)
+    gl.glBindBuffer(gl.GL_COPY_WRITE_BUFFER, 0)
+
+class GeometryPool:
+    def __init__(self, number_vertices=DEFAULT_POOL_VERTICES):
+        self.number_vertices = number_vertices
+        self.vertex_buffers = {
+            "position": gl.arrays.vbo.VBO(np.zeros((number_vertices, 3), dtype=np.float32)),
+            "normal": gl.arrays.vbo.VBO(np.zeros((number_vertices, 3), dtype=np.float32)),
+            "poolSlot": gl.arrays.vbo.VBO(np.zeros((number_vertices, 1), dtype=np.int32)),
+        }
+        # Free ranges of vertices, sorted by their first vertex
+        self.free_ranges = [(0, number_vertices)]
+        self.free_slots = []
+        self.number_slots = 0
+        # Model-view-projection and model matrices of each slot in each instance layer, as rows.
+        # Layers are layer_slots entries apart, only the entries that changed are uploaded.
+        self.matrix_data = None
+        self.matrices = None
+        self.layer_slots = 0
+        self.dirty_entries = None
+
+    def allocate(self, count):
+        # First fit, returns None when no free range is large enough.
+        for index, (first, free_count) in enumerate(self.free_ranges):
+            if free_count >= count:
+                if free_count == count:
+                    del self.free_ranges[index]
+                else:
+                    self.free_ranges[index] = (first + count, free_count - count)
+                break
+        else:
+            return None
+        if len(self.free_slots) > 0:
+            slot = self.free_slots.pop()
+        else:
+            slot = self.number_slots
+            self.number_slots += 1
+        pool_range = PoolRange(self, first, count, slot)
+        self.write("poolSlot", first, np.full((count, 1), slot, dtype=np.int32))
+        return pool_range
+
+    def free(self, pool_range):
+        self.free_slots.append(pool_range.slot)
+        self.free_ranges.append((pool_range.first, pool_range.count))
+        self.free_ranges.sort()
+        # Merges adjacent free ranges
+        merged = [self.free_ranges[0]]
+        for first, count in self.free_ranges[1:]:
+            last_first, last_count = merged[-1]
+            if last_first + last_count == first:
+                merged[-1] = (last_first, last_count + count)
+            else:
+                merged.append((first, count))
+        self.free_ranges = merged
+
+    def write(self, name, first, value):
+        # Once the pool is on the GPU, only the written range is uploaded again.
+        vertex_buffer = self.vertex_buffers[name]
+        vertex_buffer.data[first:first + value.shape[0]] = value
+        if buffer_resident(vertex_buffer):
+            upload_rows(vertex_buffer, first, value.shape[0])
+
+    def bind(self, gl_state, attribute_locations):
+        for name, location in attribute_locations.items():
+            vertex_buffer = self.vertex_buffers[name]
+            if name == "poolSlot":
+                gl_state.vertex_attribute(location, vertex_buffer, 1, gl.GL_INT, False, integer=True)
+            else:
+                gl_state.vertex_attribute(location, vertex_buffer, 3, gl.GL_FLOAT, False)
+
+    def layout_matrices(self, number_layers):
+        # Keeps the entries of the existing layers, the new buffer is uploaded whole at its first bind.
+        matrix_data = np.zeros((number_layers * self.number_slots, 8, 4), dtype=np.float32)
+        if self.matrix_data is not None:
+            for layer in range(self.matrix_data.shape[0] // self.layer_slots):
+                first = layer * self.layer_slots
+                matrix_data[layer * self.number_slots:layer * self.number_slots + self.layer_slots] = self.matrix_data[first:first + self.layer_slots]
+            self.matrices.delete()
+        self.layer_slots = self.number_slots
+        self.matrix_data = matrix_data
+        self.matrices = TextureBuffer(self.matrix_data, gl.GL_RGBA32F, POOL_TEXTURE_UNIT)
+        self.dirty_entries = None
+
+    def write_matrices(self, layer, pool_ranges, mvp_matrices, model_matrices):
+        # mvp_matrices and model_matrices are the row-major matrices of the meshes drawn by a layer,
+        # only the entries that changed since the last frame are marked for upload.
+        if self.matrix_data is None:
+            self.layout_matrices(layer + 1)
+        elif self.layer_slots < self.number_slots or self.matrix_data.shape[0] < (layer + 1) * self.layer_slots:
+            self.layout_matrices(max(layer + 1, self.matrix_data.shape[0] // self.layer_slots))
+        entries = layer * self.layer_slots + np.array([pool_range.slot for pool_range in pool_ranges])
+        matrices = np.concatenate([mvp_matrices, model_matrices], axis=1)
+        changed = np.any(self.matrix_data[entries] != matrices, axis=(1, 2))
+        if np.any(changed):
+            entries = entries[changed]
+            self.matrix_data[entries] = matrices[changed]
+            first, last = np.min(entries), np.max(entries)
+            if self.dirty_entries is not None:
+                first, last = min(first, self.dirty_entries[0]), max(last, self.dirty_entries[1])
+            self.dirty_entries = (first, last)
+
+    def upload_matrices(self):
+        # Called once per frame after the matrices of all the layers are written.
+        if self.dirty_entries is None:
+            return
+        vertex_buffer = self.matrices.buffer
+        if buffer_resident(vertex_buffer):
+            first, last = self.dirty_entries
+            upload_rows(vertex_buffer, int(first), int(last - first + 1))
+        self.dirty_entries = None
+
+    def multi_draw(self, drawing_mode, layer, pool_ranges, shader):
+        self.matrices.bind()
+        shader.set_builtin_uniform(gl.glUniform1i, "pooled", True)
+        shader.set_builtin_uniform(gl.glUniform1i, "poolLayerOffset", layer * self.layer_slots)
+        firsts = np.array([pool_range.first for pool_range in pool_ranges], dtype=np.int32)
+        counts = np.array([pool_range.count for pool_range in pool_ranges], dtype=np.int32)
+        gl.glMultiDrawArrays(drawing_mode, firsts, counts, len(pool_ranges))
+        shader.set_builtin_uniform(gl.glUniform1i, "pooled", False)
+
+    def delete(self):
+        for vertex_buffer in self.vertex_buffers.values():
+            vertex_buffer.delete()
+        if self.matrices is not None:
+            self.matrices.delete()
+
+class GeometryPools:
+    # The pools of a viewer, a new pool is created when the existing ones are full.
+    def __init__(self, number_vertices=DEFAULT_POOL_VERTICES):
+        self.number_vertices = number_vertices
+        self.pools = []
+
+    def allocate(self, count):
+        if count > MAX_POOLED_VERTICES or count > self.number_vertices:
+            return None
+        for pool in self.pools:
+            pool_range = pool.allocate(count)
+            if pool_range is not None:
+                return pool_range
+        self.pools.append(GeometryPool(self.number_vertices))
+        return self.pools[-1].allocate(count)
+
+    def delete(self):
+        for pool in self.pools:
+            pool.delete()
+        self.pools = []
+
+#################################################################################################
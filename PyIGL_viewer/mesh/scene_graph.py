@@ -0,0 +1,119 @@
+import numpy as np
+
+from .slot_map import SlotAllocator, handle_indices
+
+
+#################################################################################################
+# A scene graph is a hierarchy of nodes with local transforms.
+# World matrices are cached and only recomputed for the dirty subtrees when the graph is updated.
+# The update walks the hierarchy one depth level at a time, each level is a single batched matrix product.
+# Mesh instances attached to a node take the world matrix of this node as model matrix.
+
+class SceneGraph(SlotAllocator):
+    def __init__(self):
+        super().__init__()
+        self.alive = np.zeros(0, dtype=bool)
+        self.dirty = np.zeros(0, dtype=bool)
+        self.parents = np.zeros(0, dtype=np.int64)
+        self.depths = np.zeros(0, dtype=np.int64)
+        self.local_matrices = np.zeros((0, 4, 4), dtype=np.float32)
+        self.world_matrices = np.zeros((0, 4, 4), dtype=np.float32)
+        self.levels = None
+
+    def ensure_capacity(self, capacity):
+        current = self.alive.shape[0]
+        if capacity <= current:
+            return
+        capacity = max(capacity, 2 * current)
+        extra = capacity - current
+        self.alive = np.concatenate([self.alive, np.zeros(extra, dtype=bool)])
+        self.dirty = np.concatenate([self.dirty, np.zeros(extra, dtype=bool)])
+        self.parents = np.concatenate([self.parents, -np.ones(extra, dtype=np.int64)])
+        self.depths = np.concatenate([self.depths, np.zeros(extra, dtype=np.int64)])
+        identities = np.tile(np.eye(4, dtype=np.float32), (extra, 1, 1))
+        self.local_matrices = np.concatenate([self.local_matrices, identities])
+        self.world_matrices = np.concatenate([self.world_matrices, identities])
+
+    def indices(self, handles):
+        handles = np.atleast_1d(np.asarray(handles, dtype=np.int64))
+        valid = self.valid(handles)
+        if not np.all(valid):
+            raise KeyError(f"Invalid scene node handles {handles[~valid]}")
+        return handle_indices(handles)
+
+    def insert(self, handle, local_matrix=None, parent=None):
+        index = int(self.indices(handle)[0])
+        self.ensure_capacity(index + 1)
+        if parent is None:
+            self.parents[index] = -1
+            self.depths[index] = 0
+        else:
+            parent_index = int(self.indices(parent)[0])
+            self.parents[index] = parent_index
+            self.depths[index] = self.depths[parent_index] + 1
+        self.local_matrices[index] = np.eye(4, dtype=np.float32) if local_matrix is None else local_matrix
+        self.alive[index] = True
+        self.dirty[index] = True
+        self.levels = None
+
+    def set_local_matrices(self, handles, local_matrices):
+        indices = self.indices(handles)
+        self.local_matrices[indices] = local_matrices
+        self.dirty[indices] = True
+
+    def mark_dirty(self, node_indices):
+        self.dirty[node_indices] = True
+
+    def get_world_matrix(self, handle):
+        return self.world_matrices[self.indices(handle)[0]]
+
+    def compute_levels(self):
+        if self.levels is None:
+            indices = np.nonzero(self.alive)[0]
+            indices = indices[np.argsort(self.depths[indices], kind="stable")]
+            _, starts = np.unique(self.depths[indices], return_index=True)
+            self.levels = np.split(indices, starts[1:]) if indices.shape[0] > 0 else []
+        return self.levels
+
+    def subtree(self, handle):
+        mask = np.zeros(self.alive.shape[0], dtype=bool)
+        mask[self.indices(handle)] = True
+        for level in self.compute_levels():
+            parents = self.parents[level]
+            has_parent = parents >= 0
+            mask[level[has_parent]] |= mask[parents[has_parent]]
+        return mask
+
+    def remove(self, handle):
+        # Removing a node removes its whole subtree, the removed node indices are returned.
+        removed = np.nonzero(self.subtree(handle))[0]
+        self.alive[removed] = False
+        self.dirty[removed] = False
+        self.parents[removed] = -1
+        self.release(removed)
+        self.levels = None
+        return removed
+
+    def update(self):
+        # Returns the mask of nodes whose world matrix changed, or None if the graph was clean.
+        if not np.any(self.dirty):
+            return None
+        for level in self.compute_levels():
+            parents = self.parents[level]
+            has_parent = parents >= 0
+            self.dirty[level[has_parent]] |= self.dirty[parents[has_parent]]
+            updated = level[self.dirty[level]]
+            if updated.shape[0] == 0:
+                continue
+            updated_parents = self.parents[updated]
+            roots = updated[updated_parents < 0]
+            children = updated[updated_parents >= 0]
+            self.world_matrices[roots] = self.local_matrices[roots]
+            self.world_matrices[children] = np.matmul(
+                self.world_matrices[self.parents[children]], self.local_matrices[children]
+            )
+        updated_nodes = self.dirty.copy()
+        self.dirty[:] = False
+        return updated_nodes
+
+#################################################################################################
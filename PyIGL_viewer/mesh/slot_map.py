@@ -0,0 +1,117 @@
+import threading
+import numpy as np
+
+
+#################################################################################################
+# Handles are 64 bits integers made of a slot index (low 32 bits) and a generation (high 32 bits).
+# The generation of a slot is incremented when its content is removed, so stale handles are detected.
+# Slots are allocated from the calling thread, while their content is filled by the render thread
+# when the corresponding mesh event is processed.
+
+INDEX_BITS = 32
+INDEX_MASK = (1 << INDEX_BITS) - 1
+
+
+def make_handles(indices, generations):
+    return (generations.astype(np.int64) << INDEX_BITS) | indices.astype(np.int64)
+
+
+def handle_indices(handles):
+    return np.asarray(handles, dtype=np.int64) & INDEX_MASK
+
+
+def handle_generations(handles):
+    return np.asarray(handles, dtype=np.int64) >> INDEX_BITS
+
+
+class SlotAllocator:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.generations = np.zeros(0, dtype=np.int64)
+        self.free_indices = []
+
+    def allocate(self, count):
+        with self.lock:
+            reused_count = min(count, len(self.free_indices))
+            reused = self.free_indices[len(self.free_indices) - reused_count :]
+            del self.free_indices[len(self.free_indices) - reused_count :]
+            start = self.generations.shape[0]
+            created = np.arange(start, start + count - reused_count, dtype=np.int64)
+            if created.shape[0] > 0:
+                self.generations = np.concatenate(
+                    [self.generations, np.zeros(created.shape[0], dtype=np.int64)]
+                )
+            indices = np.concatenate([np.array(reused, dtype=np.int64), created])
+            return make_handles(indices, self.generations[indices])
+
+    def allocate_one(self):
+        return int(self.allocate(1)[0])
+
+    def release(self, indices):
+        with self.lock:
+            self.generations[indices] += 1
+            self.free_indices.extend(np.asarray(indices).tolist())
+
+    def valid(self, handles):
+        indices = handle_indices(handles)
+        generations = self.generations
+        in_range = indices < generations.shape[0]
+        matching = np.zeros(indices.shape, dtype=bool)
+        matching[in_range] = generations[indices[in_range]] == handle_generations(handles)[in_range]
+        return matching
+
+
+#################################################################################################
+# A slot map stores one Python object per slot and is used like a dictionary keyed by handles.
+
+class SlotMap(SlotAllocator):
+    def __init__(self):
+        super().__init__()
+        self.slots = []
+
+    def insert(self, handle, value):
+        index = int(handle_indices(handle))
+        if index >= len(self.slots):
+            self.slots.extend([None] * (index + 1 - len(self.slots)))
+        self.slots[index] = value
+
+    def __getitem__(self, handle):
+        index = int(handle_indices(handle))
+        if not self.valid(handle) or index >= len(self.slots) or self.slots[index] is None:
+            raise KeyError(handle)
+        return self.slots[index]
+
+    def __contains__(self, handle):
+        try:
+            self[handle]
+            return True
+        except KeyError:
+            return False
+
+    def __len__(self):
+        return sum(1 for value in self.slots if value is not None)
+
+    def pop(self, handle):
+        value = self[handle]
+        index = int(handle_indices(handle))
+        self.slots[index] = None
+        self.release([index])
+        return value
+
+    def values(self):
+        return [value for value in self.slots if value is not None]
+
+    def items(self):
+        generations = self.generations
+        return [
+            (int(make_handles(np.int64(index), generations[index])), value)
+            for index, value in enumerate(self.slots)
+            if value is not None
+        ]
+
+    def clear(self):
+        indices = [index for index, value in enumerate(self.slots) if value is not None]
+        self.slots = [None] * len(self.slots)
+        self.release(indices)
+
+#################################################################################################
@@ -0,0 +1,56 @@
+from OpenGL import GL as gl
+
+from .memory import free_buffer
+
+
+#################################################################################################
+# A texture buffer is a buffer object read by the vertex shaders through a samplerBuffer.
+# Each kind of per-mesh deformation data has its own texture unit, prefab samplers are bound
+# from unit 0 upward and samplers of different types can not share a unit.
+
+ANIMATION_TEXTURE_UNIT = 15
+BLEND_SHAPE_TEXTURE_UNIT = 14
+BONE_TEXTURE_UNIT = 13
+POOL_TEXTURE_UNIT = 12
+
+def check_texture_buffer_size(number_texels, description):
+    # Needs a current GL context.
+    max_size = gl.glGetIntegerv(gl.GL_MAX_TEXTURE_BUFFER_SIZE)
+    if number_texels > max_size:
+        raise ValueError(f'{description} of {number_texels} texels exceeds the texture buffer size of {max_size}')
+
+class TextureBuffer:
+    def __init__(self, data, internal_format, texture_unit):
+        self.buffer = gl.arrays.vbo.VBO(data, target=gl.GL_TEXTURE_BUFFER)
+        self.internal_format = internal_format
+        self.texture_unit = texture_unit
+        self.texture = None
+
+    def set_array(self, data):
+        self.buffer.set_array(data)
+
+    def bind(self):
+        # The buffer is uploaded again after an update or an eviction by the memory manager,
+        # and attached again to the texture.
+        attach = not self.buffer.copied or self.texture is None
+        self.buffer.bind()
+        self.buffer.unbind()
+
+        gl.glActiveTexture(gl.GL_TEXTURE0 + self.texture_unit)
+        if self.texture is None:
+            self.texture = gl.glGenTextures(1)
+        gl.glBindTexture(gl.GL_TEXTURE_BUFFER, self.texture)
+        if attach:
+            gl.glTexBuffer(gl.GL_TEXTURE_BUFFER, self.internal_format, self.buffer.buffers[0])
+        gl.glActiveTexture(gl.GL_TEXTURE0)
+
+    def buffers(self):
+        return [self.buffer]
+
+    def delete(self):
+        free_buffer(self.buffer)
+        if self.texture is not None:
+            gl.glDeleteTextures([self.texture])
+            self.texture = None
+
+#################################################################################################
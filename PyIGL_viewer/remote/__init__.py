@@ -0,0 +1,3 @@
+from .shared_feed import SharedFeedWriter, SharedFeedReader
+from .client import ViewerClient
+from .protocol import RemoteId
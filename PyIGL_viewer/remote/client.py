@@ -0,0 +1,118 @@
+import socket
+import threading
+
+from .protocol import RemoteId, decode_value, receive_message, send_call
+
+
+class ViewerClient:
+    # Pushes meshes to a viewer started with Viewer.start_server, from another process and without Qt.
+    # address is a Unix domain socket path or a (host, port) pair, widget the index of the viewer widget.
+    # Calls returning ids wait for the reply of the viewer, update calls are only sent.
+    def __init__(self, address=("127.0.0.1", 9876), widget=0):
+        if isinstance(address, str):
+            self.connection = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        else:
+            self.connection = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+            self.connection.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        self.connection.connect(address)
+        self.widget = widget
+        self.lock = threading.Lock()
+
+    def call(self, method, *args, reply=False, **kwargs):
+        with self.lock:
+            send_call(self.connection, method, args, kwargs, self.widget, reply)
+            if not reply:
+                return None
+            message = receive_message(self.connection)
+        if message is None:
+            raise ConnectionError("The viewer closed the connection")
+        method, flags, document, arrays = message
+        if "error" in document:
+            raise ValueError(document["error"])
+        return decode_value(document["result"], arrays, RemoteId)
+
+    def add_mesh(
+        self,
+        vertices,
+        faces,
+        normals=None,
+        precision="full",
+        chunk_size=None,
+        pooled=False,
+    ):
+        return self.call(
+            "add_mesh",
+            vertices,
+            faces,
+            normals=normals,
+            precision=precision,
+            chunk_size=chunk_size,
+            pooled=pooled,
+            reply=True,
+        )
+
+    def add_mesh_prefab(
+        self,
+        core_id,
+        shader="default",
+        vertex_attributes={},
+        face_attributes={},
+        uniforms={},
+        fill=True,
+        precision="full",
+        interleaved=False,
+    ):
+        return self.call(
+            "add_mesh_prefab",
+            core_id,
+            shader=shader,
+            vertex_attributes=vertex_attributes,
+            face_attributes=face_attributes,
+            uniforms=uniforms,
+            fill=fill,
+            precision=precision,
+            interleaved=interleaved,
+            reply=True,
+        )
+
+    def add_mesh_instance(self, prefab_id, model_matrix):
+        return self.call("add_mesh_instance", prefab_id, model_matrix, reply=True)
+
+    def add_mesh_instances(self, prefab_id, model_matrices):
+        return self.call("add_mesh_instances", prefab_id, model_matrices, reply=True)
+
+    def update_mesh_vertices(self, core_id, vertices):
+        self.call("update_mesh_vertices", core_id, vertices)
+
+    def update_mesh_prefab_uniform(self, prefab_id, name, value):
+        self.call("update_mesh_prefab_uniform", prefab_id, name, value)
+
+    def update_mesh_prefab_vertex_attribute(self, prefab_id, name, value):
+        self.call("update_mesh_prefab_vertex_attribute", prefab_id, name, value)
+
+    def update_mesh_prefab_face_attribute(self, prefab_id, name, value):
+        self.call("update_mesh_prefab_face_attribute", prefab_id, name, value)
+
+    def update_mesh_instance_model(self, instance_id, model):
+        self.call("update_mesh_instance_model", instance_id, model)
+
+    def update_mesh_instance_models(self, handles, models):
+        self.call("update_mesh_instance_models", handles, models)
+
+    def set_mesh_instance_visibility(self, instance_id, visibility):
+        self.call("set_mesh_instance_visibility", instance_id, visibility)
+
+    def remove_mesh(self, core_id):
+        self.call("remove_mesh", core_id)
+
+    def remove_mesh_prefab(self, prefab_id):
+        self.call("remove_mesh_prefab", prefab_id)
+
+    def remove_mesh_instance(self, instance_id):
+        self.call("remove_mesh_instance", instance_id)
+
+    def clear_all(self):
+        self.call("clear_all")
+
+    def close(self):
+        self.connection.close()
@@ -0,0 +1,155 @@
+import json
+import struct
+import numpy as np
+
+#################################################################################################
+# Binary protocol of the viewer server.
+# A message is a fixed size header followed by a JSON document and the raw array payloads.
+# The header holds a magic number, the index of the called method in REMOTE_METHODS (or REPLY),
+# flags, the size of the JSON document and the total size of the payloads.
+# Arrays and mesh ids in the arguments are replaced by {"__array__": index} and {"__id__": handles}
+# in the JSON document, which also lists the dtype and shape of each array. The payloads follow in
+# the same order and are received directly into preallocated NumPy arrays.
+
+MAGIC = b"PIGL"
+HEADER = struct.Struct("<4sHHIQ")
+REPLY = 0xFFFF
+FLAG_REPLY = 1
+
+# Viewer widget methods that can be called remotely
+REMOTE_METHODS = [
+    "add_mesh",
+    "add_mesh_prefab",
+    "add_mesh_instance",
+    "add_mesh_instances",
+    "update_mesh_vertices",
+    "update_mesh_prefab_uniform",
+    "update_mesh_prefab_vertex_attribute",
+    "update_mesh_prefab_face_attribute",
+    "update_mesh_instance_model",
+    "update_mesh_instance_models",
+    "set_mesh_instance_visibility",
+    "remove_mesh",
+    "remove_mesh_prefab",
+    "remove_mesh_instance",
+    "clear_all",
+]
+
+ID_FIELDS = ("core_id", "prefab_id", "instance_id")
+
+
+class RemoteId:
+    # Mesh core, prefab or instance id on the client side, holding the same handles as the viewer ids.
+    __slots__ = ID_FIELDS
+
+    def __init__(self, handles):
+        for field, handle in zip(ID_FIELDS, handles):
+            setattr(self, field, handle)
+
+
+def id_handles(value):
+    if not hasattr(value, "core_id"):
+        return None
+    return [getattr(value, field) for field in ID_FIELDS if hasattr(value, field)]
+
+
+def encode_value(value, arrays):
+    if isinstance(value, np.ndarray):
+        if value.dtype.hasobject:
+            raise ValueError("Object arrays cannot be sent to the viewer")
+        arrays.append(np.ascontiguousarray(value))
+        return {"__array__": len(arrays) - 1}
+    if isinstance(value, (list, tuple)):
+        return [encode_value(item, arrays) for item in value]
+    if isinstance(value, dict):
+        return {key: encode_value(item, arrays) for key, item in value.items()}
+    if isinstance(value, np.generic):
+        return value.item()
+    handles = id_handles(value)
+    if handles is not None:
+        return {"__id__": handles}
+    return value
+
+
+def decode_value(value, arrays, make_id):
+    if isinstance(value, list):
+        return [decode_value(item, arrays, make_id) for item in value]
+    if isinstance(value, dict):
+        if "__array__" in value:
+            return arrays[value["__array__"]]
+        if "__id__" in value:
+            return make_id(value["__id__"])
+        return {key: decode_value(item, arrays, make_id) for key, item in value.items()}
+    return value
+
+
+def send_message(connection, method, flags, document, arrays):
+    document = dict(document)
+    document["arrays"] = [[array.dtype.str, list(array.shape)] for array in arrays]
+    json_bytes = json.dumps(document).encode("utf-8")
+    payload_size = sum(array.nbytes for array in arrays)
+    connection.sendall(
+        HEADER.pack(MAGIC, method, flags, len(json_bytes), payload_size) + json_bytes
+    )
+    for array in arrays:
+        if array.nbytes > 0:
+            connection.sendall(memoryview(array.reshape((-1,))).cast("B"))
+
+
+def receive_into(connection, buffer):
+    view = memoryview(buffer)
+    while len(view) > 0:
+        size = connection.recv_into(view)
+        if size == 0:
+            raise ConnectionError("Connection closed in the middle of a message")
+        view = view[size:]
+
+
+def receive_message(connection):
+    # Returns (method, flags, document, arrays), or None if the connection was closed.
+    header = bytearray(HEADER.size)
+    size = connection.recv_into(header)
+    if size == 0:
+        return None
+    receive_into(connection, memoryview(header)[size:])
+    magic, method, flags, json_size, payload_size = HEADER.unpack(header)
+    if magic != MAGIC:
+        raise ValueError("Invalid viewer message")
+
+    json_bytes = bytearray(json_size)
+    receive_into(connection, json_bytes)
+    document = json.loads(json_bytes.decode("utf-8"))
+    arrays = []
+    for dtype, shape in document.pop("arrays"):
+        array = np.empty(shape, dtype=dtype)
+        if array.nbytes > 0:
+            receive_into(connection, memoryview(array.reshape((-1,))).cast("B"))
+        arrays.append(array)
+    if sum(array.nbytes for array in arrays) != payload_size:
+        raise ValueError("Invalid viewer message payload")
+    return method, flags, document, arrays
+
+
+def send_call(connection, method, args, kwargs, widget, reply):
+    arrays = []
+    document = {
+        "widget": widget,
+        "args": encode_value(list(args), arrays),
+        "kwargs": encode_value(kwargs, arrays),
+    }
+    send_message(
+        connection,
+        REMOTE_METHODS.index(method),
+        FLAG_REPLY if reply else 0,
+        document,
+        arrays,
+    )
+
+
+def send_reply(connection, result=None, error=None):
+    arrays = []
+    if error is not None:
+        document = {"error": error}
+    else:
+        document = {"result": encode_value(result, arrays)}
+    send_message(connection, REPLY, 0, document, arrays)
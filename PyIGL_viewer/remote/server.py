@@ -0,0 +1,91 @@
+import os
+import socket
+import socketserver
+import threading
+
+from .protocol import (
+    REMOTE_METHODS,
+    FLAG_REPLY,
+    decode_value,
+    receive_message,
+    send_reply,
+)
+from ..mesh import GlMeshCoreId, GlMeshPrefabId, GlMeshInstanceId
+
+
+class ViewerTCPServer(socketserver.ThreadingTCPServer):
+    allow_reuse_address = True
+
+
+def make_mesh_id(handles):
+    mesh_id = GlMeshCoreId(handles[0])
+    if len(handles) > 1:
+        mesh_id = GlMeshPrefabId(mesh_id, handles[1])
+    if len(handles) > 2:
+        mesh_id = GlMeshInstanceId(mesh_id, handles[2])
+    return mesh_id
+
+
+class ViewerRequestHandler(socketserver.BaseRequestHandler):
+    # Handles the messages of one client connection, in its own thread.
+    def handle(self):
+        connection = self.request
+        if connection.family != socket.AF_UNIX:
+            connection.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        while True:
+            try:
+                message = receive_message(connection)
+            except (ConnectionError, ValueError) as err:
+                print(err)
+                return
+            if message is None:
+                return
+            method, flags, document, arrays = message
+            result = None
+            error = None
+            try:
+                result = self.server.viewer_server.call(method, document, arrays)
+            except Exception as err:
+                error = f"{type(err).__name__}: {err}"
+            if flags & FLAG_REPLY:
+                send_reply(connection, result, error)
+            elif error is not None:
+                print(error)
+
+
+class ViewerServer:
+    # Listens on a Unix domain socket path or a localhost (host, port) pair, and maps the messages
+    # of ViewerClient onto the viewer widget API. The widget API is thread-safe, calls are made
+    # from the connection threads and the changes are applied at the next paint.
+    def __init__(self, viewer, address=("127.0.0.1", 9876)):
+        self.viewer = viewer
+        self.address = address
+        if isinstance(address, str):
+            if os.path.exists(address):
+                os.remove(address)
+            server_class = socketserver.ThreadingUnixStreamServer
+        else:
+            server_class = ViewerTCPServer
+        self.server = server_class(address, ViewerRequestHandler)
+        self.server.daemon_threads = True
+        self.server.viewer_server = self
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+
+    def start(self):
+        self.thread.start()
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+        if isinstance(self.address, str) and os.path.exists(self.address):
+            os.remove(self.address)
+
+    def call(self, method, document, arrays):
+        if method >= len(REMOTE_METHODS):
+            raise ValueError(f"Unknown remote method {method}")
+        widget = self.viewer.get_viewer_widget(document["widget"])
+        if widget is None:
+            raise ValueError(f"No viewer widget {document['widget']}")
+        args = decode_value(document["args"], arrays, make_mesh_id)
+        kwargs = decode_value(document["kwargs"], arrays, make_mesh_id)
+        return getattr(widget, REMOTE_METHODS[method])(*args, **kwargs)
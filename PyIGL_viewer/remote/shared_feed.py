@@ -0,0 +1,207 @@
+import json
+import mmap
+import numpy as np
+
+#################################################################################################
+# Frames of vertex data shared between a simulation process and the viewer, through a
+# multiprocessing shared memory block or a memory-mapped file.
+# The region starts with a header describing the fields of a frame, followed by a ring of frame
+# slots. Each slot starts with a sequence number used as a seqlock: it is odd while the writer
+# fills the slot, and twice the frame number once the frame is complete. The header sequence is
+# the number of the latest complete frame, 0 while no frame has been written.
+
+FEED_MAGIC = 0x46474950
+FEED_VERSION = 1
+HEADER_SIZE = 4096
+LAYOUT_OFFSET = 64
+SLOT_ALIGNMENT = 64
+
+HEADER_DTYPE = np.dtype(
+    [
+        ("magic", "<u4"),
+        ("version", "<u4"),
+        ("number_slots", "<u4"),
+        ("slot_size", "<u4"),
+        ("sequence", "<u8"),
+        ("layout_size", "<u4"),
+    ]
+)
+
+
+def align(offset, alignment):
+    return (offset + alignment - 1) // alignment * alignment
+
+
+def feed_layout(fields):
+    # fields maps each field name to its (shape, dtype), the slot sequence number comes first.
+    layout = []
+    offset = 8
+    for name, (shape, dtype) in fields.items():
+        dtype = np.dtype(dtype)
+        offset = align(offset, 16)
+        layout.append(
+            {"name": name, "shape": list(shape), "dtype": dtype.str, "offset": offset}
+        )
+        offset += int(np.prod(shape)) * dtype.itemsize
+    return layout, align(offset, SLOT_ALIGNMENT)
+
+
+def open_region(name, path, size, create):
+    # Returns a writable buffer on the region and the object to close to release it.
+    if path is not None:
+        if create:
+            with open(path, "wb") as region_file:
+                region_file.truncate(size)
+        with open(path, "r+b") as region_file:
+            region = mmap.mmap(region_file.fileno(), 0)
+        return region, region
+
+    from multiprocessing import shared_memory, resource_tracker
+
+    if create:
+        memory = shared_memory.SharedMemory(name=name, create=True, size=size)
+    else:
+        # The block is owned by the writer, the resource tracker of the viewer must not destroy it.
+        try:
+            memory = shared_memory.SharedMemory(name=name, track=False)
+        except TypeError:
+            memory = shared_memory.SharedMemory(name=name)
+            resource_tracker.unregister(memory._name, "shared_memory")
+    return memory.buf, memory
+
+
+class SharedFeed:
+    # Views on the header and the frame slots of a mapped region.
+    def __init__(self, region, handle):
+        self.region = region
+        self.handle = handle
+        self.header = np.ndarray((), HEADER_DTYPE, buffer=region)
+        if self.header["magic"] != FEED_MAGIC or self.header["version"] != FEED_VERSION:
+            raise ValueError("The shared region does not contain a vertex feed")
+        self.number_slots = int(self.header["number_slots"])
+        slot_size = int(self.header["slot_size"])
+        layout_size = int(self.header["layout_size"])
+        layout_bytes = bytes(region[LAYOUT_OFFSET : LAYOUT_OFFSET + layout_size])
+        self.layout = json.loads(layout_bytes.decode("utf-8"))
+
+        self.slot_sequences = []
+        self.slots = []
+        for slot in range(self.number_slots):
+            slot_offset = HEADER_SIZE + slot * slot_size
+            self.slot_sequences.append(
+                np.ndarray((), "<u8", buffer=region, offset=slot_offset)
+            )
+            self.slots.append(
+                {
+                    field["name"]: np.ndarray(
+                        field["shape"],
+                        field["dtype"],
+                        buffer=region,
+                        offset=slot_offset + field["offset"],
+                    )
+                    for field in self.layout
+                }
+            )
+
+    def latest_frame(self):
+        return int(self.header["sequence"])
+
+    def close(self):
+        # Views have to be released before the region can be closed
+        self.header = None
+        self.slot_sequences = []
+        self.slots = []
+        self.region = None
+        self.handle.close()
+
+
+class SharedFeedWriter(SharedFeed):
+    # Creates the region and publishes frames, used by the simulation process.
+    # fields maps names to (shape, dtype), for instance {"position": ((n, 3), np.float32)}.
+    # With create=False, the writer attaches to a region created by another process.
+    def __init__(self, fields=None, name=None, path=None, number_slots=2, create=True):
+        self.frame = None
+        if not create:
+            region, handle = open_region(name, path, 0, create=False)
+            super().__init__(region, handle)
+            self.name = handle.name if path is None else path
+            return
+
+        layout, slot_size = feed_layout(fields)
+        layout_bytes = json.dumps(layout).encode("utf-8")
+        if LAYOUT_OFFSET + len(layout_bytes) > HEADER_SIZE:
+            raise ValueError("Too many fields for a shared vertex feed")
+        if number_slots < 2:
+            raise ValueError("A shared vertex feed needs at least two frame slots")
+
+        region, handle = open_region(
+            name, path, HEADER_SIZE + number_slots * slot_size, create=True
+        )
+        header = np.ndarray((), HEADER_DTYPE, buffer=region)
+        header["magic"] = FEED_MAGIC
+        header["version"] = FEED_VERSION
+        header["number_slots"] = number_slots
+        header["slot_size"] = slot_size
+        header["sequence"] = 0
+        header["layout_size"] = len(layout_bytes)
+        region[LAYOUT_OFFSET : LAYOUT_OFFSET + len(layout_bytes)] = layout_bytes
+        del header
+        super().__init__(region, handle)
+
+        self.name = handle.name if path is None else path
+
+    def begin_frame(self):
+        # Returns the arrays of the next frame, to be filled in place before calling end_frame.
+        self.frame = self.latest_frame() + 1
+        slot = self.frame % self.number_slots
+        self.slot_sequences[slot][()] = 2 * self.frame - 1
+        return self.slots[slot]
+
+    def end_frame(self):
+        slot = self.frame % self.number_slots
+        self.slot_sequences[slot][()] = 2 * self.frame
+        self.header["sequence"] = self.frame
+        return self.frame
+
+    def write_frame(self, values):
+        frame = self.begin_frame()
+        for field_name, value in values.items():
+            frame[field_name][...] = value
+        return self.end_frame()
+
+    def unlink(self):
+        if hasattr(self.handle, "unlink"):
+            self.handle.unlink()
+
+
+class SharedFeedReader(SharedFeed):
+    # Attaches to an existing region and copies the latest complete frame into its own arrays.
+    def __init__(self, name=None, path=None):
+        region, handle = open_region(name, path, 0, create=False)
+        super().__init__(region, handle)
+        self.last_frame = 0
+        self.values = {
+            field["name"]: np.zeros(field["shape"], dtype=field["dtype"])
+            for field in self.layout
+        }
+
+    def has_new_frame(self):
+        return self.latest_frame() != self.last_frame
+
+    def read(self):
+        # Returns the field values of the latest complete frame, or None if there is no new frame.
+        # A frame overwritten by the writer while it is copied is dropped, the next one will be read.
+        frame = self.latest_frame()
+        if frame == self.last_frame:
+            return None
+        slot = frame % self.number_slots
+        slot_sequence = self.slot_sequences[slot]
+        start = int(slot_sequence)
+        if start != 2 * frame:
+            return None
+        for field_name, value in self.slots[slot].items():
+            np.copyto(self.values[field_name], value)
+        if int(slot_sequence) != start:
+            return None
+        self.last_frame = frame
+        return self.values
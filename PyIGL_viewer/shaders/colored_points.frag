@@ -0,0 +1,15 @@
+#version 330
+
+in vec4 color;
+
+uniform bool roundPoints;
+
+out vec4 outputColor;
+void main()
+{
+    // Round splats discard the corners of the sprite
+    if (roundPoints && length(gl_PointCoord - vec2(0.5)) > 0.5) {
+        discard;
+    }
+    outputColor = color;
+}
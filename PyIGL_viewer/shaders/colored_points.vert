@@ -0,0 +1,17 @@
+#version 330
+layout(location = 0) in vec4 position;
+#include "deformation.glsl"
+#include "draw.glsl"
+#include "point_sprite.glsl"
+
+in vec4 pointColor;
+
+out vec4 color;
+
+void main()
+{
+    vec4 decodedPosition = decodePosition();
+    color = pointColor;
+    gl_Position = drawMvp() * decodedPosition;
+    gl_PointSize = spriteSize(gl_Position);
+}
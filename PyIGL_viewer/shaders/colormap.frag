@@ -0,0 +1,11 @@
+#version 330
+
+in float normalizedScalar;
+
+uniform sampler1D colormap;
+
+out vec4 outputColor;
+void main()
+{
+    outputColor = vec4(texture(colormap, clamp(normalizedScalar, 0.0, 1.0)).rgb, 1.0f);
+}
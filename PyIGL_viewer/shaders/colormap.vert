@@ -0,0 +1,17 @@
+#version 330
+layout(location = 0) in vec4 position;
+#include "deformation.glsl"
+#include "draw.glsl"
+in float scalar;
+
+uniform float scalarMin;
+uniform float scalarMax;
+
+out float normalizedScalar;
+
+void main()
+{
+    vec4 decodedPosition = decodePosition();
+    normalizedScalar = (scalar - scalarMin) / max(scalarMax - scalarMin, 1e-12);
+    gl_Position = drawMvp() * decodedPosition;
+}
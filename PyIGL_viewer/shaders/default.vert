@@ -1,15 +1,16 @@
 #version 330
 layout(location = 0) in vec4 position;
+#include "deformation.glsl"
+#include "draw.glsl"
 
 uniform mat4 projection;
 uniform mat4 view;
-uniform mat4 model;
-uniform mat4 mvp;
 
 out vec3 color;
 
 void main()
 {
-    gl_Position = mvp * position;
-    color = 0.5 + 0.5 * position.xyz;
+    vec4 decodedPosition = decodePosition();
+    gl_Position = drawMvp() * decodedPosition;
+    color = 0.5 + 0.5 * decodedPosition.xyz;
 }
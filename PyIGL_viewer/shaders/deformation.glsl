@@ -0,0 +1,68 @@
+// Deformations of the mesh positions, included by all the vertex shaders after the position attribute.
+// Positions come from the mesh core or from an animation clip, blend shape deltas are added
+// to them and the result is skinned by up to four bone matrices per vertex.
+layout(location = 1) in int vertexIndex;
+layout(location = 2) in uvec4 boneIndices;
+layout(location = 3) in vec4 boneWeights;
+
+uniform vec3 positionOffset;
+uniform vec3 positionScale;
+
+uniform bool animated;
+uniform samplerBuffer animationFrames;
+uniform ivec2 animationOffsets;
+uniform float animationBlend;
+
+#define MAX_BLEND_SHAPES 64
+uniform int blendShapeCount;
+uniform samplerBuffer blendShapeDeltas;
+uniform int blendShapeOffsets[MAX_BLEND_SHAPES];
+uniform float blendShapeWeights[MAX_BLEND_SHAPES];
+
+uniform bool skinned;
+uniform samplerBuffer boneMatrices;
+
+// Set by decodePosition, used by deformNormal
+mat4 skinMatrix = mat4(1.0);
+
+vec3 fetchPosition(samplerBuffer positions, int frameOffset)
+{
+    int index = frameOffset + 3 * vertexIndex;
+    return vec3(texelFetch(positions, index).r, texelFetch(positions, index + 1).r, texelFetch(positions, index + 2).r);
+}
+
+mat4 boneMatrix(uint bone)
+{
+    // Bone matrices are stored as their first three rows
+    int index = 3 * int(bone);
+    return transpose(mat4(texelFetch(boneMatrices, index), texelFetch(boneMatrices, index + 1), texelFetch(boneMatrices, index + 2), vec4(0.0, 0.0, 0.0, 1.0)));
+}
+
+vec4 decodePosition()
+{
+    vec3 decoded;
+    if (animated) {
+        decoded = mix(fetchPosition(animationFrames, animationOffsets.x), fetchPosition(animationFrames, animationOffsets.y), animationBlend);
+    }
+    else {
+        decoded = positionOffset + positionScale * position.xyz;
+    }
+    for (int i = 0; i < blendShapeCount; i++) {
+        decoded += blendShapeWeights[i] * fetchPosition(blendShapeDeltas, blendShapeOffsets[i]);
+    }
+    if (skinned) {
+        // Vertices without any bone weight stay in place
+        skinMatrix = (1.0 - dot(boneWeights, vec4(1.0))) * mat4(1.0);
+        for (int i = 0; i < 4; i++) {
+            if (boneWeights[i] > 0.0) {
+                skinMatrix += boneWeights[i] * boneMatrix(boneIndices[i]);
+            }
+        }
+    }
+    return skinMatrix * vec4(decoded, 1.0);
+}
+
+vec3 deformNormal(vec3 normal)
+{
+    return mat3(skinMatrix) * normal;
+}
@@ -0,0 +1,34 @@
+// Transforms of the drawn instance, included by all the vertex shaders.
+// Meshes of a geometry pool are drawn together with glMultiDrawArrays, each vertex then finds
+// the matrices of its draw in a texture buffer, through the pool slot of its mesh. Each instance
+// layer of the pool has its own range of matrices.
+layout(location = 4) in int poolSlot;
+
+uniform mat4 model;
+uniform mat4 mvp;
+
+uniform bool pooled;
+uniform int poolLayerOffset;
+uniform samplerBuffer poolMatrices;
+
+mat4 poolMatrix(int index)
+{
+    // Pool matrices are stored row by row, the model-view-projection matrix then the model matrix
+    return transpose(mat4(texelFetch(poolMatrices, index), texelFetch(poolMatrices, index + 1), texelFetch(poolMatrices, index + 2), texelFetch(poolMatrices, index + 3)));
+}
+
+mat4 drawMvp()
+{
+    if (pooled) {
+        return poolMatrix(8 * (poolLayerOffset + poolSlot));
+    }
+    return mvp;
+}
+
+mat4 drawModel()
+{
+    if (pooled) {
+        return poolMatrix(8 * (poolLayerOffset + poolSlot) + 4);
+    }
+    return model;
+}
@@ -1,12 +1,12 @@
 #version 330
 layout(location = 0) in vec4 position;
+#include "deformation.glsl"
+#include "draw.glsl"
+#include "normal_encoding.glsl"
 in vec4 normal;
 
 uniform mat4 projection;
 uniform mat4 view;
-uniform mat4 model;
-
-uniform mat4 mvp;
 
 uniform bool linkLight;
 
@@ -14,13 +14,13 @@ out vec4 outNormal;
 
 void main()
 {
-    outNormal = normal;
-    outNormal.w = 0.0;
-    outNormal = model * outNormal;
+    vec4 decodedPosition = decodePosition();
+    outNormal = vec4(deformNormal(decodeNormal(normal)), 0.0);
+    outNormal = drawModel() * outNormal;
     if (linkLight) {
         outNormal = view * outNormal;
     }
     outNormal = normalize(outNormal);
-    //gl_Position = projection * view * model * position;
-    gl_Position = mvp * position;
+    //gl_Position = projection * view * model * decodedPosition;
+    gl_Position = drawMvp() * decodedPosition;
 }
@@ -0,0 +1,16 @@
+// Normals of the mesh prefabs, included by the lit vertex shaders.
+// Compact prefabs store their normals as octahedral int16 pairs, see the encoding module.
+uniform bool octahedralNormals;
+
+vec3 decodeNormal(vec4 encodedNormal)
+{
+    if (!octahedralNormals) {
+        return encodedNormal.xyz;
+    }
+    vec3 decoded = vec3(encodedNormal.xy, 1.0 - abs(encodedNormal.x) - abs(encodedNormal.y));
+    if (decoded.z < 0.0) {
+        vec2 signNotZero = vec2(decoded.x >= 0.0 ? 1.0 : -1.0, decoded.y >= 0.0 ? 1.0 : -1.0);
+        decoded.xy = (1.0 - abs(decoded.yx)) * signNotZero;
+    }
+    return normalize(decoded);
+}
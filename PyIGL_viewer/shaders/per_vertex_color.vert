@@ -1,14 +1,15 @@
 #version 330
 layout(location = 0) in vec4 position;
+#include "deformation.glsl"
+#include "draw.glsl"
 
 in vec3 vertexColor;
 
-uniform mat4 mvp;
-
 out vec3 color;
 
 void main()
 {
+    vec4 decodedPosition = decodePosition();
     color = vertexColor;
-    gl_Position = mvp * position;
+    gl_Position = drawMvp() * decodedPosition;
 }
@@ -1,13 +1,13 @@
 
 #version 330
 layout(location = 0) in vec4 position;
+#include "deformation.glsl"
+#include "draw.glsl"
+#include "normal_encoding.glsl"
 in vec4 normal;
 
 uniform mat4 projection;
 uniform mat4 view;
-uniform mat4 model;
-
-uniform mat4 mvp;
 
 uniform bool linkLight;
 uniform vec3 lightDirection;
@@ -18,9 +18,9 @@ out vec3 transformedLightDirection;
 
 void main()
 {
-    outNormal = normal;
-    outNormal.w = 0.0;
-    outNormal = model * outNormal;
+    vec4 decodedPosition = decodePosition();
+    outNormal = vec4(deformNormal(decodeNormal(normal)), 0.0);
+    outNormal = drawModel() * outNormal;
     outNormal = normalize(outNormal);
     if (linkLight) {
         transformedLightDirection = (inverse(view) * vec4(lightDirection, 0.0)).xyz;
@@ -28,6 +28,6 @@ void main()
     else {
         transformedLightDirection = lightDirection;
     }
-    worldPosition = position;
-    gl_Position = mvp * position;
+    worldPosition = decodedPosition;
+    gl_Position = drawMvp() * decodedPosition;
 }
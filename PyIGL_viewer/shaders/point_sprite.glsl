@@ -0,0 +1,16 @@
+// Point sprite size, included by the point vertex shaders.
+// With perspectivePoints, pointSize is a diameter in world units and the sprites shrink with the
+// distance to the camera, otherwise it is a diameter in pixels.
+uniform mat4 projection;
+uniform float viewportHeight;
+
+uniform float pointSize;
+uniform bool perspectivePoints;
+
+float spriteSize(vec4 clipPosition)
+{
+    if (perspectivePoints) {
+        return max(1.0, 0.5 * pointSize * projection[1][1] * viewportHeight / clipPosition.w);
+    }
+    return pointSize;
+}
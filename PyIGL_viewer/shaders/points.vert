@@ -0,0 +1,12 @@
+#version 330
+layout(location = 0) in vec4 position;
+#include "deformation.glsl"
+#include "draw.glsl"
+#include "point_sprite.glsl"
+
+void main()
+{
+    vec4 decodedPosition = decodePosition();
+    gl_Position = drawMvp() * decodedPosition;
+    gl_PointSize = spriteSize(gl_Position);
+}
@@ -0,0 +1,19 @@
+#version 330
+
+in vec4 outNormal;
+in vec2 outTextureCoords;
+
+uniform sampler2D albedoTexture;
+uniform vec3 lightDirection;
+uniform vec3 lightIntensity;
+uniform vec3 ambientLighting;
+
+out vec4 outputColor;
+void main()
+{
+    float dot_normal = abs(dot(outNormal.xyz, -lightDirection));
+    vec3 color = ambientLighting;
+    color += dot_normal * lightIntensity;
+    color *= texture(albedoTexture, outTextureCoords).rgb;
+    outputColor = vec4(color, 1.0f);
+}
@@ -0,0 +1,28 @@
+#version 330
+layout(location = 0) in vec4 position;
+#include "deformation.glsl"
+#include "draw.glsl"
+#include "normal_encoding.glsl"
+in vec4 normal;
+in vec2 textureCoords;
+
+uniform mat4 projection;
+uniform mat4 view;
+
+uniform bool linkLight;
+
+out vec4 outNormal;
+out vec2 outTextureCoords;
+
+void main()
+{
+    vec4 decodedPosition = decodePosition();
+    outNormal = vec4(deformNormal(decodeNormal(normal)), 0.0);
+    outNormal = drawModel() * outNormal;
+    if (linkLight) {
+        outNormal = view * outNormal;
+    }
+    outNormal = normalize(outNormal);
+    outTextureCoords = textureCoords;
+    gl_Position = drawMvp() * decodedPosition;
+}
@@ -1,12 +1,13 @@
 #version 330
 layout(location = 0) in vec4 position;
+#include "deformation.glsl"
+#include "draw.glsl"
 
 uniform mat4 projection;
 uniform mat4 view;
-uniform mat4 model;
-uniform mat4 mvp;
 
 void main()
 {
-    gl_Position = mvp * position;
+    vec4 decodedPosition = decodePosition();
+    gl_Position = drawMvp() * decodedPosition;
 }
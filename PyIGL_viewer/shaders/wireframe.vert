@@ -1,16 +1,16 @@
 #version 330
 layout(location = 0) in vec4 position;
+#include "deformation.glsl"
+#include "draw.glsl"
 
 uniform mat4 projection;
 uniform mat4 view;
-uniform mat4 model;
-
-uniform mat4 mvp;
 
 float EPSILON = 1e-6;
 
 void main()
 {
-    gl_Position = mvp * position;
+    vec4 decodedPosition = decodePosition();
+    gl_Position = drawMvp() * decodedPosition;
     gl_Position.z -= EPSILON;
 }
@@ -0,0 +1,63 @@
+import time
+
+
+class AdaptiveQuality:
+    # Lowers the rendering quality while the camera is being manipulated, when frames take
+    # longer than the target frame time. Levels are cumulative:
+    # 1: multisampling disabled, 2: wireframes hidden, 3: points and lines drawn one pixel wide,
+    # 4: render scale halved.
+    max_level = 4
+
+    def __init__(self, target_fps=30, enabled=True):
+        self.enabled = enabled
+        self.set_target_fps(target_fps)
+        self.interacting = False
+        self.level = 0
+        self.frame_time = 0.0
+        self.last_frame_time = 0.0
+        self.frame_start = None
+
+    def set_target_fps(self, target_fps):
+        self.target_frame_time = 1.0 / target_fps
+
+    def begin_interaction(self):
+        self.interacting = self.enabled
+
+    def end_interaction(self):
+        # Returns True if the quality was lowered, in which case a full quality redraw is needed.
+        degraded = self.level > 0
+        self.interacting = False
+        self.level = 0
+        return degraded
+
+    def begin_frame(self):
+        self.frame_start = time.perf_counter()
+
+    def end_frame(self):
+        if self.frame_start is None:
+            return
+        frame_time = time.perf_counter() - self.frame_start
+        self.frame_start = None
+        self.last_frame_time = frame_time
+        if not self.interacting:
+            self.frame_time = frame_time
+            return
+
+        # Smooth the frame time. The level only goes up during an interaction, to avoid
+        # oscillating between levels, and full quality comes back in end_interaction.
+        self.frame_time = 0.5 * self.frame_time + 0.5 * frame_time
+        if self.frame_time > self.target_frame_time and self.level < self.max_level:
+            self.level += 1
+            self.frame_time = 0.0
+
+    def multisampling(self):
+        return self.level < 1
+
+    def wireframes(self):
+        return self.level < 2
+
+    def thin_primitives(self):
+        return self.level >= 3
+
+    def render_scale_factor(self):
+        return 0.5 if self.level >= 4 else 1.0
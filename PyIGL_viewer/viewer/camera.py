@@ -35,11 +35,9 @@ class Camera:
         left_vector = np.cross(self.up, norm_target_vector)
         rotation_x = rotate(delta.y(), left_vector)
         rotation_y = rotate(delta.x(), self.up)
-        rotated_target = np.matmul(rotation_x, target_vector)
-        rotated_target = np.array(rotated_target)[0]
-        rotated_target = np.array(np.matmul(rotation_y, rotated_target))[0]
+        rotated_target = rotation_y @ (rotation_x @ target_vector)
         rotated_target = normalize(rotated_target)
-        rotated_left = np.array(np.matmul(rotation_y, left_vector))[0]
+        rotated_left = rotation_y @ left_vector
         self.current_up = np.cross(rotated_target, rotated_left)
         self.current_eye = self.target + dist_target * rotated_target
 
@@ -65,8 +63,24 @@ class Camera:
         delta = max(delta, -0.9)
         self.eye += delta * target_vector
 
+    def get_state(self):
+        # Compact description of the camera, used to detect whether a redraw is needed.
+        return np.concatenate(
+            [
+                self.current_eye,
+                self.current_target,
+                self.current_up,
+                [
+                    self.aspect_ratio,
+                    self.field_of_view,
+                    self.near_plane,
+                    self.far_plane,
+                ],
+            ]
+        ).tobytes()
+
     def get_position(self):
-        return self.current_eye
+        return self.current_eye.astype(np.float32)
 
     def get_view_matrix(self):
         return lookat(self.current_eye, self.current_target, self.current_up)
@@ -0,0 +1,119 @@
+import numpy as np
+from OpenGL import GL as gl
+
+from .texture import current_share_group
+
+# Control points of the built-in colormaps, linearly interpolated to the texture resolution.
+COLORMAPS = {
+    "viridis": [
+        [0.267, 0.005, 0.329],
+        [0.283, 0.141, 0.458],
+        [0.254, 0.265, 0.530],
+        [0.207, 0.372, 0.553],
+        [0.164, 0.471, 0.558],
+        [0.128, 0.567, 0.551],
+        [0.135, 0.659, 0.518],
+        [0.267, 0.749, 0.441],
+        [0.478, 0.821, 0.318],
+        [0.741, 0.873, 0.150],
+        [0.993, 0.906, 0.144],
+    ],
+    "coolwarm": [
+        [0.230, 0.299, 0.754],
+        [0.552, 0.690, 0.996],
+        [0.865, 0.865, 0.865],
+        [0.958, 0.604, 0.482],
+        [0.706, 0.016, 0.150],
+    ],
+    "jet": [
+        [0.0, 0.0, 0.5],
+        [0.0, 0.0, 1.0],
+        [0.0, 1.0, 1.0],
+        [1.0, 1.0, 0.0],
+        [1.0, 0.0, 0.0],
+        [0.5, 0.0, 0.0],
+    ],
+    "gray": [[0.0, 0.0, 0.0], [1.0, 1.0, 1.0]],
+}
+
+
+def colormap_colors(colormap, resolution=256):
+    if isinstance(colormap, str):
+        if colormap not in COLORMAPS:
+            raise ValueError(f"Unknown colormap {colormap}")
+        colormap = COLORMAPS[colormap]
+    control_points = np.asarray(colormap, dtype=np.float32)[:, :3]
+    positions = np.linspace(0.0, 1.0, num=control_points.shape[0])
+    samples = np.linspace(0.0, 1.0, num=resolution)
+    colors = np.stack(
+        [np.interp(samples, positions, control_points[:, c]) for c in range(3)], axis=1
+    )
+    return colors.astype(np.float32)
+
+
+#################################################################################################
+# A colormap is a 1D texture bound to a sampler uniform of a mesh prefab.
+# Changing its colors only re-uploads the texture, never the vertex attributes of the mesh.
+# Each share group of GL contexts has its own texture, see the texture module.
+
+
+class Colormap:
+    def __init__(self, colormap="viridis"):
+        self.textures = {}
+        self.users = {}
+        self.set_colors(colormap)
+
+    def set_colors(self, colormap):
+        self.colors = colormap_colors(colormap)
+        # Share groups whose texture has the current colors
+        self.uploaded = set()
+
+    def upload(self, share_group):
+        if share_group not in self.textures:
+            texture = gl.glGenTextures(1)
+            gl.glBindTexture(gl.GL_TEXTURE_1D, texture)
+            gl.glTexParameteri(gl.GL_TEXTURE_1D, gl.GL_TEXTURE_MIN_FILTER, gl.GL_LINEAR)
+            gl.glTexParameteri(gl.GL_TEXTURE_1D, gl.GL_TEXTURE_MAG_FILTER, gl.GL_LINEAR)
+            gl.glTexParameteri(
+                gl.GL_TEXTURE_1D, gl.GL_TEXTURE_WRAP_S, gl.GL_CLAMP_TO_EDGE
+            )
+            self.textures[share_group] = texture
+        gl.glTexImage1D(
+            gl.GL_TEXTURE_1D,
+            0,
+            gl.GL_RGB32F,
+            self.colors.shape[0],
+            0,
+            gl.GL_RGB,
+            gl.GL_FLOAT,
+            self.colors,
+        )
+        self.uploaded.add(share_group)
+
+    def bind(self, texture_unit):
+        gl.glActiveTexture(gl.GL_TEXTURE0 + texture_unit)
+        share_group = current_share_group()
+        if share_group in self.textures:
+            gl.glBindTexture(gl.GL_TEXTURE_1D, self.textures[share_group])
+        if share_group not in self.uploaded:
+            self.upload(share_group)
+
+    def acquire(self):
+        share_group = current_share_group()
+        self.users[share_group] = self.users.get(share_group, 0) + 1
+
+    def release(self):
+        # The texture of a share group is deleted with the last prefab using the colormap in it
+        share_group = current_share_group()
+        self.users[share_group] -= 1
+        if self.users[share_group] == 0:
+            del self.users[share_group]
+            self.delete(share_group)
+
+    def delete(self, share_group):
+        if share_group in self.textures:
+            gl.glDeleteTextures(1, [self.textures.pop(share_group)])
+        self.uploaded.discard(share_group)
+
+
+#################################################################################################
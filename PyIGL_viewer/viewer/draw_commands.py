@@ -0,0 +1,141 @@
+import numpy as np
+
+from ..mesh.pool import POOL_SLOT_LOCATION
+
+# Mesh events changing the meshes, prefabs or visible instances of the draw commands, or whether
+# a mesh can be pooled. The other events only change buffer contents, matrices or uniform values,
+# which are read when drawing.
+STRUCTURAL_EVENTS = {
+    "add_mesh",
+    "add_mesh_prefab",
+    "add_mesh_instance",
+    "add_mesh_instances",
+    "add_wireframe",
+    "remove_mesh",
+    "remove_mesh_prefab",
+    "remove_mesh_instance",
+    "remove_mesh_instances",
+    "set_mesh_instance_visibility",
+    "set_mesh_instances_visibility",
+    "clear_all",
+    "add_animation_clip",
+    "remove_animation_clip",
+    "add_blend_shapes",
+    "remove_blend_shapes",
+    "add_skin",
+    "remove_skin",
+}
+
+# Prefab events that can move a pooled prefab to another batch or out of its pool, by changing its
+# uniform key or giving it its own attribute buffer.
+POOLED_PREFAB_EVENTS = {
+    "update_mesh_prefab_uniform",
+    "update_mesh_prefab_vertex_attribute",
+    "update_mesh_prefab_face_attribute",
+    "update_mesh_prefab_scalar_field",
+}
+
+
+class DrawCommand:
+    # One prefab of a mesh group with its visible instances, resolved when the scene changes.
+    __slots__ = (
+        "group",
+        "core",
+        "prefab",
+        "shader",
+        "fill",
+        "wireframe",
+        "instance_indices",
+        "model_location",
+        "mvp_location",
+        "bind_positions",
+        "number_chunks",
+    )
+
+    def __init__(self, group, core, prefab, instance_indices):
+        self.group = group
+        self.core = core
+        self.prefab = prefab
+        self.shader = prefab.get_shader()
+        self.fill = prefab.fill
+        self.wireframe = self.shader.name == "wireframe"
+        self.instance_indices = instance_indices
+        self.model_location = self.shader.builtin_uniforms.get("model", -1)
+        self.mvp_location = self.shader.builtin_uniforms.get("mvp", -1)
+        self.bind_positions = not prefab.interleaved
+        self.number_chunks = core.number_chunks()
+
+
+class PooledDrawCommand:
+    # Pooled prefabs drawn together, see GeometryPool.multi_draw.
+    # The k-th layer draws the k-th visible instance of every mesh of the batch.
+    __slots__ = (
+        "pool",
+        "drawing_mode",
+        "core",
+        "prefab",
+        "shader",
+        "fill",
+        "wireframe",
+        "attribute_locations",
+        "layers",
+        "draws",
+    )
+
+    def __init__(self, pool, drawing_mode, draws):
+        self.pool = pool
+        self.drawing_mode = drawing_mode
+        self.draws = draws
+        # All the prefabs of a batch have the same shader and uniform values
+        _, self.core, self.prefab, _ = draws[0]
+        self.shader = self.prefab.get_shader()
+        self.fill = self.prefab.fill
+        self.wireframe = self.shader.name == "wireframe"
+        self.attribute_locations = dict(self.prefab.attribute_locations)
+        self.attribute_locations["poolSlot"] = POOL_SLOT_LOCATION
+
+        self.layers = []
+        number_layers = max(draw[3].shape[0] for draw in draws)
+        for layer in range(number_layers):
+            layer_draws = [draw for draw in draws if draw[3].shape[0] > layer]
+            pool_ranges = [draw[1].pool_range for draw in layer_draws]
+            instances = np.array([draw[3][layer] for draw in layer_draws])
+            self.layers.append((pool_ranges, instances))
+
+
+def compile_draw_commands(mesh_groups, instance_mask=None):
+    # Returns the draw commands and the pooled draw commands of the scene, sorted by shader
+    # program so that consecutive commands share as much GL state as possible.
+    # instance_mask selects the instance table indices drawn by a viewport.
+    commands = []
+    pooled_batches = {}
+    for group in mesh_groups.values():
+        for core, prefab, instance_indices in group:
+            if instance_mask is not None:
+                instance_indices = instance_indices[instance_mask[instance_indices]]
+            if instance_indices.shape[0] == 0:
+                continue
+            if (
+                core.pool_range is not None
+                and not core.deformed()
+                and prefab.poolable()
+            ):
+                batch_key = (
+                    core.pool_range.pool,
+                    core.drawing_mode,
+                    prefab.get_shader().name,
+                    prefab.fill,
+                    prefab.get_uniform_key(),
+                )
+                pooled_batches.setdefault(batch_key, []).append(
+                    (group, core, prefab, instance_indices)
+                )
+            else:
+                commands.append(DrawCommand(group, core, prefab, instance_indices))
+    commands.sort(key=lambda command: command.shader.program)
+
+    pooled_commands = [
+        PooledDrawCommand(pool, drawing_mode, draws)
+        for (pool, drawing_mode, _, _, _), draws in pooled_batches.items()
+    ]
+    return commands, pooled_commands
@@ -0,0 +1,86 @@
+import threading
+import time
+from queue import Queue
+
+from PyQt5.QtCore import QObject, QTimer, pyqtSignal
+
+
+class RedrawQueue(Queue):
+    # Event queue that requests a redraw of its widget whenever an event is added.
+    def __init__(self, request_redraw):
+        super().__init__()
+        self.request_redraw = request_redraw
+
+    def put(self, item, block=True, timeout=None):
+        super().put(item, block, timeout)
+        self.request_redraw()
+
+
+class FrameScheduler(QObject):
+    # Coalesces the redraw requests of all the viewer widgets.
+    # Requests can come from any thread, widgets are repainted at most once per frame interval,
+    # and only if their scene or camera changed since their last paint.
+    schedule_signal = pyqtSignal()
+
+    def __init__(self, max_fps=60):
+        super().__init__()
+        self.lock = threading.Lock()
+        self.pending_widgets = []
+        self.last_frame_time = 0.0
+
+        self.timer = QTimer(self)
+        self.timer.setSingleShot(True)
+        self.timer.timeout.connect(self.process_frame)
+        self.schedule_signal.connect(self.schedule_frame)
+
+        # Pollers detect data changed outside of the viewer, they are called once per frame interval
+        self.pollers = []
+        self.poll_timer = QTimer(self)
+        self.poll_timer.timeout.connect(self.poll)
+
+        self.set_max_fps(max_fps)
+
+    def set_max_fps(self, max_fps):
+        # A max_fps of None or 0 disables the frame rate cap.
+        self.frame_interval = 1.0 / max_fps if max_fps else 0.0
+        self.poll_timer.setInterval(
+            max(1, int(1000.0 * self.frame_interval)) if max_fps else 16
+        )
+
+    def add_poller(self, poller):
+        # Must be called from the GUI thread
+        self.pollers.append(poller)
+        if not self.poll_timer.isActive():
+            self.poll_timer.start()
+
+    def remove_poller(self, poller):
+        if poller in self.pollers:
+            self.pollers.remove(poller)
+        if len(self.pollers) == 0:
+            self.poll_timer.stop()
+
+    def poll(self):
+        for poller in list(self.pollers):
+            poller()
+
+    def request_redraw(self, widget):
+        with self.lock:
+            if widget not in self.pending_widgets:
+                self.pending_widgets.append(widget)
+        # The signal is delivered in the GUI thread, where the timer lives.
+        self.schedule_signal.emit()
+
+    def schedule_frame(self):
+        if self.timer.isActive():
+            return
+        delay = self.last_frame_time + self.frame_interval - time.perf_counter()
+        self.timer.start(max(0, int(1000.0 * delay)))
+
+    def process_frame(self):
+        with self.lock:
+            widgets = self.pending_widgets
+            self.pending_widgets = []
+        self.last_frame_time = time.perf_counter()
+        for widget in widgets:
+            if widget.needs_redraw():
+                widget.update()
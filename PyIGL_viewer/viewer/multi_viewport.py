@@ -0,0 +1,234 @@
+import numpy as np
+from OpenGL import GL as gl
+from PyQt5.QtCore import QRect, QSize
+
+from .scene import ViewerScene
+from .viewer_widget import ViewerWidget
+from ..mesh import handle_indices
+
+
+def widget_attribute(name):
+    # Attribute of the meshes of a MultiViewportWidget, shared by all its viewports.
+    return property(
+        lambda self: getattr(self.widget, name),
+        lambda self, value: setattr(self.widget, name, value),
+    )
+
+
+class Viewport(ViewerScene):
+    # One cell of a MultiViewportWidget, with its own camera, lights and instances.
+    # Meshes, prefabs and instances are stored once by the widget, so that several viewports can
+    # draw the same buffers. Instances added through a viewport are drawn in it, show_mesh_instance
+    # draws an instance of another viewport too. clear_all and the memory settings apply to the widget.
+    mesh_groups = widget_attribute("mesh_groups")
+    mesh_prefab_handles = widget_attribute("mesh_prefab_handles")
+    mesh_instances = widget_attribute("mesh_instances")
+    scene_graph = widget_attribute("scene_graph")
+    memory_manager = widget_attribute("memory_manager")
+    gpu_resident = widget_attribute("gpu_resident")
+    vertex_streams = widget_attribute("vertex_streams")
+    shared_feeds = widget_attribute("shared_feeds")
+    animation_time = widget_attribute("animation_time")
+    geometry_pools = widget_attribute("geometry_pools")
+    pool_layers = widget_attribute("pool_layers")
+    gl_state = widget_attribute("gl_state")
+    texture_cache = widget_attribute("texture_cache")
+    mesh_events = widget_attribute("mesh_events")
+    shaders = widget_attribute("shaders")
+
+    def __init__(self, widget, row, column, row_span=1, column_span=1):
+        self.widget = widget
+        self.main_window = widget.main_window
+        self.row = int(row)
+        self.column = int(column)
+        self.row_span = int(row_span)
+        self.column_span = int(column_span)
+        self.init_view(QSize(1, 1))
+        # Handles of the instances drawn in this viewport
+        self.instance_handles = []
+
+    def instance_mask(self, mesh_instances):
+        # Handles of removed instances are forgotten.
+        handles = np.array(self.instance_handles, dtype=np.int64)
+        handles = handles[mesh_instances.valid(handles)]
+        self.instance_handles = handles.tolist()
+        mask = np.zeros(mesh_instances.alive.shape[0], dtype=bool)
+        indices = handle_indices(handles)
+        mask[indices[indices < mask.shape[0]]] = True
+        return mask
+
+    def add_instance_handles(self, handles):
+        self.instance_handles.extend(handles)
+        self.draw_commands = None
+        self.request_redraw()
+
+    def add_mesh_instance(self, prefab_id, model_matrix):
+        instance_id = super(Viewport, self).add_mesh_instance(prefab_id, model_matrix)
+        self.add_instance_handles([instance_id.instance_id])
+        return instance_id
+
+    def add_mesh_instances(self, prefab_id, model_matrices):
+        handles = super(Viewport, self).add_mesh_instances(prefab_id, model_matrices)
+        self.add_instance_handles(handles.tolist())
+        return handles
+
+    def add_wireframe(self, mesh_instance_id, line_color=np.array([0.0, 0.0, 0.0])):
+        instance_id = super(Viewport, self).add_wireframe(mesh_instance_id, line_color)
+        self.add_instance_handles([instance_id.instance_id])
+        return instance_id
+
+    def show_mesh_instance(self, instance_id):
+        # Also draws in this viewport an instance added through another viewport.
+        if instance_id.instance_id not in self.instance_handles:
+            self.add_instance_handles([instance_id.instance_id])
+
+    def hide_mesh_instance(self, instance_id):
+        # Stops drawing the instance in this viewport, it is not removed from the other viewports.
+        if instance_id.instance_id in self.instance_handles:
+            self.instance_handles.remove(instance_id.instance_id)
+            self.draw_commands = None
+            self.request_redraw()
+
+    def show(self):
+        self.widget.show()
+
+    def request_redraw(self, scene_changed=True):
+        self.widget.request_redraw(scene_changed)
+
+    def request_camera_redraw(self):
+        self.widget.request_camera_redraw()
+
+    def set_render_quality(self, samples=None, render_scale=None):
+        self.widget.set_render_quality(samples, render_scale)
+
+    def set_auto_render_scale(self, enabled=True, target_fps=30, min_scale=0.25):
+        self.widget.set_auto_render_scale(enabled, target_fps, min_scale)
+
+    def set_adaptive_quality(self, enabled=True, target_fps=30):
+        self.widget.set_adaptive_quality(enabled, target_fps)
+
+    def save_screenshot(self, path):
+        self.widget.post_draw_events.put(["save_viewport_screenshot", self, path])
+
+
+class MultiViewportWidget(ViewerWidget):
+    # Draws a grid of viewports in a single GL surface, so that they share one context,
+    # one set of shaders, the meshes and one buffer swap per frame.
+    def __init__(self, parent, samples=8, render_scale=1.0):
+        super(MultiViewportWidget, self).__init__(parent, samples, render_scale)
+        self.viewports = []
+        self.border_width = 1
+
+    def add_viewport(self, row, column, row_span=1, column_span=1):
+        viewport = Viewport(self, row, column, row_span, column_span)
+        self.viewports.append(viewport)
+        if len(self.viewports) == 1:
+            self.camera = viewport.camera
+        self.resize_viewports()
+        self.request_redraw()
+        return viewport
+
+    def grid_size(self):
+        rows = max(viewport.row + viewport.row_span for viewport in self.viewports)
+        columns = max(
+            viewport.column + viewport.column_span for viewport in self.viewports
+        )
+        return rows, columns
+
+    def viewport_rect(self, viewport, width, height):
+        # Rectangle of the viewport in a width x height surface, with the origin at the top left
+        rows, columns = self.grid_size()
+        x = viewport.column * width // columns
+        y = viewport.row * height // rows
+        right = (viewport.column + viewport.column_span) * width // columns
+        bottom = (viewport.row + viewport.row_span) * height // rows
+        return QRect(x, y, right - x, bottom - y)
+
+    def viewport_at(self, position):
+        for viewport in self.viewports:
+            if self.viewport_rect(viewport, self.width(), self.height()).contains(
+                position
+            ):
+                return viewport
+        return None
+
+    def resize_viewports(self):
+        for viewport in self.viewports:
+            rect = self.viewport_rect(viewport, self.width(), self.height())
+            viewport.camera.handle_resize(max(1, rect.width()), max(1, rect.height()))
+
+    def resizeGL(self, width, height):
+        self.resize_viewports()
+
+    def invalidate_draw_commands(self):
+        for viewport in self.viewports:
+            viewport.draw_commands = None
+
+    def render(self, quality, line_width, width, height):
+        def hex_to_rgb(value):
+            value = value.lstrip("#")
+            lv = len(value)
+            return tuple(int(value[i : i + lv // 3], 16) for i in range(0, lv, lv // 3))
+
+        palette = self.main_window.viewer_palette
+        border_color = hex_to_rgb(palette["viewer_widget_border_color"])
+        background_color = hex_to_rgb(palette["viewer_background"])
+
+        gl.glClearColor(*[float(c) / 255.0 for c in border_color], 1.0)
+        gl.glClear(gl.GL_DEPTH_BUFFER_BIT | gl.GL_COLOR_BUFFER_BIT)
+        if len(self.viewports) == 0:
+            return
+
+        gl.glClearColor(*[float(c) / 255.0 for c in background_color], 1.0)
+        gl.glEnable(gl.GL_SCISSOR_TEST)
+        self.update_scene()
+        for viewport in self.viewports:
+            rect = self.viewport_rect(viewport, width, height)
+            rect.adjust(
+                self.border_width,
+                self.border_width,
+                -self.border_width,
+                -self.border_width,
+            )
+            # GL viewports have their origin at the bottom left
+            y = height - rect.y() - rect.height()
+            gl.glViewport(rect.x(), y, rect.width(), rect.height())
+            gl.glScissor(rect.x(), y, rect.width(), rect.height())
+            gl.glClear(gl.GL_DEPTH_BUFFER_BIT | gl.GL_COLOR_BUFFER_BIT)
+            self.draw_view(viewport, quality, line_width, rect.height())
+        self.finish_frame()
+        gl.glDisable(gl.GL_SCISSOR_TEST)
+        gl.glViewport(0, 0, width, height)
+
+    def camera_state(self):
+        return tuple(viewport.camera.get_state() for viewport in self.viewports)
+
+    def toggle_wireframe(self):
+        for viewport in self.viewports:
+            viewport.draw_wireframe = not viewport.draw_wireframe
+        self.request_redraw()
+
+    def save_viewport_screenshot_(self, viewport, path):
+        current_frame = self.grabFramebuffer()
+        rect = self.viewport_rect(
+            viewport, current_frame.width(), current_frame.height()
+        )
+        current_frame.copy(rect).save(path)
+
+    #################################################################################################
+    # Event handling, camera interaction applies to the viewport under the mouse
+
+    def set_active_viewport(self, position):
+        viewport = self.viewport_at(position)
+        if viewport is not None:
+            self.camera = viewport.camera
+
+    def mousePressEvent(self, e):
+        self.set_active_viewport(e.pos())
+        super(MultiViewportWidget, self).mousePressEvent(e)
+
+    def wheelEvent(self, e):
+        self.set_active_viewport(e.pos())
+        super(MultiViewportWidget, self).wheelEvent(e)
+
+    #################################################################################################
@@ -1,6 +1,9 @@
 import numpy as np
 import math
 
+# All matrices are returned as float32 ndarrays in row-major order, ready to be uploaded with transpose=GL_TRUE.
+# Matrices are combined with the @ operator (or np.matmul for batches of matrices).
+
 
 def magnitude(v):
     return math.sqrt(np.sum(v ** 2))
@@ -20,13 +23,14 @@ def ortho(l, r, b, t, n, f):
     rx = -(r + l) / (r - l)
     ry = -(t + b) / (t - b)
     rz = -(f + n) / (f - n)
-    return np.matrix(
+    return np.array(
         [
             [2.0 / dx, 0, 0, rx],
             [0, 2.0 / dy, 0, ry],
             [0, 0, -2.0 / dz, rz],
             [0, 0, 0, 1],
-        ]
+        ],
+        dtype=np.float32,
     )
 
 
@@ -35,19 +39,19 @@ def perspective(fovy, aspect, n, f):
     sx, sy = s / aspect, s
     zz = -(f + n) / (f - n)
     zw = -2 * f * n / (f - n)
-    return np.matrix(
-        [[sx, 0, 0, 0], [0, sy, 0, 0], [0, 0, zz, zw], [0, 0, -1.0, 0]], dtype="f"
+    return np.array(
+        [[sx, 0, 0, 0], [0, sy, 0, 0], [0, 0, zz, zw], [0, 0, -1.0, 0]], dtype=np.float32
     )
 
 
 def translate(xyz):
     x, y, z = xyz
-    return np.matrix([[1, 0, 0, x], [0, 1, 0, y], [0, 0, 1, z], [0, 0, 0, 1]])
+    return np.array([[1, 0, 0, x], [0, 1, 0, y], [0, 0, 1, z], [0, 0, 0, 1]], dtype=np.float32)
 
 
 def scale(xyz):
     x, y, z = xyz
-    return np.matrix([[x, 0, 0, 0], [0, y, 0, 0], [0, 0, z, 0], [0, 0, 0, 1]])
+    return np.array([[x, 0, 0, 0], [0, y, 0, 0], [0, 0, z, 0], [0, 0, 0, 1]], dtype=np.float32)
 
 
 def sincos(a):
@@ -59,28 +63,29 @@ def rotate(a, xyz):
     x, y, z = normalize(xyz)
     s, c = sincos(a)
     nc = 1 - c
-    return np.matrix(
+    return np.array(
         [
             [x * x * nc + c, x * y * nc - z * s, x * z * nc + y * s],
             [y * x * nc + z * s, y * y * nc + c, y * z * nc - x * s],
             [x * z * nc - y * s, y * z * nc + x * s, z * z * nc + c],
-        ]
+        ],
+        dtype=np.float32,
     )
 
 
 def rotx(a):
     s, c = sincos(a)
-    return np.matrix([[1, 0, 0], [0, c, -s], [0, s, c]])
+    return np.array([[1, 0, 0], [0, c, -s], [0, s, c]], dtype=np.float32)
 
 
 def roty(a):
     s, c = sincos(a)
-    return np.matrix([[c, 0, s], [0, 1, 0], [-s, 0, c]])
+    return np.array([[c, 0, s], [0, 1, 0], [-s, 0, c]], dtype=np.float32)
 
 
 def rotz(a):
     s, c = sincos(a)
-    return np.matrix([[c, -s, 0, 0], [s, c, 0, 0], [0, 0, 1, 0], [0, 0, 0, 1]])
+    return np.array([[c, -s, 0, 0], [s, c, 0, 0], [0, 0, 1, 0], [0, 0, 0, 1]], dtype=np.float32)
 
 
 def lookat(eye, target, up):
@@ -89,7 +94,12 @@ def lookat(eye, target, up):
     U = normalize(up[:3])
     s = np.cross(f, U)
     u = np.cross(s, f)
-    M = np.matrix(np.identity(4))
+    M = np.identity(4, dtype=np.float32)
     M[:3, :3] = np.vstack([s, u, -f])
     T = translate(-eye)
-    return M * T
+    return M @ T
+
+
+def batch_mvp(view_projection, model_matrices):
+    # Model matrices are stacked in a (N, 4, 4) array, the result has the same layout.
+    return np.matmul(view_projection, model_matrices)
@@ -0,0 +1,213 @@
+import math
+import numpy as np
+from OpenGL import GL as gl
+from OpenGL.GL import shaders
+
+# The resolved color texture is drawn to the widget with a fullscreen quad. Blitting would fail
+# since the widget surface is usually multisampled.
+COMPOSITE_VERTEX_SHADER = """
+#version 330
+layout(location = 0) in vec2 position;
+out vec2 textureCoords;
+void main()
+{
+    textureCoords = 0.5 * position + 0.5;
+    gl_Position = vec4(position, 0.0, 1.0);
+}
+"""
+
+COMPOSITE_FRAGMENT_SHADER = """
+#version 330
+in vec2 textureCoords;
+uniform sampler2D color;
+out vec4 outputColor;
+void main()
+{
+    outputColor = texture(color, textureCoords);
+}
+"""
+
+
+class RenderTarget:
+    # Offscreen framebuffer the scene is rendered into when the render scale or the sample count
+    # differ from the ones of the widget surface. It is then resolved and upscaled to the widget.
+    def __init__(self):
+        self.width = 0
+        self.height = 0
+        self.samples = 0
+        self.framebuffer = None
+        self.renderbuffers = []
+        self.resolve_framebuffer = None
+        self.color_texture = None
+        self.composite_program = None
+        self.composite_quad = None
+
+    def resize(self, width, height, samples):
+        width = max(1, width)
+        height = max(1, height)
+        samples = min(samples, gl.glGetIntegerv(gl.GL_MAX_SAMPLES))
+        if self.framebuffer is not None and (width, height, samples) == (
+            self.width,
+            self.height,
+            self.samples,
+        ):
+            return
+        self.delete()
+        self.width = width
+        self.height = height
+        self.samples = samples
+
+        # The color texture is sampled by the composite pass, with linear filtering for upscaling
+        self.color_texture = gl.glGenTextures(1)
+        gl.glBindTexture(gl.GL_TEXTURE_2D, self.color_texture)
+        gl.glTexParameteri(gl.GL_TEXTURE_2D, gl.GL_TEXTURE_MIN_FILTER, gl.GL_LINEAR)
+        gl.glTexParameteri(gl.GL_TEXTURE_2D, gl.GL_TEXTURE_MAG_FILTER, gl.GL_LINEAR)
+        gl.glTexParameteri(gl.GL_TEXTURE_2D, gl.GL_TEXTURE_WRAP_S, gl.GL_CLAMP_TO_EDGE)
+        gl.glTexParameteri(gl.GL_TEXTURE_2D, gl.GL_TEXTURE_WRAP_T, gl.GL_CLAMP_TO_EDGE)
+        gl.glTexImage2D(
+            gl.GL_TEXTURE_2D,
+            0,
+            gl.GL_RGBA8,
+            width,
+            height,
+            0,
+            gl.GL_RGBA,
+            gl.GL_UNSIGNED_BYTE,
+            None,
+        )
+
+        self.framebuffer = gl.glGenFramebuffers(1)
+        gl.glBindFramebuffer(gl.GL_FRAMEBUFFER, self.framebuffer)
+        if samples > 0:
+            # Multisampled renderbuffers are resolved into the color texture before compositing
+            self.renderbuffers = list(gl.glGenRenderbuffers(2))
+            formats = [gl.GL_RGBA8, gl.GL_DEPTH_COMPONENT24]
+            attachments = [gl.GL_COLOR_ATTACHMENT0, gl.GL_DEPTH_ATTACHMENT]
+        else:
+            self.renderbuffers = [gl.glGenRenderbuffers(1)]
+            formats = [gl.GL_DEPTH_COMPONENT24]
+            attachments = [gl.GL_DEPTH_ATTACHMENT]
+            gl.glFramebufferTexture2D(
+                gl.GL_FRAMEBUFFER,
+                gl.GL_COLOR_ATTACHMENT0,
+                gl.GL_TEXTURE_2D,
+                self.color_texture,
+                0,
+            )
+        for renderbuffer, internal_format, attachment in zip(
+            self.renderbuffers, formats, attachments
+        ):
+            gl.glBindRenderbuffer(gl.GL_RENDERBUFFER, renderbuffer)
+            gl.glRenderbufferStorageMultisample(
+                gl.GL_RENDERBUFFER, samples, internal_format, width, height
+            )
+            gl.glFramebufferRenderbuffer(
+                gl.GL_FRAMEBUFFER, attachment, gl.GL_RENDERBUFFER, renderbuffer
+            )
+        self.check_status()
+
+        if samples > 0:
+            self.resolve_framebuffer = gl.glGenFramebuffers(1)
+            gl.glBindFramebuffer(gl.GL_FRAMEBUFFER, self.resolve_framebuffer)
+            gl.glFramebufferTexture2D(
+                gl.GL_FRAMEBUFFER,
+                gl.GL_COLOR_ATTACHMENT0,
+                gl.GL_TEXTURE_2D,
+                self.color_texture,
+                0,
+            )
+            self.check_status()
+        gl.glBindRenderbuffer(gl.GL_RENDERBUFFER, 0)
+
+    def check_status(self):
+        status = gl.glCheckFramebufferStatus(gl.GL_FRAMEBUFFER)
+        if status != gl.GL_FRAMEBUFFER_COMPLETE:
+            raise ValueError(f"Incomplete render target framebuffer: {status}")
+
+    def bind(self):
+        gl.glBindFramebuffer(gl.GL_FRAMEBUFFER, self.framebuffer)
+        gl.glViewport(0, 0, self.width, self.height)
+
+    def create_composite_pass(self):
+        self.composite_program = shaders.compileProgram(
+            shaders.compileShader(COMPOSITE_VERTEX_SHADER, gl.GL_VERTEX_SHADER),
+            shaders.compileShader(COMPOSITE_FRAGMENT_SHADER, gl.GL_FRAGMENT_SHADER),
+        )
+        self.composite_color_location = gl.glGetUniformLocation(
+            self.composite_program, "color"
+        )
+        quad = np.array([[-1, -1], [1, -1], [-1, 1], [1, 1]], dtype=np.float32)
+        self.composite_quad = gl.arrays.vbo.VBO(quad)
+
+    def composite(self, target_framebuffer, target_width, target_height, gl_state):
+        if self.resolve_framebuffer is not None:
+            # Both framebuffers have the same size, so the multisampled one can be blitted
+            gl.glBindFramebuffer(gl.GL_READ_FRAMEBUFFER, self.framebuffer)
+            gl.glBindFramebuffer(gl.GL_DRAW_FRAMEBUFFER, self.resolve_framebuffer)
+            gl.glBlitFramebuffer(
+                0,
+                0,
+                self.width,
+                self.height,
+                0,
+                0,
+                self.width,
+                self.height,
+                gl.GL_COLOR_BUFFER_BIT,
+                gl.GL_NEAREST,
+            )
+        gl.glBindFramebuffer(gl.GL_FRAMEBUFFER, target_framebuffer)
+        gl.glViewport(0, 0, target_width, target_height)
+
+        if self.composite_program is None:
+            self.create_composite_pass()
+        gl_state.use_program(self.composite_program)
+        gl.glUniform1i(self.composite_color_location, 0)
+        gl.glActiveTexture(gl.GL_TEXTURE0)
+        gl.glBindTexture(gl.GL_TEXTURE_2D, self.color_texture)
+        gl_state.set_polygon_mode(gl.GL_FILL)
+        for location in list(gl_state.enabled_attributes):
+            if location != 0:
+                gl_state.disable_attribute(location)
+        gl_state.vertex_attribute(0, self.composite_quad, 2, gl.GL_FLOAT, False)
+        gl.glDisable(gl.GL_DEPTH_TEST)
+        gl.glDrawArrays(gl.GL_TRIANGLE_STRIP, 0, 4)
+        gl.glEnable(gl.GL_DEPTH_TEST)
+
+    def delete(self):
+        if self.framebuffer is None:
+            return
+        gl.glDeleteFramebuffers(1, [self.framebuffer])
+        gl.glDeleteRenderbuffers(len(self.renderbuffers), self.renderbuffers)
+        gl.glDeleteTextures(1, [self.color_texture])
+        if self.resolve_framebuffer is not None:
+            gl.glDeleteFramebuffers(1, [self.resolve_framebuffer])
+        self.framebuffer = None
+        self.renderbuffers = []
+        self.resolve_framebuffer = None
+        self.color_texture = None
+
+
+class RenderScaleController:
+    # Adjusts the render scale to hold a target frame time. The number of shaded pixels is
+    # proportional to the square of the scale, hence the square root.
+    def __init__(self, target_fps=30, min_scale=0.25, max_scale=1.0):
+        self.enabled = False
+        self.target_frame_time = 1.0 / target_fps
+        self.min_scale = min_scale
+        self.max_scale = max_scale
+
+    def set_target_fps(self, target_fps):
+        self.target_frame_time = 1.0 / target_fps
+
+    def next_scale(self, scale, frame_time):
+        if frame_time <= 0.0:
+            return scale
+        ratio = self.target_frame_time / frame_time
+        # Ignore small deviations to avoid resizing the render target every frame
+        if 0.8 < ratio < 1.25 or (ratio > 1.0 and scale >= self.max_scale):
+            return scale
+        new_scale = scale * min(max(math.sqrt(ratio), 0.5), 1.25)
+        new_scale = min(max(new_scale, self.min_scale), self.max_scale)
+        # Round to limit the number of distinct render target sizes
+        return round(new_scale * 20.0) / 20.0
@@ -0,0 +1,1083 @@
+import time
+import numpy as np
+from OpenGL import GL as gl
+from queue import Empty
+
+from .camera import Camera
+from .colormap import Colormap
+from .texture import Texture, texture_cache
+from .projection import batch_mvp
+from .frame_scheduler import RedrawQueue
+from .vertex_stream import VertexStream
+from .draw_commands import (
+    POOLED_PREFAB_EVENTS,
+    STRUCTURAL_EVENTS,
+    compile_draw_commands,
+)
+from ..remote.shared_feed import SharedFeedReader
+
+from ..mesh import (
+    AnimationClip,
+    BlendShapes,
+    Skin,
+    MeshGroup,
+    InstanceTable,
+    SceneGraph,
+    SlotAllocator,
+    SlotMap,
+    GpuMemoryManager,
+    GeometryPools,
+    GlState,
+    GlMeshCoreId,
+    GlMeshPrefabId,
+    GlMeshInstanceId,
+    handle_indices,
+)
+from ..mesh.pool import POOL_SLOT_LOCATION
+from ..mesh.encoding import rgba_colors
+
+
+class ViewerScene:
+    # Camera, lights and meshes drawn by a ViewerWidget. The viewports of a MultiViewportWidget
+    # only have their own view, camera and lights, and share the meshes of their widget.
+    # Subclasses provide request_redraw and the shader programs of their GL context.
+    def init_scene(self, size):
+        self.init_view(size)
+
+        # Mesh attributes
+        # Meshes, prefabs and instances are referenced by integer handles allocated in slot maps.
+        self.mesh_groups = SlotMap()
+        self.mesh_prefab_handles = SlotAllocator()
+        self.mesh_instances = InstanceTable()
+        self.scene_graph = SceneGraph()
+        self.memory_manager = GpuMemoryManager()
+        self.gpu_resident = False
+        self.vertex_streams = {}
+        self.shared_feeds = {}
+        self.animation_time = None
+        self.geometry_pools = GeometryPools()
+        # Next instance layer of each geometry pool in the current frame
+        self.pool_layers = {}
+        self.gl_state = GlState()
+        self.texture_cache = texture_cache
+
+        # Event queue, adding an event requests a redraw
+        self.mesh_events = RedrawQueue(self.request_redraw)
+
+    def init_view(self, size):
+        # Global viewer attributes
+        self.camera = Camera(size)
+
+        self.global_uniforms = {}
+        self.global_uniforms["lightDirection"] = np.array(
+            [0.0, 0.0, 1.0], dtype=np.float32
+        )
+        self.global_uniforms["lightDirection"] /= np.linalg.norm(
+            self.global_uniforms["lightDirection"]
+        )
+        self.global_uniforms["lightIntensity"] = np.array(
+            [0.95, 0.95, 0.95], dtype=np.float32
+        )
+        self.global_uniforms["ambientLighting"] = np.array(
+            [0.05, 0.05, 0.05], dtype=np.float32
+        )
+        self.global_uniforms["cameraPosition"] = self.camera.get_position()
+        self.global_uniforms["linkLight"] = False
+        # Height of the viewport in pixels, set for each draw. Point sprites with a world size are scaled by it
+        self.global_uniforms["viewportHeight"] = np.ones(1, dtype=np.float32)
+
+        self.line_width = 1
+        self.point_size = 3
+        self.draw_wireframe = True
+        self.draw_commands = None
+        self.pooled_draw_commands = []
+
+    def instance_mask(self, mesh_instances):
+        # Instance table indices drawn by this view, None draws all the visible instances.
+        return None
+
+    def invalidate_draw_commands(self):
+        self.draw_commands = None
+
+    def bind_global_uniforms(self, shader, global_uniforms):
+        # Global uniforms are excluded from the prefab uniforms, their locations are known by the shader.
+        for key, value in global_uniforms.items():
+            location = shader.builtin_uniforms.get(key, -1)
+            if location != -1:
+                if type(value) is bool:
+                    shader.set_uniform(gl.glUniform1i, location, value)
+                if hasattr(value, "shape"):
+                    shape = value.shape
+                    if len(shape) == 1:
+                        if shape[0] == 1:
+                            shader.set_uniform(gl.glUniform1fv, location, 1, value)
+                        if shape[0] == 2:
+                            shader.set_uniform(gl.glUniform2fv, location, 1, value)
+                        if shape[0] == 3:
+                            shader.set_uniform(gl.glUniform3fv, location, 1, value)
+                        if shape[0] == 4:
+                            shader.set_uniform(gl.glUniform4fv, location, 1, value)
+
+                    if len(shape) == 2:
+                        if shape[0] == shape[1] and shape[0] == 2:
+                            shader.set_uniform(
+                                gl.glUniformMatrix2fv, location, 1, gl.GL_FALSE, value
+                            )
+                        if shape[0] == shape[1] and shape[0] == 3:
+                            shader.set_uniform(
+                                gl.glUniformMatrix3fv, location, 1, gl.GL_FALSE, value
+                            )
+                        if shape[0] == shape[1] and shape[0] == 4:
+                            shader.set_uniform(
+                                gl.glUniformMatrix4fv, location, 1, gl.GL_TRUE, value
+                            )
+
+    def draw_scene(self, quality, line_width, viewport_height):
+        self.update_scene()
+        self.draw_view(self, quality, line_width, viewport_height)
+        self.finish_frame()
+
+    def update_scene(self):
+        # Called once per frame before drawing the views.
+        # Buffers may have been deleted or evicted since the last draw
+        self.gl_state.reset_bindings()
+        self.consume_vertex_streams()
+        self.consume_shared_feeds()
+        self.advance_animation_clips()
+
+        updated_nodes = self.scene_graph.update()
+        if updated_nodes is not None:
+            self.mesh_instances.apply_scene_graph(self.scene_graph, updated_nodes)
+        self.pool_layers = {}
+
+    def draw_view(self, view, quality, line_width, viewport_height):
+        # Draws the meshes of this scene with the camera, lights and instances of view.
+        global_uniforms = view.global_uniforms
+        global_uniforms["view"] = view.camera.get_view_matrix()
+        global_uniforms["projection"] = view.camera.get_projection_matrix()
+        global_uniforms["cameraPosition"] = view.camera.get_position()
+        global_uniforms["viewportHeight"][0] = viewport_height
+        view_projection = global_uniforms["projection"] @ global_uniforms["view"]
+
+        # All the model-view-projection matrices are computed in a single batch.
+        # Matrices are row-major float32 and uploaded with transpose=GL_TRUE.
+        all_model_matrices = self.mesh_instances.model_matrices
+        all_mvp_matrices = batch_mvp(view_projection, all_model_matrices)
+
+        # The draw commands are only compiled again after mesh events
+        if view.draw_commands is None:
+            view.draw_commands, view.pooled_draw_commands = compile_draw_commands(
+                self.mesh_groups, view.instance_mask(self.mesh_instances)
+            )
+        draw_wireframes = view.draw_wireframe and quality.wireframes()
+
+        for command in view.draw_commands:
+            if command.wireframe and not draw_wireframes:
+                continue
+            core = command.core
+            prefab = command.prefab
+            shader = command.shader
+            self.set_polygon_mode(command.fill, line_width)
+            self.gl_state.use_program(shader.program)
+            self.gl_state.set_program_point_size(shader.program_point_size)
+            self.bind_global_uniforms(shader, global_uniforms)
+
+            # Bind prefab uniforms once for all the instances
+            core.bind_uniforms(shader)
+            prefab.bind_uniforms()
+
+            model_matrices = all_model_matrices[command.instance_indices]
+            mvp_matrices = all_mvp_matrices[command.instance_indices]
+
+            # Mesh buffers are bound once per chunk for all the instances that can see it
+            if command.number_chunks > 1:
+                visible_chunks = core.visible_chunks(mvp_matrices)
+            else:
+                visible_chunks = None
+            for chunk in range(command.number_chunks):
+                if visible_chunks is not None:
+                    chunk_instances = np.flatnonzero(visible_chunks[:, chunk])
+                    if chunk_instances.shape[0] == 0:
+                        continue
+                else:
+                    chunk_instances = range(mvp_matrices.shape[0])
+                core.bind_buffers(
+                    self.gl_state, bind_positions=command.bind_positions, chunk=chunk
+                )
+                prefab.bind_vertex_attributes(self.gl_state, chunk)
+                for instance in chunk_instances:
+                    gl.glUniformMatrix4fv(
+                        command.model_location, 1, gl.GL_TRUE, model_matrices[instance]
+                    )
+                    gl.glUniformMatrix4fv(
+                        command.mvp_location, 1, gl.GL_TRUE, mvp_matrices[instance]
+                    )
+
+                    # Draw mesh
+                    core.draw(chunk)
+            self.memory_manager.mark_drawn(command.group, prefab)
+        self.draw_pooled_commands(
+            view, draw_wireframes, all_model_matrices, all_mvp_matrices, line_width
+        )
+
+    def finish_frame(self):
+        self.memory_manager.end_frame(self.mesh_groups)
+
+        # Large textures are uploaded over several frames
+        if self.texture_cache.streaming():
+            self.request_redraw()
+
+    def set_polygon_mode(self, fill, line_width):
+        if fill:
+            self.gl_state.set_polygon_mode(gl.GL_FILL)
+            self.gl_state.set_line_width(1)
+        else:
+            self.gl_state.set_polygon_mode(gl.GL_LINE)
+            self.gl_state.set_line_width(line_width)
+
+    def draw_pooled_commands(
+        self, view, draw_wireframes, all_model_matrices, all_mvp_matrices, line_width
+    ):
+        commands = [
+            command
+            for command in view.pooled_draw_commands
+            if draw_wireframes or not command.wireframe
+        ]
+        # The layers of all the commands and views drawing from a pool share its matrix buffer,
+        # which is uploaded once before the draws of each view
+        pool_layers = self.pool_layers
+        command_layers = []
+        for command in commands:
+            layers = []
+            for pool_ranges, instances in command.layers:
+                layer = pool_layers.get(command.pool, 0)
+                pool_layers[command.pool] = layer + 1
+                command.pool.write_matrices(
+                    layer,
+                    pool_ranges,
+                    all_mvp_matrices[instances],
+                    all_model_matrices[instances],
+                )
+                layers.append((layer, pool_ranges))
+            command_layers.append(layers)
+        for command in commands:
+            command.pool.upload_matrices()
+
+        for command, layers in zip(commands, command_layers):
+            shader = command.shader
+            self.set_polygon_mode(command.fill, line_width)
+            self.gl_state.use_program(shader.program)
+            self.gl_state.set_program_point_size(shader.program_point_size)
+            self.bind_global_uniforms(shader, view.global_uniforms)
+            command.core.bind_uniforms(shader)
+            command.prefab.bind_uniforms()
+            command.core.bind_buffers(self.gl_state, bind_positions=False)
+            command.pool.bind(self.gl_state, command.attribute_locations)
+            for layer, pool_ranges in layers:
+                command.pool.multi_draw(
+                    command.drawing_mode, layer, pool_ranges, shader
+                )
+            self.gl_state.disable_attribute(POOL_SLOT_LOCATION)
+            for group, _, prefab, _ in command.draws:
+                self.memory_manager.mark_drawn(group, prefab)
+
+    #################################################################################################
+    # Mesh adding, updating and removing
+
+    def process_mesh_events(self):
+        while True:
+            try:
+                event = self.mesh_events.get(block=False)
+                event_type = event[0]
+                if event_type in STRUCTURAL_EVENTS or (
+                    event_type in POOLED_PREFAB_EVENTS and self.prefab_pooled(event[1])
+                ):
+                    self.invalidate_draw_commands()
+                self.invalidate_event_group(event)
+                mesh_function = getattr(self, event_type + "_")
+                mesh_function(*event[1:])
+            except Empty:
+                return
+
+    def invalidate_event_group(self, event):
+        # The buffers of the group of the event are measured again at its next draw
+        if len(event) > 1 and hasattr(event[1], "core_id"):
+            if event[1].core_id in self.mesh_groups:
+                self.memory_manager.invalidate_group(self.mesh_groups[event[1].core_id])
+
+    def prefab_pooled(self, prefab_id):
+        group = self.get_mesh(prefab_id)
+        return (
+            group.mesh_core.pool_range is not None
+            and group.get_prefab(prefab_id).poolable()
+        )
+
+    def add_mesh_(
+        self,
+        core_id,
+        vertices,
+        faces,
+        normals=None,
+        precision="full",
+        gpu_resident=False,
+        chunk_size=None,
+        pooled=False,
+    ):
+        # The mesh buffers can keep a reference to these arrays, so the viewer copies them
+        # instead of sharing memory with the caller
+        vertices = np.array(vertices, dtype=np.float32)
+        if faces is not None:
+            faces = np.array(faces, dtype=np.int32)
+        self.mesh_groups.insert(
+            core_id.core_id,
+            MeshGroup(
+                vertices,
+                faces,
+                normals,
+                precision,
+                gpu_resident,
+                self.mesh_instances,
+                chunk_size,
+                self.geometry_pools if pooled else None,
+            ),
+        )
+
+    def add_mesh(
+        self,
+        vertices,
+        faces,
+        normals=None,
+        precision="full",
+        gpu_resident=None,
+        chunk_size=None,
+        pooled=False,
+    ):
+        # normals can be 'face' or 'vertex' to let the viewer compute and refresh the 'normal' attribute.
+        # precision can be 'half' or 'int16' to store the positions relative to the mesh bounding box.
+        # gpu_resident drops the host copies of the mesh buffers once uploaded, it defaults to the widget setting.
+        # chunk_size splits triangle and point meshes into buffers of that many faces, which are culled
+        # and updated separately. Large meshes are chunked by default, 0 keeps a single buffer.
+        # faces can be None for a point cloud drawing each vertex once.
+        # pooled stores a small full precision mesh in a shared geometry pool, compatible pooled meshes
+        # are then drawn together with glMultiDrawArrays.
+        if normals is not None and (
+            normals not in ("face", "vertex") or faces is None or faces.shape[1] != 3
+        ):
+            raise ValueError(f"Cannot compute {normals} normals for this mesh")
+        if precision not in ("full", "half", "int16"):
+            raise ValueError(f"Unknown position precision {precision}")
+        core_id = GlMeshCoreId(self.mesh_groups.allocate_one())
+        if gpu_resident is None:
+            gpu_resident = self.gpu_resident
+        self.mesh_events.put(
+            [
+                "add_mesh",
+                core_id,
+                vertices,
+                faces,
+                normals,
+                precision,
+                gpu_resident,
+                chunk_size,
+                pooled,
+            ]
+        )
+        return core_id
+
+    def get_mesh(self, mesh_id):
+        return self.mesh_groups[mesh_id.core_id]
+
+    def get_mesh_prefab(self, prefab_id):
+        return self.get_mesh(prefab_id).get_prefab(prefab_id)
+
+    def get_mesh_instance(self, instance_id):
+        return self.get_mesh(instance_id).get_instance(instance_id)
+
+    def add_mesh_prefab_(
+        self,
+        prefab_id,
+        shader="default",
+        vertex_attributes={},
+        face_attributes={},
+        uniforms={},
+        fill=True,
+        copy_from=None,
+        precision="full",
+        interleaved=False,
+    ):
+        if shader in self.shaders:
+            try:
+                if copy_from is not None:
+                    copy_from = self.get_mesh_prefab(copy_from)
+                self.get_mesh(prefab_id).add_prefab(
+                    prefab_id,
+                    vertex_attributes,
+                    face_attributes,
+                    uniforms,
+                    self.shaders[shader],
+                    fill=fill,
+                    copy_from=copy_from,
+                    precision=precision,
+                    interleaved=interleaved,
+                )
+            except ValueError as err:
+                print(err)
+                self.get_mesh(prefab_id).add_prefab(
+                    prefab_id,
+                    vertex_attributes,
+                    face_attributes,
+                    uniforms,
+                    self.shaders["default"],
+                    fill=fill,
+                    copy_from=copy_from,
+                    precision=precision,
+                    interleaved=interleaved,
+                )
+
+    def add_mesh_prefab(
+        self,
+        core_id,
+        shader="default",
+        vertex_attributes={},
+        face_attributes={},
+        uniforms={},
+        fill=True,
+        copy_from=None,
+        precision="full",
+        interleaved=False,
+    ):
+        # precision can be 'compact' to store normals as octahedral int16 pairs and colors as uint8.
+        # interleaved packs the mesh positions and all the prefab attributes into a single vertex buffer.
+        prefab_id = GlMeshPrefabId(core_id, self.mesh_prefab_handles.allocate_one())
+        self.mesh_events.put(
+            [
+                "add_mesh_prefab",
+                prefab_id,
+                shader,
+                vertex_attributes,
+                face_attributes,
+                uniforms,
+                fill,
+                copy_from,
+                precision,
+                interleaved,
+            ]
+        )
+        return prefab_id
+
+    def add_mesh_instance_(self, instance_id, model_matrix):
+        self.get_mesh(instance_id).add_instance(instance_id, model_matrix)
+
+    def add_mesh_instance(self, prefab_id, model_matrix):
+        instance_id = GlMeshInstanceId(prefab_id, self.mesh_instances.allocate_one())
+        self.mesh_events.put(["add_mesh_instance", instance_id, model_matrix])
+        return instance_id
+
+    def add_mesh_instances_(self, prefab_id, handles, model_matrices):
+        self.get_mesh(prefab_id).add_instances(prefab_id, handles, model_matrices)
+
+    def add_mesh_instances(self, prefab_id, model_matrices):
+        # Batch version of add_mesh_instance, returns an array of instance handles.
+        handles = self.mesh_instances.allocate(model_matrices.shape[0])
+        self.mesh_events.put(["add_mesh_instances", prefab_id, handles, model_matrices])
+        return handles
+
+    def update_mesh_vertices_(self, core_id, vertices):
+        self.get_mesh(core_id).update_vertices(vertices.astype(np.float32))
+
+    def update_mesh_vertices(self, core_id, vertices):
+        self.mesh_events.put(["update_mesh_vertices", core_id, vertices])
+
+    def update_mesh_prefab_uniform_(self, prefab_id, name, value):
+        self.get_mesh(prefab_id).get_prefab(prefab_id).update_uniform(name, value)
+
+    def update_mesh_prefab_uniform(self, prefab_id, name, value):
+        self.mesh_events.put(["update_mesh_prefab_uniform", prefab_id, name, value])
+
+    def update_mesh_prefab_vertex_attribute_(self, prefab_id, name, value):
+        self.get_mesh(prefab_id).update_prefab_vertex_attribute(prefab_id, name, value)
+
+    def update_mesh_prefab_vertex_attribute(self, prefab_id, name, value):
+        self.mesh_events.put(
+            ["update_mesh_prefab_vertex_attribute", prefab_id, name, value]
+        )
+
+    def update_mesh_prefab_face_attribute_(self, prefab_id, name, value):
+        self.get_mesh(prefab_id).update_prefab_face_attribute(prefab_id, name, value)
+
+    def update_mesh_prefab_face_attribute(self, prefab_id, name, value):
+        self.mesh_events.put(
+            ["update_mesh_prefab_face_attribute", prefab_id, name, value]
+        )
+
+    def update_mesh_instance_model_(self, instance_id, model):
+        self.get_mesh(instance_id).get_instance(instance_id).set_model_matrix(model)
+
+    def update_mesh_instance_model(self, instance_id, model):
+        self.mesh_events.put(["update_mesh_instance_model", instance_id, model])
+
+    def update_mesh_instance_models_(self, handles, models):
+        self.mesh_instances.set_model_matrices(
+            self.mesh_instances.indices(handles), models
+        )
+
+    def update_mesh_instance_models(self, handles, models):
+        self.mesh_events.put(["update_mesh_instance_models", handles, models])
+
+    def set_mesh_instances_visibility_(self, handles, visibility):
+        self.mesh_instances.visibility[self.mesh_instances.indices(handles)] = (
+            visibility
+        )
+
+    def set_mesh_instances_visibility(self, handles, visibility):
+        self.mesh_events.put(["set_mesh_instances_visibility", handles, visibility])
+
+    def set_mesh_instance_visibility_(self, instance_id, visibility):
+        self.get_mesh(instance_id).get_instance(instance_id).set_visibility(visibility)
+
+    def set_mesh_instance_visibility(self, instance_id, visibility):
+        self.mesh_events.put(["set_mesh_instance_visibility", instance_id, visibility])
+
+    def update_mesh_prefab_scalar_field_(self, prefab_id, values):
+        values = values.astype(np.float32).reshape((-1, 1))
+        mesh = self.get_mesh(prefab_id)
+        if values.shape[0] == mesh.number_vertices():
+            mesh.update_prefab_vertex_attribute(prefab_id, "scalar", values)
+        else:
+            mesh.update_prefab_face_attribute(prefab_id, "scalar", values)
+
+    def update_mesh_prefab_scalar_field(self, prefab_id, values):
+        self.mesh_events.put(["update_mesh_prefab_scalar_field", prefab_id, values])
+
+    def set_mesh_prefab_colormap_(self, prefab_id, colormap):
+        self.get_mesh_prefab(prefab_id).uniform_values["colormap"].set_colors(colormap)
+
+    def set_mesh_prefab_colormap(self, prefab_id, colormap):
+        self.mesh_events.put(["set_mesh_prefab_colormap", prefab_id, colormap])
+
+    def set_mesh_prefab_colormap_range(self, prefab_id, min_value, max_value):
+        self.update_mesh_prefab_uniform(
+            prefab_id, "scalarMin", np.array([min_value], dtype=np.float32)
+        )
+        self.update_mesh_prefab_uniform(
+            prefab_id, "scalarMax", np.array([max_value], dtype=np.float32)
+        )
+
+    def load_texture(self, image):
+        # image is a file path, an array of pixels or a texture loaded by another widget. The texture can
+        # be used as a sampler2D uniform value of any prefab, it is decoded in the background.
+        if isinstance(image, Texture):
+            texture = image
+        else:
+            texture = self.texture_cache.load(image)
+        texture.future.add_done_callback(lambda future: self.request_redraw())
+        return texture
+
+    def get_mesh_instance_visibility(self, instance_id):
+        return self.get_mesh(instance_id).get_instance(instance_id).get_visibility()
+
+    def remove_mesh_(self, core_id):
+        group = self.mesh_groups.pop(core_id.core_id)
+        self.vertex_streams.pop(core_id.core_id, None)
+        self.remove_shared_feed_(core_id)
+        self.mesh_prefab_handles.release(
+            handle_indices(list(group.mesh_prefabs.keys()))
+        )
+        self.memory_manager.forget_group(group)
+        group.delete()
+
+    def remove_mesh(self, core_id):
+        self.mesh_events.put(["remove_mesh", core_id])
+
+    def remove_mesh_prefab_(self, prefab_id):
+        self.memory_manager.forget(self.get_mesh_prefab(prefab_id))
+        self.get_mesh(prefab_id).remove_prefab(prefab_id)
+        self.mesh_prefab_handles.release(handle_indices([prefab_id.prefab_id]))
+
+    def remove_mesh_prefab(self, prefab_id):
+        self.mesh_events.put(["remove_mesh_prefab", prefab_id])
+
+    def remove_mesh_instance_(self, instance_id):
+        self.get_mesh(instance_id).remove_instance(instance_id)
+
+    def remove_mesh_instance(self, instance_id):
+        self.mesh_events.put(["remove_mesh_instance", instance_id])
+
+    def remove_mesh_instances_(self, handles):
+        self.mesh_instances.remove(handles)
+
+    def remove_mesh_instances(self, handles):
+        self.mesh_events.put(["remove_mesh_instances", handles])
+
+    def add_vertex_stream_(self, core_id, stream):
+        self.vertex_streams[core_id.core_id] = stream
+
+    def add_vertex_stream(self, core_id, number_vertices):
+        # Returns a VertexStream, a zero-copy alternative to update_mesh_vertices for producer threads.
+        stream = VertexStream(number_vertices, self.request_redraw)
+        self.mesh_events.put(["add_vertex_stream", core_id, stream])
+        return stream
+
+    def remove_vertex_stream_(self, core_id):
+        self.vertex_streams.pop(core_id.core_id, None)
+
+    def remove_vertex_stream(self, core_id):
+        self.mesh_events.put(["remove_vertex_stream", core_id])
+
+    def consume_vertex_streams(self):
+        for core_handle, stream in self.vertex_streams.items():
+            vertices = stream.consume()
+            if vertices is not None:
+                group = self.mesh_groups[core_handle]
+                self.memory_manager.invalidate_group(group)
+                group.update_vertices(vertices)
+
+    def add_shared_feed_(self, core_id, reader, attributes):
+        if len(self.shared_feeds) == 0:
+            self.main_window.frame_scheduler.add_poller(self.poll_shared_feeds)
+        self.shared_feeds[core_id.core_id] = (reader, attributes)
+
+    def add_shared_feed(self, core_id, name=None, path=None, attributes={}):
+        # Attaches the mesh to the frames written by a SharedFeedWriter in another process, through a
+        # shared memory block name or a memory-mapped file path. The 'position' field updates the mesh
+        # vertices, attributes maps other fields to the prefab whose vertex attribute of the same name they update.
+        reader = SharedFeedReader(name=name, path=path)
+        field_names = [field["name"] for field in reader.layout]
+        for field_name in attributes:
+            if field_name not in field_names:
+                reader.close()
+                raise ValueError(f"The shared feed has no field {field_name}")
+        if (
+            "position" in reader.values
+            and reader.values["position"].dtype != np.float32
+        ):
+            reader.close()
+            raise ValueError("The positions of a shared feed must be float32")
+        self.mesh_events.put(["add_shared_feed", core_id, reader, attributes])
+        return reader
+
+    def remove_shared_feed_(self, core_id):
+        reader, attributes = self.shared_feeds.pop(core_id.core_id, (None, None))
+        if reader is None:
+            return
+        reader.close()
+        if len(self.shared_feeds) == 0:
+            self.main_window.frame_scheduler.remove_poller(self.poll_shared_feeds)
+
+    def remove_shared_feed(self, core_id):
+        self.mesh_events.put(["remove_shared_feed", core_id])
+
+    def poll_shared_feeds(self):
+        for reader, attributes in self.shared_feeds.values():
+            if reader.has_new_frame():
+                self.request_redraw()
+                return
+
+    def consume_shared_feeds(self):
+        for core_handle, (reader, attributes) in self.shared_feeds.items():
+            values = reader.read()
+            if values is None:
+                continue
+            group = self.mesh_groups[core_handle]
+            self.memory_manager.invalidate_group(group)
+            if "position" in values:
+                group.update_vertices(values["position"])
+            for field_name, prefab_id in attributes.items():
+                group.update_prefab_vertex_attribute(
+                    prefab_id, field_name, values[field_name]
+                )
+
+    def add_animation_clip_(self, core_id, animation_clip):
+        try:
+            self.get_mesh(core_id).mesh_core.set_animation_clip(animation_clip)
+        except ValueError as err:
+            print(err)
+
+    def add_animation_clip(
+        self, core_id, frames, frame_rate=30.0, loop=True, interpolate=True, play=True
+    ):
+        # Uploads the (T, N, 3) vertex positions of all the frames once, playback then only
+        # changes uniforms. Positions are interpolated between frames unless interpolate is False.
+        animation_clip = AnimationClip(frames, frame_rate, loop, interpolate)
+        if play:
+            animation_clip.play()
+        self.mesh_events.put(["add_animation_clip", core_id, animation_clip])
+
+    def remove_animation_clip_(self, core_id):
+        self.get_mesh(core_id).mesh_core.remove_animation_clip()
+
+    def remove_animation_clip(self, core_id):
+        self.mesh_events.put(["remove_animation_clip", core_id])
+
+    def play_animation_(self, core_id, playing):
+        animation_clip = self.get_mesh(core_id).mesh_core.animation_clip
+        if animation_clip is not None:
+            if playing:
+                animation_clip.play()
+            else:
+                animation_clip.pause()
+
+    def play_animation(self, core_id):
+        self.mesh_events.put(["play_animation", core_id, True])
+
+    def pause_animation(self, core_id):
+        self.mesh_events.put(["play_animation", core_id, False])
+
+    def seek_animation_(self, core_id, frame):
+        animation_clip = self.get_mesh(core_id).mesh_core.animation_clip
+        if animation_clip is not None:
+            animation_clip.seek(frame)
+
+    def seek_animation(self, core_id, frame):
+        # frame is fractional, positions are interpolated between the two closest frames.
+        self.mesh_events.put(["seek_animation", core_id, frame])
+
+    def add_blend_shapes_(self, core_id, blend_shapes):
+        try:
+            self.get_mesh(core_id).mesh_core.set_blend_shapes(blend_shapes)
+        except ValueError as err:
+            print(err)
+
+    def add_blend_shapes(self, core_id, deltas, weights=None):
+        # Uploads the (K, N, 3) position deltas of K targets once, they are added to the mesh
+        # positions in the vertex shader according to the weights.
+        blend_shapes = BlendShapes(deltas, weights)
+        self.mesh_events.put(["add_blend_shapes", core_id, blend_shapes])
+
+    def set_blend_shape_weights_(self, core_id, weights):
+        blend_shapes = self.get_mesh(core_id).mesh_core.blend_shapes
+        if blend_shapes is not None:
+            try:
+                blend_shapes.set_weights(weights)
+            except ValueError as err:
+                print(err)
+
+    def set_blend_shape_weights(self, core_id, weights):
+        self.mesh_events.put(["set_blend_shape_weights", core_id, weights])
+
+    def remove_blend_shapes_(self, core_id):
+        self.get_mesh(core_id).mesh_core.remove_blend_shapes()
+
+    def remove_blend_shapes(self, core_id):
+        self.mesh_events.put(["remove_blend_shapes", core_id])
+
+    def add_skin_(self, core_id, skin):
+        try:
+            self.get_mesh(core_id).mesh_core.set_skin(skin)
+        except ValueError as err:
+            print(err)
+
+    def add_skin(self, core_id, bone_indices, bone_weights, bone_matrices):
+        # Linear blend skinning of the mesh in the vertex shader. bone_indices and bone_weights
+        # are (N, J) arrays, only the four largest weights of each vertex are kept.
+        # bone_matrices are (B, 4, 4) row-major transforms from the rest pose.
+        skin = Skin(bone_indices, bone_weights, bone_matrices)
+        self.mesh_events.put(["add_skin", core_id, skin])
+
+    def set_bone_matrices_(self, core_id, bone_matrices):
+        skin = self.get_mesh(core_id).mesh_core.skin
+        if skin is not None:
+            try:
+                skin.set_bone_matrices(bone_matrices)
+            except ValueError as err:
+                print(err)
+
+    def set_bone_matrices(self, core_id, bone_matrices):
+        self.mesh_events.put(["set_bone_matrices", core_id, bone_matrices])
+
+    def remove_skin_(self, core_id):
+        self.get_mesh(core_id).mesh_core.remove_skin()
+
+    def remove_skin(self, core_id):
+        self.mesh_events.put(["remove_skin", core_id])
+
+    def advance_animation_clips(self):
+        animation_clips = [
+            group.mesh_core.animation_clip
+            for group in self.mesh_groups.values()
+            if group.mesh_core.animation_clip is not None
+            and group.mesh_core.animation_clip.playing
+        ]
+        if len(animation_clips) == 0:
+            self.animation_time = None
+            return
+        current_time = time.perf_counter()
+        if self.animation_time is not None:
+            for animation_clip in animation_clips:
+                animation_clip.advance(current_time - self.animation_time)
+        self.animation_time = current_time
+        # Playing clips keep redrawing, at the rate allowed by the frame scheduler.
+        self.request_redraw()
+
+    def clear_all_(self):
+        for group in self.mesh_groups.values():
+            self.mesh_prefab_handles.release(
+                handle_indices(list(group.mesh_prefabs.keys()))
+            )
+            group.delete()
+        self.mesh_groups.clear()
+        self.memory_manager.clear()
+        self.vertex_streams.clear()
+        for core_handle in list(self.shared_feeds.keys()):
+            self.remove_shared_feed_(GlMeshCoreId(core_handle))
+
+    def clear_all(self):
+        self.mesh_events.put(["clear_all"])
+
+    def delete_scene(self):
+        # Frees the GL objects of the scene, its GL context must be current.
+        self.clear_all_()
+        self.geometry_pools.delete()
+
+    #################################################################################################
+
+    #################################################################################################
+    # Scene graph
+
+    def add_scene_node_(self, node, local_matrix, parent):
+        self.scene_graph.insert(node, local_matrix, parent)
+
+    def add_scene_node(self, local_matrix=None, parent=None):
+        # Returns the handle of a new node, whose world matrix is parent world matrix * local matrix.
+        node = self.scene_graph.allocate_one()
+        self.mesh_events.put(["add_scene_node", node, local_matrix, parent])
+        return node
+
+    def set_scene_node_transform_(self, node, local_matrix):
+        self.scene_graph.set_local_matrices(node, local_matrix)
+
+    def set_scene_node_transform(self, node, local_matrix):
+        self.mesh_events.put(["set_scene_node_transform", node, local_matrix])
+
+    def get_scene_node_world_matrix(self, node):
+        return self.scene_graph.get_world_matrix(node)
+
+    def remove_scene_node_(self, node):
+        removed_nodes = self.scene_graph.remove(node)
+        self.mesh_instances.detach_nodes(removed_nodes)
+
+    def remove_scene_node(self, node):
+        self.mesh_events.put(["remove_scene_node", node])
+
+    def attach_mesh_instances_(self, handles, node):
+        node_index = -1
+        if node is not None:
+            node_index = int(self.scene_graph.indices(node)[0])
+            self.scene_graph.mark_dirty(node_index)
+        self.mesh_instances.attach(handles, node_index)
+
+    def attach_mesh_instances(self, handles, node):
+        # Attached instances follow the world matrix of the node, a None node detaches them.
+        self.mesh_events.put(["attach_mesh_instances", handles, node])
+
+    def attach_mesh_instance(self, instance_id, node):
+        self.attach_mesh_instances([instance_id.instance_id], node)
+
+    #################################################################################################
+
+    #################################################################################################
+    # General viewer settings
+
+    def set_directional_light(self, direction, intensity):
+        direction = np.asarray(direction, dtype=np.float32)
+        self.global_uniforms["lightDirection"] = direction / np.linalg.norm(direction)
+        self.global_uniforms["lightIntensity"] = np.asarray(intensity, dtype=np.float32)
+        self.request_redraw()
+
+    def set_ambient_light(self, intensity):
+        self.global_uniforms["ambientLighting"] = np.asarray(
+            intensity, dtype=np.float32
+        )
+        self.request_redraw()
+
+    def link_light_to_camera(self, link=True):
+        self.global_uniforms["linkLight"] = link
+        self.request_redraw()
+
+    def set_memory_budget(self, budget):
+        # Budget in bytes for the GPU buffers of this widget, None disables eviction.
+        self.memory_manager.set_budget(budget)
+
+    def set_gpu_resident(self, gpu_resident=True):
+        # Default for the meshes added afterwards, see add_mesh.
+        self.gpu_resident = gpu_resident
+
+    def memory_report(self):
+        return self.memory_manager.report(self.mesh_groups)
+
+    def toggle_wireframe(self):
+        self.draw_wireframe = not self.draw_wireframe
+        self.request_redraw()
+
+    #################################################################################################
+
+    #################################################################################################
+
+    # Convenience functions
+
+    def display_point_cloud(
+        self,
+        points,
+        shader=None,
+        uniforms={},
+        vertex_attributes={},
+        face_attributes={},
+        colors=None,
+        color=np.array([0.8, 0.2, 0.2, 1.0]),
+        point_size=None,
+        perspective=False,
+        round_points=False,
+    ):
+        # Points are drawn as sprites, without index buffer. colors are given per point as floats, uint8
+        # or RGBA packed in uint32, otherwise all the points share a uniform color and no color buffer.
+        # A vertexColor attribute is used as the point colors.
+        # point_size is in pixels, or a diameter in world units with perspective.
+        # A custom shader is given the colors, or the tiled uniform color, as its vertexColor attribute.
+        uniforms = dict(uniforms)
+        vertex_attributes = dict(vertex_attributes)
+        if colors is None and "vertexColor" in vertex_attributes:
+            colors = vertex_attributes.pop("vertexColor")
+        if shader is not None:
+            if colors is not None:
+                # Float colors are kept as is, integer colors are normalized uint8
+                if not np.issubdtype(np.asarray(colors).dtype, np.floating):
+                    colors = rgba_colors(colors)
+                vertex_attributes["vertexColor"] = colors
+            else:
+                vertex_attributes["vertexColor"] = np.tile(
+                    np.asarray(color, dtype=np.float32)[:3], (points.shape[0], 1)
+                )
+        else:
+            if colors is None:
+                shader = "points"
+                uniforms["pointColor"] = np.ones(4, dtype=np.float32)
+                uniforms["pointColor"][: len(color)] = color
+            else:
+                shader = "colored_points"
+                vertex_attributes["pointColor"] = rgba_colors(colors)
+            if point_size is None:
+                if perspective:
+                    point_size = 0.002 * np.linalg.norm(np.ptp(points, axis=0))
+                else:
+                    point_size = self.point_size
+            uniforms["pointSize"] = np.array([point_size], dtype=np.float32)
+            uniforms["perspectivePoints"] = bool(perspective)
+            uniforms["roundPoints"] = bool(round_points)
+        mesh_id = self.add_mesh(points, None)
+        mesh_prefab_id = self.add_mesh_prefab(
+            mesh_id,
+            shader=shader,
+            vertex_attributes=vertex_attributes,
+            face_attributes=face_attributes,
+            uniforms=uniforms,
+        )
+        mesh_instance_id = self.add_mesh_instance(mesh_prefab_id, np.eye(4))
+        return mesh_instance_id
+
+    def display_mesh(self, vertices, faces, normals=None):
+        vertex_attributes = {}
+        face_attributes = {}
+        if normals is not None:
+            face_attributes["normal"] = normals
+        uniforms = {}
+        uniforms["albedo"] = np.array([0.8, 0.8, 0.8])
+        mesh_id = self.add_mesh(
+            vertices, faces, normals="face" if normals is None else None
+        )
+        mesh_prefab_id = self.add_mesh_prefab(
+            mesh_id,
+            shader="lambert",
+            vertex_attributes=vertex_attributes,
+            face_attributes=face_attributes,
+            uniforms=uniforms,
+        )
+        mesh_instance_id = self.add_mesh_instance(mesh_prefab_id, np.eye(4))
+        return mesh_instance_id
+
+    def display_scalar_field(
+        self, vertices, faces, values, colormap="viridis", value_range=None
+    ):
+        # Values are given either per vertex or per face, and mapped to colors on the GPU.
+        values = np.asarray(values, dtype=np.float32).reshape((-1, 1))
+        vertex_attributes = {}
+        face_attributes = {}
+        if values.shape[0] == vertices.shape[0]:
+            vertex_attributes["scalar"] = values
+        else:
+            face_attributes["scalar"] = values
+        if value_range is None:
+            value_range = (np.min(values), np.max(values))
+        uniforms = {}
+        uniforms["colormap"] = Colormap(colormap)
+        uniforms["scalarMin"] = np.array([value_range[0]], dtype=np.float32)
+        uniforms["scalarMax"] = np.array([value_range[1]], dtype=np.float32)
+        mesh_id = self.add_mesh(vertices, faces)
+        mesh_prefab_id = self.add_mesh_prefab(
+            mesh_id,
+            shader="colormap",
+            vertex_attributes=vertex_attributes,
+            face_attributes=face_attributes,
+            uniforms=uniforms,
+        )
+        mesh_instance_id = self.add_mesh_instance(mesh_prefab_id, np.eye(4))
+        return mesh_instance_id
+
+    def display_textured_mesh(self, vertices, faces, texture_coords, texture):
+        # texture_coords are given per vertex, texture is a file path, an array of pixels or a texture.
+        texture = self.load_texture(texture)
+        vertex_attributes = {}
+        vertex_attributes["textureCoords"] = np.asarray(
+            texture_coords, dtype=np.float32
+        )
+        uniforms = {}
+        uniforms["albedoTexture"] = texture
+        mesh_id = self.add_mesh(vertices, faces, normals="face")
+        mesh_prefab_id = self.add_mesh_prefab(
+            mesh_id,
+            shader="texture",
+            vertex_attributes=vertex_attributes,
+            uniforms=uniforms,
+        )
+        mesh_instance_id = self.add_mesh_instance(mesh_prefab_id, np.eye(4))
+        return mesh_instance_id
+
+    def display_quad_net(
+        self,
+        vertices,
+        faces,
+        shader="wireframe",
+        uniforms={"lineColor": np.array([0.8, 0.2, 0.2])},
+        vertex_attributes={},
+        face_attributes={},
+    ):
+        mesh_id = self.add_mesh(vertices, faces)
+        mesh_prefab_id = self.add_mesh_prefab(
+            mesh_id,
+            shader=shader,
+            vertex_attributes=vertex_attributes,
+            face_attributes=face_attributes,
+            uniforms=uniforms,
+        )
+        mesh_instance_id = self.add_mesh_instance(mesh_prefab_id, np.eye(4))
+        return mesh_instance_id
+
+    def add_wireframe(self, mesh_instance_id, line_color=np.array([0.0, 0.0, 0.0])):
+        # Returns the wireframe instance, drawn with the model matrix of mesh_instance_id.
+        uniforms = {}
+        uniforms["lineColor"] = line_color
+        wireframe_mesh_prefab_index = self.add_mesh_prefab(
+            mesh_instance_id, "wireframe", fill=False, uniforms=uniforms
+        )
+        wireframe_instance_index = GlMeshInstanceId(
+            wireframe_mesh_prefab_index, self.mesh_instances.allocate_one()
+        )
+        self.mesh_events.put(
+            ["add_wireframe", wireframe_instance_index, mesh_instance_id]
+        )
+        return wireframe_instance_index
+
+    def add_wireframe_(self, wireframe_instance_index, mesh_instance_id):
+        self.add_mesh_instance_(
+            wireframe_instance_index,
+            self.get_mesh_instance(mesh_instance_id).get_model_matrix().copy(),
+        )
@@ -1,7 +1,29 @@
+import os
 import ctypes
+import numpy as np
 import OpenGL.GL as gl
 from OpenGL.GL import shaders
 
+SAMPLER_TYPES = [
+    gl.GL_SAMPLER_1D,
+    gl.GL_SAMPLER_2D,
+    gl.GL_SAMPLER_3D,
+    gl.GL_SAMPLER_BUFFER,
+]
+
+
+def read_shader_source(path):
+    # Replaces the '#include "file"' lines with the file contents, relative to the shader folder.
+    lines = []
+    with open(path, "r") as shader_file:
+        for line in shader_file:
+            if line.startswith("#include"):
+                include_path = os.path.join(os.path.dirname(path), line.split('"')[1])
+                lines.append(read_shader_source(include_path))
+            else:
+                lines.append(line)
+    return "".join(lines)
+
 
 class ShaderProgram:
     def __init__(
@@ -13,17 +35,13 @@ class ShaderProgram:
         excluded_uniforms=[],
     ):
         self.name = name
-        with open(vertex_shader_path, "r") as vertex_file:
-            vertex_shader_text = vertex_file.read()
-            vertex_shader = shaders.compileShader(
-                vertex_shader_text, gl.GL_VERTEX_SHADER
-            )
-
-        with open(fragment_shader_path, "r") as fragment_file:
-            fragment_shader_text = fragment_file.read()
-            fragment_shader = shaders.compileShader(
-                fragment_shader_text, gl.GL_FRAGMENT_SHADER
-            )
+        vertex_source = read_shader_source(vertex_shader_path)
+        # Shaders setting their own point size are drawn with GL_PROGRAM_POINT_SIZE enabled
+        self.program_point_size = "gl_PointSize" in vertex_source
+        vertex_shader = shaders.compileShader(vertex_source, gl.GL_VERTEX_SHADER)
+        fragment_shader = shaders.compileShader(
+            read_shader_source(fragment_shader_path), gl.GL_FRAGMENT_SHADER
+        )
 
         self.program = shaders.compileProgram(vertex_shader, fragment_shader)
 
@@ -44,10 +62,41 @@ class ShaderProgram:
 
         count_uniforms = gl.glGetProgramiv(self.program, gl.GL_ACTIVE_UNIFORMS)
         self.uniforms = {}
+        self.builtin_uniforms = {}
+        self.samplers = set()
         for i in range(count_uniforms):
             name, size, type = gl.glGetActiveUniform(self.program, i)
             name = name.decode("utf-8")
+            # Uniform arrays are listed as "name[0]"
+            if name.endswith("[0]") and name[:-3] in excluded_uniforms:
+                name = name[:-3]
             if name in excluded_uniforms:
+                # Excluded uniforms are set by the viewer itself, only their location is kept.
+                self.builtin_uniforms[name] = gl.glGetUniformLocation(
+                    self.program, name
+                )
                 continue
             uniform_location = gl.glGetUniformLocation(self.program, name)
             self.uniforms[name] = uniform_location
+            if type in SAMPLER_TYPES:
+                self.samplers.add(name)
+
+        # Shadow of the uniform values of the program, identical values are not sent again.
+        self.uniform_cache = {}
+        # Prefab whose uniform values were set last
+        self.uniform_owner = None
+
+    def set_uniform(self, setter, location, *arguments):
+        if location == -1:
+            return
+        values = tuple(
+            argument.tobytes() if isinstance(argument, np.ndarray) else argument
+            for argument in arguments
+        )
+        if self.uniform_cache.get(location) == values:
+            return
+        setter(location, *arguments)
+        self.uniform_cache[location] = values
+
+    def set_builtin_uniform(self, setter, name, *arguments):
+        self.set_uniform(setter, self.builtin_uniforms.get(name, -1), *arguments)
@@ -0,0 +1,408 @@
+import ctypes
+import hashlib
+import os
+import threading
+import weakref
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+from OpenGL import GL as gl
+from PyQt5.QtGui import QImage, QOpenGLContext
+
+# Bytes copied to the pixel buffer of a texture each time it is bound, larger images are
+# streamed across several frames.
+STREAM_BYTES = 1 << 22
+
+
+def decode_image(data, name):
+    # Returns the RGBA pixels of an encoded image, bottom row first to match texture coordinates.
+    image = QImage.fromData(data)
+    if image.isNull():
+        raise ValueError(f"Cannot decode the image {name}")
+    image = image.convertToFormat(QImage.Format_RGBA8888).mirrored()
+    width = image.width()
+    height = image.height()
+    bits = image.constBits()
+    bits.setsize(height * image.bytesPerLine())
+    pixels = np.frombuffer(bits, dtype=np.uint8).reshape((height, image.bytesPerLine()))
+    return pixels[:, : 4 * width].reshape((height, width, 4)).copy()
+
+
+def image_pixels(pixels):
+    # Arrays have 1, 3 or 4 channels, bottom row first. Float values are in [0, 1].
+    pixels = np.asarray(pixels)
+    if np.issubdtype(pixels.dtype, np.floating):
+        pixels = np.clip(np.rint(255.0 * pixels), 0, 255)
+    pixels = pixels.astype(np.uint8, copy=False)
+    if pixels.ndim == 2:
+        pixels = pixels[:, :, np.newaxis]
+    if pixels.ndim != 3 or pixels.shape[2] not in (1, 3, 4):
+        raise ValueError(f"Cannot make a texture from an array of shape {pixels.shape}")
+    if pixels.shape[2] == 1:
+        pixels = np.repeat(pixels, 3, axis=2)
+    if pixels.shape[2] == 3:
+        alpha = np.full(pixels.shape[:2] + (1,), 255, dtype=np.uint8)
+        pixels = np.concatenate([pixels, alpha], axis=2)
+    return np.ascontiguousarray(pixels)
+
+
+def current_share_group():
+    # GL objects can only be used by the contexts of the share group that created them.
+    return QOpenGLContext.currentContext().shareGroup()
+
+
+#################################################################################################
+# Textures are sampler uniform values of mesh prefabs, like colormaps.
+# Images are decoded by a worker pool and shared by content hash. Each share group of GL contexts
+# uploads its own copy through a pixel buffer object, one band of rows per bind, and samples a
+# 1x1 placeholder until the upload is complete and the mipmaps are generated.
+# Prefabs acquire their textures when they are created and release them when they are deleted,
+# with the context of their widget current. A share group deletes its copy of an image when the
+# last prefab using it is released, and the host pixels are dropped once every share group using
+# the image has finished its upload. Files are decoded again if another share group needs them
+# later, arrays have to be loaded again.
+
+
+class TextureUpload:
+    def __init__(self, pixels):
+        self.height, self.width = pixels.shape[:2]
+        self.rows_per_band = max(1, STREAM_BYTES // (4 * self.width))
+        self.next_row = 0
+
+        self.texture = gl.glGenTextures(1)
+        gl.glBindTexture(gl.GL_TEXTURE_2D, self.texture)
+        gl.glTexParameteri(gl.GL_TEXTURE_2D, gl.GL_TEXTURE_WRAP_S, gl.GL_REPEAT)
+        gl.glTexParameteri(gl.GL_TEXTURE_2D, gl.GL_TEXTURE_WRAP_T, gl.GL_REPEAT)
+        gl.glTexParameteri(gl.GL_TEXTURE_2D, gl.GL_TEXTURE_MIN_FILTER, gl.GL_LINEAR)
+        gl.glTexParameteri(gl.GL_TEXTURE_2D, gl.GL_TEXTURE_MAG_FILTER, gl.GL_LINEAR)
+        gl.glTexImage2D(
+            gl.GL_TEXTURE_2D,
+            0,
+            gl.GL_RGBA8,
+            self.width,
+            self.height,
+            0,
+            gl.GL_RGBA,
+            gl.GL_UNSIGNED_BYTE,
+            None,
+        )
+        self.pixel_buffer = gl.glGenBuffers(1)
+
+    def complete(self):
+        return self.next_row >= self.height
+
+    def stream(self, pixels):
+        band = pixels[self.next_row : self.next_row + self.rows_per_band]
+        gl.glBindTexture(gl.GL_TEXTURE_2D, self.texture)
+        gl.glBindBuffer(gl.GL_PIXEL_UNPACK_BUFFER, self.pixel_buffer)
+        # Orphaning the buffer storage lets the previous band transfer while this one is copied
+        gl.glBufferData(gl.GL_PIXEL_UNPACK_BUFFER, band.nbytes, None, gl.GL_STREAM_DRAW)
+        pointer = gl.glMapBufferRange(
+            gl.GL_PIXEL_UNPACK_BUFFER,
+            0,
+            band.nbytes,
+            gl.GL_MAP_WRITE_BIT | gl.GL_MAP_INVALIDATE_BUFFER_BIT,
+        )
+        ctypes.memmove(pointer, band.ctypes.data, band.nbytes)
+        gl.glUnmapBuffer(gl.GL_PIXEL_UNPACK_BUFFER)
+        gl.glTexSubImage2D(
+            gl.GL_TEXTURE_2D,
+            0,
+            0,
+            self.next_row,
+            self.width,
+            band.shape[0],
+            gl.GL_RGBA,
+            gl.GL_UNSIGNED_BYTE,
+            ctypes.c_void_p(0),
+        )
+        gl.glBindBuffer(gl.GL_PIXEL_UNPACK_BUFFER, 0)
+        self.next_row += band.shape[0]
+
+        if self.complete():
+            gl.glGenerateMipmap(gl.GL_TEXTURE_2D)
+            gl.glTexParameteri(
+                gl.GL_TEXTURE_2D, gl.GL_TEXTURE_MIN_FILTER, gl.GL_LINEAR_MIPMAP_LINEAR
+            )
+            gl.glDeleteBuffers(1, [self.pixel_buffer])
+            self.pixel_buffer = None
+
+    def delete(self):
+        gl.glDeleteTextures(1, [self.texture])
+        if self.pixel_buffer is not None:
+            gl.glDeleteBuffers(1, [self.pixel_buffer])
+            self.pixel_buffer = None
+
+
+class TextureImage:
+    # Decoded pixels and their uploads, shared by all the textures with the same content.
+    def __init__(self, digest, pixels, path=None):
+        self.digest = digest
+        self.pixels = pixels
+        self.path = path
+        self.reloading = False
+        self.reload_reported = False
+        self.uploads = {}
+        # Number of prefabs using the image in each share group
+        self.users = {}
+
+    def acquire(self, share_group, count=1):
+        self.users[share_group] = self.users.get(share_group, 0) + count
+
+    def release(self, share_group):
+        self.users[share_group] -= 1
+        if self.users[share_group] == 0:
+            del self.users[share_group]
+            upload = self.uploads.pop(share_group, None)
+            if upload is not None:
+                upload.delete()
+
+    def bind(self, share_group):
+        # Returns False while the upload to this share group is not complete
+        upload = self.uploads.get(share_group)
+        if upload is None:
+            if self.pixels is None:
+                return False
+            upload = TextureUpload(self.pixels)
+            self.uploads[share_group] = upload
+        if not upload.complete():
+            upload.stream(self.pixels)
+            if not upload.complete():
+                return False
+            self.drop_pixels()
+        gl.glBindTexture(gl.GL_TEXTURE_2D, upload.texture)
+        return True
+
+    def drop_pixels(self):
+        for share_group in self.users:
+            upload = self.uploads.get(share_group)
+            if upload is None or not upload.complete():
+                return
+        self.pixels = None
+
+    def streaming(self, share_group):
+        # Also True while the pixels are decoded again for a share group using the image
+        upload = self.uploads.get(share_group)
+        if upload is None:
+            return share_group in self.users and (
+                self.reloading or self.pixels is not None
+            )
+        return not upload.complete()
+
+
+class Texture:
+    def __init__(self, cache, future):
+        self.cache = cache
+        self.future = future
+        self.error_reported = False
+        self.resolved_image = None
+        # Number of prefabs using the texture in each share group, passed on to the image
+        # once it is decoded
+        self.users = {}
+
+    def ready(self):
+        return self.future.done()
+
+    def image(self):
+        # Returns None while the image is decoded or if it could not be loaded
+        if self.resolved_image is not None or not self.future.done():
+            return self.resolved_image
+        try:
+            self.resolved_image = self.future.result()
+        except (OSError, ValueError) as err:
+            if not self.error_reported:
+                print(err)
+                self.error_reported = True
+            return None
+        for share_group, count in self.users.items():
+            self.resolved_image.acquire(share_group, count)
+        return self.resolved_image
+
+    def acquire(self):
+        share_group = self.cache.share_group()
+        image = self.image()
+        if len(self.users) == 0:
+            self.cache.live_textures.add(self)
+        self.users[share_group] = self.users.get(share_group, 0) + 1
+        if image is not None:
+            image.acquire(share_group)
+
+    def release(self):
+        share_group = self.cache.share_group()
+        image = self.image()
+        self.users[share_group] -= 1
+        if self.users[share_group] == 0:
+            del self.users[share_group]
+        if image is not None:
+            image.release(share_group)
+        if len(self.users) == 0:
+            self.cache.forget(self)
+
+    def bind(self, texture_unit):
+        gl.glActiveTexture(gl.GL_TEXTURE0 + texture_unit)
+        share_group = self.cache.share_group()
+        image = self.image()
+        if image is None or not image.bind(share_group):
+            if image is not None and image.pixels is None:
+                self.cache.reload(image)
+            gl.glBindTexture(gl.GL_TEXTURE_2D, self.cache.placeholder(share_group))
+
+
+class TextureCache:
+    # Files are keyed by path and modification time, so loading a file again returns the same
+    # texture until it changes. Decoded images are keyed by content hash, so copies of a file
+    # and equal arrays share their pixels and GL textures. Loading an array again gives its pixels
+    # back to an image that dropped them.
+    def __init__(self, max_workers=4):
+        # The worker pool is only started by the first load
+        self.max_workers = max_workers
+        self.executor = None
+        self.executor_lock = threading.Lock()
+        self.lock = threading.Lock()
+        self.textures = {}
+        # Images live as long as the textures decoded to them
+        self.images = weakref.WeakValueDictionary()
+        self.placeholders = {}
+        self.share_groups = set()
+        self.live_textures = set()
+
+    def submit(self, function, *args):
+        with self.executor_lock:
+            if self.executor is None:
+                self.executor = ThreadPoolExecutor(max_workers=self.max_workers)
+        return self.executor.submit(function, *args)
+
+    def load(self, image):
+        # image is a file path or an array of pixels, decoding runs in the worker pool
+        if isinstance(image, (str, os.PathLike)):
+            path = os.path.abspath(os.fspath(image))
+            stat = os.stat(path)
+            key = (path, stat.st_mtime_ns, stat.st_size)
+            with self.lock:
+                if key not in self.textures:
+                    self.textures[key] = Texture(
+                        self, self.submit(self.read_image, path)
+                    )
+                return self.textures[key]
+        return Texture(self, self.submit(self.array_image, np.array(image)))
+
+    def read_image(self, path):
+        with open(path, "rb") as image_file:
+            data = image_file.read()
+        digest = hashlib.sha1(data).hexdigest()
+        with self.lock:
+            if digest in self.images and self.images[digest].pixels is not None:
+                return self.images[digest]
+        return self.add_image(digest, decode_image(data, path), path)
+
+    def array_image(self, pixels):
+        pixels = image_pixels(pixels)
+        content_hash = hashlib.sha1(np.array(pixels.shape).tobytes())
+        content_hash.update(pixels)
+        return self.add_image(content_hash.hexdigest(), pixels)
+
+    def add_image(self, digest, pixels, path=None):
+        # An image decoded concurrently from another file with the same content is kept,
+        # an image whose pixels were dropped gets them back
+        with self.lock:
+            image = self.images.setdefault(digest, TextureImage(digest, pixels, path))
+            if image.pixels is None:
+                image.pixels = pixels
+                image.reload_reported = False
+            return image
+
+    def reload(self, image):
+        # Decodes a file again for a share group that starts using it after its pixels were dropped
+        with self.lock:
+            if image.reloading:
+                return
+            if image.path is None:
+                if not image.reload_reported:
+                    print(
+                        "The pixels of this texture were released after their upload, "
+                        "load the array again to use it in another widget"
+                    )
+                    image.reload_reported = True
+                return
+            image.reloading = True
+        self.submit(self.reload_image, image)
+
+    def reload_image(self, image):
+        try:
+            with open(image.path, "rb") as image_file:
+                image.pixels = decode_image(image_file.read(), image.path)
+        except (OSError, ValueError) as err:
+            print(err)
+        image.reloading = False
+
+    def forget(self, texture):
+        # Called when the last prefab using a texture is deleted
+        self.live_textures.discard(texture)
+        with self.lock:
+            for key in [
+                key for key, value in self.textures.items() if value is texture
+            ]:
+                del self.textures[key]
+
+    def share_group(self):
+        # The resources of a share group are forgotten when its last context is destroyed,
+        # its GL objects are deleted along with it
+        share_group = current_share_group()
+        if share_group not in self.share_groups:
+            self.share_groups.add(share_group)
+            share_group.destroyed.connect(lambda: self.forget_share_group(share_group))
+        return share_group
+
+    def forget_share_group(self, share_group):
+        self.share_groups.discard(share_group)
+        self.placeholders.pop(share_group, None)
+        for texture in list(self.live_textures):
+            if share_group in texture.users:
+                del texture.users[share_group]
+                if len(texture.users) == 0:
+                    self.forget(texture)
+        with self.lock:
+            images = list(self.images.values())
+        for image in images:
+            image.uploads.pop(share_group, None)
+            image.users.pop(share_group, None)
+
+    def placeholder(self, share_group):
+        # White texel sampled until the image is ready, lit surfaces still show their shading
+        if share_group not in self.placeholders:
+            texture = gl.glGenTextures(1)
+            gl.glBindTexture(gl.GL_TEXTURE_2D, texture)
+            gl.glTexParameteri(
+                gl.GL_TEXTURE_2D, gl.GL_TEXTURE_MIN_FILTER, gl.GL_NEAREST
+            )
+            gl.glTexParameteri(
+                gl.GL_TEXTURE_2D, gl.GL_TEXTURE_MAG_FILTER, gl.GL_NEAREST
+            )
+            gl.glTexImage2D(
+                gl.GL_TEXTURE_2D,
+                0,
+                gl.GL_RGBA8,
+                1,
+                1,
+                0,
+                gl.GL_RGBA,
+                gl.GL_UNSIGNED_BYTE,
+                np.full(4, 255, dtype=np.uint8),
+            )
+            self.placeholders[share_group] = texture
+        return self.placeholders[share_group]
+
+    def streaming(self):
+        # True while an upload to the share group of the current context is not complete
+        with self.lock:
+            images = list(self.images.values())
+        if len(images) == 0:
+            return False
+        share_group = self.share_group()
+        return any(image.streaming(share_group) for image in images)
+
+
+#################################################################################################
+
+# Shared by all the viewer widgets of the process
+texture_cache = TextureCache()
@@ -0,0 +1,73 @@
+import asyncio
+import threading
+import numpy as np
+
+
+def set_future_result(future, value):
+    if not future.done():
+        future.set_result(value)
+
+
+class VertexStream:
+    # Double-buffered vertex positions of a mesh core, written in place by a producer thread.
+    # The producer fills back_buffer() and calls publish(), which swaps the back and front buffers.
+    # The render thread only uploads the latest published frame, frames published faster than
+    # they are drawn are skipped. No array is allocated or copied and nothing is queued per frame.
+    # After publish, the back buffer holds an older frame, and it has to be retrieved again with
+    # back_buffer() since the buffers were swapped.
+    def __init__(self, number_vertices, request_redraw):
+        self.request_redraw = request_redraw
+        self.back = np.zeros((number_vertices, 3), dtype=np.float32)
+        self.front = np.zeros((number_vertices, 3), dtype=np.float32)
+        # Last consumed buffer, owned by the render thread since the mesh buffers may keep a reference to it
+        self.render_vertices = np.zeros((number_vertices, 3), dtype=np.float32)
+
+        self.condition = threading.Condition()
+        self.published_frame = 0
+        self.consumed_frame = 0
+        self.waiters = []
+
+    def back_buffer(self):
+        return self.back
+
+    def publish(self):
+        with self.condition:
+            self.back, self.front = self.front, self.back
+            self.published_frame += 1
+            frame = self.published_frame
+        self.request_redraw()
+        return frame
+
+    def consume(self):
+        # Called by the render thread, returns the latest published vertices or None if there is no new frame.
+        with self.condition:
+            if self.consumed_frame == self.published_frame:
+                return None
+            # The render thread takes the published buffer and gives back the one it consumed before,
+            # which the producer gets again at its next publish
+            self.render_vertices, self.front = self.front, self.render_vertices
+            self.consumed_frame = self.published_frame
+            frame = self.consumed_frame
+            waiters = self.waiters
+            self.waiters = []
+            self.condition.notify_all()
+        for loop, future in waiters:
+            loop.call_soon_threadsafe(set_future_result, future, frame)
+        return self.render_vertices
+
+    def wait_consumed(self, timeout=None):
+        # Blocks until the last published frame has been uploaded, returns False on timeout.
+        with self.condition:
+            return self.condition.wait_for(
+                lambda: self.consumed_frame == self.published_frame, timeout
+            )
+
+    async def consumed(self):
+        # Awaitable version of wait_consumed for asyncio producers, returns the consumed frame number.
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        with self.condition:
+            if self.consumed_frame == self.published_frame:
+                return self.consumed_frame
+            self.waiters.append((loop, future))
+        return await future
@@ -2,7 +2,10 @@ import sys
 import copy
 
 from .viewer_widget import ViewerWidget
+from .multi_viewport import MultiViewportWidget
 from .ui_widgets import PropertyWidget, LegendWidget
+from .frame_scheduler import FrameScheduler
+from ..remote.server import ViewerServer
 
 from PyQt5.QtCore import Qt, pyqtSignal
 from PyQt5.QtWidgets import (
@@ -22,7 +25,8 @@ class Viewer(QMainWindow):
     screenshot_signal = pyqtSignal(str)
     legend_signal = pyqtSignal(list, list)
 
-    def __init__(self):
+    def __init__(self, shared_surface=False):
+        # With shared_surface, the viewer widgets are viewports of a single GL surface.
         super().__init__()
         self.viewer_palette = {
             "viewer_background": "#7f7f9b",
@@ -56,6 +60,11 @@ class Viewer(QMainWindow):
 
         self.viewer_widgets = []
         self.linked_cameras = False
+        self.frame_scheduler = FrameScheduler()
+        self.render_quality = {"samples": 8, "render_scale": 1.0}
+        self.shared_surface = shared_surface
+        self.surface_widget = None
+        self.server = None
         self.menu_properties = {}
         self.current_menu_layout = self.menu_layout
 
@@ -65,6 +74,8 @@ class Viewer(QMainWindow):
         self.legend_signal.connect(self.add_ui_legend_)
 
     def add_viewer_widget(self, x, y, row_span=1, column_span=1):
+        if self.shared_surface:
+            return self.add_viewport(x, y, row_span, column_span)
         group_layout = QVBoxLayout()
         group_layout.setSpacing(0)
         group_layout.setContentsMargins(0, 0, 0, 0)
@@ -78,7 +89,7 @@ class Viewer(QMainWindow):
             + "; }"
         )
 
-        viewer_widget = ViewerWidget(self)
+        viewer_widget = ViewerWidget(self, **self.render_quality)
         viewer_widget.setFocusPolicy(Qt.ClickFocus)
         group_layout.addWidget(viewer_widget)
         self.main_layout.addWidget(widget, x, y + 1, row_span, column_span)
@@ -86,6 +97,17 @@ class Viewer(QMainWindow):
         self.viewer_widgets.append(viewer_widget)
         return viewer_widget, len(self.viewer_widgets) - 1
 
+    def add_viewport(self, x, y, row_span=1, column_span=1):
+        # The grid of viewports is laid out uniformly, row and column stretches do not apply.
+        if self.surface_widget is None:
+            self.surface_widget = MultiViewportWidget(self, **self.render_quality)
+            self.surface_widget.setFocusPolicy(Qt.ClickFocus)
+            self.main_layout.addWidget(self.surface_widget, 0, 1, -1, -1)
+            self.surface_widget.show()
+        viewport = self.surface_widget.add_viewport(x, y, row_span, column_span)
+        self.viewer_widgets.append(viewport)
+        return viewport, len(self.viewer_widgets) - 1
+
     def get_viewer_widget(self, index):
         if len(self.viewer_widgets) > index:
             return self.viewer_widgets[index]
@@ -109,7 +131,19 @@ class Viewer(QMainWindow):
 
     def update_all_viewers(self):
         for widget in self.viewer_widgets:
-            widget.update()
+            widget.request_redraw(scene_changed=False)
+
+    def set_max_fps(self, max_fps):
+        self.frame_scheduler.set_max_fps(max_fps)
+
+    def set_render_quality(self, samples=None, render_scale=None):
+        # Applies to the existing viewer widgets and to the ones added afterwards
+        if samples is not None:
+            self.render_quality["samples"] = samples
+        if render_scale is not None:
+            self.render_quality["render_scale"] = render_scale
+        for widget in self.viewer_widgets:
+            widget.set_render_quality(samples, render_scale)
 
     def start_ui_group(self, name):
         group_layout = QVBoxLayout()
@@ -193,8 +227,22 @@ class Viewer(QMainWindow):
             exit()
 
     def closeEvent(self, event):
+        self.stop_server()
         self.close_signal.emit()
 
+    def start_server(self, address=("127.0.0.1", 9876)):
+        # Lets other processes push meshes with PyIGL_viewer.remote.ViewerClient, address is a
+        # Unix domain socket path or a (host, port) pair.
+        self.stop_server()
+        self.server = ViewerServer(self, address)
+        self.server.start()
+        return self.server
+
+    def stop_server(self):
+        if self.server is not None:
+            self.server.stop()
+            self.server = None
+
     def save_screenshot_(self, path):
         screenshot = QApplication.primaryScreen().grabWindow(
             self.central_widget.winId()
@@ -1,69 +1,85 @@
 import os
 import sys
-import numpy as np
 from OpenGL import GL as gl
 from PyQt5.QtWidgets import QOpenGLWidget
 from PyQt5.QtGui import QSurfaceFormat
 from PyQt5.QtCore import Qt
-from queue import Queue, Empty
+from queue import Empty
 
 from .shader import ShaderProgram
 from .mouse import MouseHandler
-from .camera import Camera
+from .scene import ViewerScene
+from .frame_scheduler import RedrawQueue
+from .adaptive_quality import AdaptiveQuality
+from .render_target import RenderTarget, RenderScaleController
 
-from ..mesh import (
-    MeshGroup,
-    GlMeshCoreId,
-    GlMeshPrefabId,
-    GlMeshInstanceId,
-)
 
-
-class ViewerWidget(QOpenGLWidget):
-    def __init__(self, parent):
+class ViewerWidget(QOpenGLWidget, ViewerScene):
+    def __init__(self, parent, samples=8, render_scale=1.0):
         super(ViewerWidget, self).__init__(parent)
 
         self.main_window = parent
 
         # Add antialiasing
         format = QSurfaceFormat()
-        format.setSamples(8)
+        format.setSamples(samples)
         self.setFormat(format)
 
-        # Global viewer attributes
-        self.camera = Camera(self.size())
-
-        self.global_uniforms = {}
-        self.global_uniforms["lightDirection"] = np.array([0.0, 0.0, 1.0])
-        self.global_uniforms["lightDirection"] /= np.linalg.norm(
-            self.global_uniforms["lightDirection"]
-        )
-        self.global_uniforms["lightIntensity"] = np.array([0.95, 0.95, 0.95])
-        self.global_uniforms["ambientLighting"] = np.array([0.05, 0.05, 0.05])
-        self.global_uniforms["cameraPosition"] = self.camera.get_position()
-        self.global_uniforms["linkLight"] = False
-
-        self.line_width = 1
-        self.point_size = 3
+        # Render quality, the scene is rendered offscreen when it differs from the widget surface
+        self.surface_samples = samples
+        self.samples = samples
+        self.render_scale = render_scale
+        self.render_target = RenderTarget()
+        self.render_scale_controller = RenderScaleController()
 
         # Available shaders
         self.shaders = {}
 
-        # Mesh attributes
-        self.mesh_groups = {}
-        self.draw_wireframe = True
+        # Camera, lights and meshes
+        self.init_scene(self.size())
 
         # Mouse input handling
         self.mouse_handler = MouseHandler()
         self.setMouseTracking(True)
+        self.adaptive_quality = AdaptiveQuality()
+
+        # Post-draw events, adding an event requests a redraw of the widget
+        self.post_draw_events = RedrawQueue(self.request_redraw)
 
-        # Event queues
-        self.mesh_events = Queue()
-        self.post_draw_events = Queue()
+        # Redraw tracking for the frame scheduler
+        self.scene_changed = True
+        self.painted_camera_state = None
 
     def add_shaders(self):
-        excluded_attributes = ["position"]
-        excluded_uniforms = ["mvp", "projection", "view", "model"]
+        excluded_attributes = [
+            "position",
+            "vertexIndex",
+            "boneIndices",
+            "boneWeights",
+            "poolSlot",
+        ]
+        excluded_uniforms = [
+            "mvp",
+            "projection",
+            "view",
+            "model",
+            "positionOffset",
+            "positionScale",
+            "octahedralNormals",
+            "animated",
+            "animationFrames",
+            "animationOffsets",
+            "animationBlend",
+            "blendShapeCount",
+            "blendShapeDeltas",
+            "blendShapeOffsets",
+            "blendShapeWeights",
+            "skinned",
+            "boneMatrices",
+            "pooled",
+            "poolLayerOffset",
+            "poolMatrices",
+        ]
         excluded_uniforms = excluded_uniforms + list(self.global_uniforms.keys())
 
         current_file_path = os.path.dirname(os.path.abspath(__file__))
@@ -95,39 +111,31 @@ class ViewerWidget(QOpenGLWidget):
         gl.glClearDepth(1.0)
         gl.glClearColor(float(r) / 255.0, float(g) / 255.0, float(b) / 255.0, 1.0)
         gl.glEnable(gl.GL_MULTISAMPLE)
+        self.context().aboutToBeDestroyed.connect(self.delete_gl)
 
-    def bind_global_uniforms(self, shader_program):
-        for key, value in self.global_uniforms.items():
-            location = gl.glGetUniformLocation(shader_program, key)
-            if location != -1:
-                if type(value) is bool:
-                    gl.glUniform1i(location, value)
-                if hasattr(value, "shape"):
-                    shape = value.shape
-                    if len(shape) == 1:
-                        if shape[0] == 1:
-                            gl.glUniform1fv(location, 1, value)
-                        if shape[0] == 2:
-                            gl.glUniform2fv(location, 1, value)
-                        if shape[0] == 3:
-                            gl.glUniform3fv(location, 1, value)
-                        if shape[0] == 4:
-                            gl.glUniform4fv(location, 1, value)
-
-                    if len(shape) == 2:
-                        if shape[0] == shape[1] and shape[0] == 2:
-                            gl.glUniformMatrix2fv(location, 1, gl.GL_FALSE, value)
-                        if shape[0] == shape[1] and shape[0] == 3:
-                            gl.glUniformMatrix3fv(location, 1, gl.GL_FALSE, value)
-                        if shape[0] == shape[1] and shape[0] == 4:
-                            gl.glUniformMatrix4fv(
-                                location, 1, gl.GL_FALSE, value.transpose()
-                            )
+    def delete_gl(self):
+        self.makeCurrent()
+        self.delete_scene()
+        self.render_target.delete()
+        self.doneCurrent()
 
     def paintGL(self):
+        self.scene_changed = False
+        self.painted_camera_state = self.camera_state()
+        self.adaptive_quality.begin_frame()
+        # Qt may change the GL state between two frames
+        self.gl_state.reset()
         self.process_mesh_events()
 
-        gl.glPointSize(self.point_size)
+        quality = self.adaptive_quality
+        if quality.multisampling():
+            gl.glEnable(gl.GL_MULTISAMPLE)
+        else:
+            gl.glDisable(gl.GL_MULTISAMPLE)
+        line_width = 1 if quality.thin_primitives() else self.line_width
+        self.gl_state.set_point_size(
+            1 if quality.thin_primitives() else self.point_size
+        )
 
         def hex_to_rgb(value):
             value = value.lstrip("#")
@@ -137,70 +145,75 @@ class ViewerWidget(QOpenGLWidget):
         r, g, b = hex_to_rgb(self.main_window.viewer_palette["viewer_background"])
         gl.glClearColor(float(r) / 255.0, float(g) / 255.0, float(b) / 255.0, 1.0)
 
-        gl.glClear(gl.GL_DEPTH_BUFFER_BIT | gl.GL_COLOR_BUFFER_BIT)
-        self.global_uniforms["view"] = self.camera.get_view_matrix()
-        self.global_uniforms["projection"] = self.camera.get_projection_matrix()
-        self.global_uniforms["cameraPosition"] = self.camera.get_position()
-        for group in self.mesh_groups.values():
-            for core, prefab, instance in group:
-                if not instance.get_visibility():
-                    continue
-                shader_name = prefab.get_shader().name
-                if shader_name == "wireframe" and not self.draw_wireframe:
-                    continue
-                if prefab.fill:
-                    gl.glPolygonMode(gl.GL_FRONT_AND_BACK, gl.GL_FILL)
-                    gl.glLineWidth(1)
-                else:
-                    gl.glPolygonMode(gl.GL_FRONT_AND_BACK, gl.GL_LINE)
-                    gl.glLineWidth(self.line_width)
-                shader_program = prefab.get_shader().program
-                gl.glUseProgram(shader_program)
-
-                self.bind_global_uniforms(shader_program)
-
-                # Load projection matrix
-                # projection_location = gl.glGetUniformLocation(shader_program, 'projection')
-                # gl.glUniformMatrix4fv(projection_location, 1, False, projection_matrix.transpose())
-
-                # Load view matrix
-                # view_location = gl.glGetUniformLocation(shader_program, 'view')
-                # gl.glUniformMatrix4fv(view_location, 1, False, view_matrix.transpose())
-
-                # Load model matrix
-                model_matrix = instance.get_model_matrix()
-                if model_matrix is None:
-                    instance.set_model_matrix(np.eye(4, dtype="f"))
-                    model_matrix = instance.get_model_matrix()
-                model_location = gl.glGetUniformLocation(shader_program, "model")
-                gl.glUniformMatrix4fv(
-                    model_location, 1, False, model_matrix.transpose()
-                )
-
-                mvp_location = gl.glGetUniformLocation(shader_program, "mvp")
-                gl.glUniformMatrix4fv(
-                    mvp_location,
-                    1,
-                    False,
-                    (
-                        self.global_uniforms["projection"]
-                        * self.global_uniforms["view"]
-                        * model_matrix
-                    ).transpose(),
-                )
-
-                # Draw mesh
-                core.bind_buffers()
-                prefab.bind_vertex_attributes()
-                prefab.bind_uniforms()
-                gl.glDrawArrays(
-                    core.drawing_mode, 0, core.element_size * core.number_elements
-                )
+        # Render offscreen at a lower resolution or with a different sample count if needed
+        render_scale = self.render_scale * quality.render_scale_factor()
+        use_render_target = render_scale != 1.0 or self.samples != self.surface_samples
+        framebuffer_width = int(self.width() * self.devicePixelRatio())
+        framebuffer_height = int(self.height() * self.devicePixelRatio())
+        if use_render_target:
+            self.render_target.resize(
+                int(render_scale * framebuffer_width),
+                int(render_scale * framebuffer_height),
+                self.samples,
+            )
+            self.render_target.bind()
+            target_width = self.render_target.width
+            target_height = self.render_target.height
+        else:
+            self.render_target.delete()
+            target_width = framebuffer_width
+            target_height = framebuffer_height
+
+        self.render(quality, line_width, target_width, target_height)
+        if use_render_target:
+            self.render_target.composite(
+                self.defaultFramebufferObject(),
+                framebuffer_width,
+                framebuffer_height,
+                self.gl_state,
+            )
         self.process_post_draw_events()
 
+        # When adapting the quality, wait for the GPU so that the measured frame time is meaningful
+        if quality.interacting or self.render_scale_controller.enabled:
+            gl.glFinish()
+        quality.end_frame()
+        if self.render_scale_controller.enabled:
+            # The new scale is used from the next frame on
+            self.render_scale = self.render_scale_controller.next_scale(
+                self.render_scale, quality.last_frame_time
+            )
+
+    def render(self, quality, line_width, width, height):
+        gl.glClear(gl.GL_DEPTH_BUFFER_BIT | gl.GL_COLOR_BUFFER_BIT)
+        self.draw_scene(quality, line_width, height)
+
     def resizeGL(self, width, height):
         self.camera.handle_resize(width, height)
 
+    #################################################################################################
+    # Redraw requests
+
+    def request_redraw(self, scene_changed=True):
+        # Thread-safe, the actual repaint is scheduled by the frame scheduler of the main window.
+        if scene_changed:
+            self.scene_changed = True
+        self.main_window.frame_scheduler.request_redraw(self)
+
+    def request_camera_redraw(self):
+        if self.main_window.linked_cameras:
+            self.main_window.update_all_viewers()
+        else:
+            self.request_redraw(scene_changed=False)
+
+    def camera_state(self):
+        return self.camera.get_state()
+
+    def needs_redraw(self):
+        return self.scene_changed or self.camera_state() != self.painted_camera_state
+
+    #################################################################################################
+
     #################################################################################################
     # Event handling
 
@@ -212,40 +225,33 @@ class ViewerWidget(QOpenGLWidget):
             exit()
         if e.key() == Qt.Key_R:
             self.camera.reset()
-            if self.main_window.linked_cameras:
-                self.main_window.update_all_viewers()
-            else:
-                self.update()
+            self.request_camera_redraw()
         if e.key() == Qt.Key_W:
             self.toggle_wireframe()
 
     def mousePressEvent(self, e):
         self.mouse_handler.add_mouse_press_event(e)
+        if e.button() in (Qt.LeftButton, Qt.RightButton):
+            self.adaptive_quality.begin_interaction()
 
     def mouseReleaseEvent(self, e):
         self.mouse_handler.add_mouse_release_event(e)
         self.camera.finalize_transformation()
-        if self.main_window.linked_cameras:
-            self.main_window.update_all_viewers()
-        else:
-            self.update()
+        if self.adaptive_quality.end_interaction():
+            # The camera did not move since the last frame, but it was drawn at a lower quality
+            self.request_redraw()
+        self.request_camera_redraw()
 
     def mouseMoveEvent(self, e):
         self.mouse_handler.add_mouse_move_event(e)
         if self.mouse_handler.button_pressed(Qt.LeftButton):
             delta = self.mouse_handler.pressed_delta_mouse(Qt.LeftButton)
             self.camera.handle_rotation(delta)
-            if self.main_window.linked_cameras:
-                self.main_window.update_all_viewers()
-            else:
-                self.update()
+            self.request_camera_redraw()
         elif self.mouse_handler.button_pressed(Qt.RightButton):
             delta = self.mouse_handler.pressed_delta_mouse(Qt.RightButton)
             self.camera.handle_translation(delta)
-            if self.main_window.linked_cameras:
-                self.main_window.update_all_viewers()
-            else:
-                self.update()
+            self.request_camera_redraw()
 
     def wheelEvent(self, e):
         self.mouse_handler.add_scroll_event(e)
@@ -253,198 +259,42 @@ class ViewerWidget(QOpenGLWidget):
         if delta.y() != 0:
             delta = -0.002 * delta.y() / 8.0
             self.camera.handle_zoom(delta)
-            if self.main_window.linked_cameras:
-                self.main_window.update_all_viewers()
-            else:
-                self.update()
-
-    #################################################################################################
-
-    #################################################################################################
-    # Mesh adding, updating and removing
-
-    def process_mesh_events(self):
-        while True:
-            try:
-                event = self.mesh_events.get(block=False)
-                event_type = event[0]
-                mesh_function = getattr(self, event_type + "_")
-                mesh_function(*event[1:])
-            except Empty:
-                return
-
-    def add_mesh_(self, core_id, vertices, faces):
-        vertices = vertices.astype(np.float32)
-        faces = faces.astype(np.int32)
-        self.mesh_groups[core_id.core_id] = MeshGroup(vertices, faces)
-
-    def add_mesh(self, vertices, faces):
-        core_id = GlMeshCoreId()
-        self.mesh_events.put(["add_mesh", core_id, vertices, faces])
-        return core_id
-
-    def get_mesh(self, mesh_id):
-        return self.mesh_groups[mesh_id.core_id]
-
-    def get_mesh_prefab(self, prefab_id):
-        return self.get_mesh(prefab_id).get_prefab(prefab_id)
-
-    def get_mesh_instance(self, instance_id):
-        return self.get_mesh(instance_id).get_instance(instance_id)
-
-    def add_mesh_prefab_(
-        self,
-        prefab_id,
-        shader="default",
-        vertex_attributes={},
-        face_attributes={},
-        uniforms={},
-        fill=True,
-        copy_from=None,
-    ):
-        if shader in self.shaders:
-            try:
-                if copy_from is not None:
-                    copy_from = self.get_mesh_prefab(copy_from)
-                self.get_mesh(prefab_id).add_prefab(
-                    prefab_id,
-                    vertex_attributes,
-                    face_attributes,
-                    uniforms,
-                    self.shaders[shader],
-                    fill=fill,
-                    copy_from=copy_from,
-                )
-            except ValueError as err:
-                print(err)
-                self.get_mesh(prefab_id).add_prefab(
-                    prefab_id,
-                    vertex_attributes,
-                    face_attributes,
-                    uniforms,
-                    self.shaders["default"],
-                    fill=fill,
-                    copy_from=copy_from,
-                )
-
-    def add_mesh_prefab(
-        self,
-        core_id,
-        shader="default",
-        vertex_attributes={},
-        face_attributes={},
-        uniforms={},
-        fill=True,
-        copy_from=None,
-    ):
-        prefab_id = GlMeshPrefabId(core_id)
-        self.mesh_events.put(
-            [
-                "add_mesh_prefab",
-                prefab_id,
-                shader,
-                vertex_attributes,
-                face_attributes,
-                uniforms,
-                fill,
-                copy_from,
-            ]
-        )
-        return prefab_id
-
-    def add_mesh_instance_(self, instance_id, model_matrix):
-        self.get_mesh(instance_id).add_instance(instance_id, model_matrix)
-
-    def add_mesh_instance(self, prefab_id, model_matrix):
-        instance_id = GlMeshInstanceId(prefab_id)
-        self.mesh_events.put(["add_mesh_instance", instance_id, model_matrix])
-        return instance_id
-
-    def update_mesh_vertices_(self, core_id, vertices):
-        self.get_mesh(core_id).update_vertices(vertices.astype(np.float32))
-
-    def update_mesh_vertices(self, core_id, vertices):
-        self.mesh_events.put(["update_mesh_vertices", core_id, vertices])
-
-    def update_mesh_prefab_uniform_(self, prefab_id, name, value):
-        self.get_mesh(prefab_id).get_prefab(prefab_id).update_uniform(name, value)
-
-    def update_mesh_prefab_uniform(self, prefab_id, name, value):
-        self.mesh_events.put(["update_mesh_prefab_uniform", prefab_id, name, value])
-
-    def update_mesh_prefab_vertex_attribute_(self, prefab_id, name, value):
-        self.get_mesh(prefab_id).update_prefab_vertex_attribute(prefab_id, name, value)
-
-    def update_mesh_prefab_vertex_attribute(self, prefab_id, name, value):
-        self.mesh_events.put(
-            ["update_mesh_prefab_vertex_attribute", prefab_id, name, value]
-        )
-
-    def update_mesh_prefab_face_attribute_(self, prefab_id, name, value):
-        self.get_mesh(prefab_id).update_prefab_face_attribute(prefab_id, name, value)
-
-    def update_mesh_prefab_face_attribute(self, prefab_id, name, value):
-        self.mesh_events.put(
-            ["update_mesh_prefab_face_attribute", prefab_id, name, value]
-        )
-
-    def update_mesh_instance_model_(self, instance_id, model):
-        self.get_mesh(instance_id).get_instance(instance_id).set_model_matrix(model)
-
-    def update_mesh_instance_model(self, instance_id, model):
-        self.mesh_events.put(["update_mesh_instance_model", instance_id, model])
-
-    def set_mesh_instance_visibility_(self, instance_id, visibility):
-        self.get_mesh(instance_id).get_instance(instance_id).set_visibility(visibility)
-
-    def set_mesh_instance_visibility(self, instance_id, visibility):
-        self.mesh_events.put(["set_mesh_instance_visibility", instance_id, visibility])
-
-    def get_mesh_instance_visibility(self, instance_id):
-        return self.get_mesh(instance_id).get_instance(instance_id).get_visibility()
-
-    def remove_mesh_(self, core_id):
-        self.mesh_groups.pop(core_id.core_id)
-
-    def remove_mesh(self, core_id):
-        self.mesh_events.put(["remove_mesh", core_id])
-
-    def remove_mesh_prefab_(self, prefab_id):
-        self.get_mesh(prefab_id).remove_prefab(prefab_id)
-
-    def remove_mesh_prefab(self, prefab_id):
-        self.mesh_events.put(["remove_mesh_prefab", prefab_id])
-
-    def remove_mesh_instance_(self, instance_id):
-        self.get_mesh(instance_id).remove_instance(instance_id)
-
-    def remove_mesh_instance(self, instance_id):
-        self.mesh_events.put(["remove_mesh_instance", instance_id])
-
-    def clear_all_(self):
-        self.mesh_groups.clear()
-
-    def clear_all(self):
-        self.mesh_events.put(["clear_all"])
+            self.request_camera_redraw()
 
     #################################################################################################
 
     #################################################################################################
     # General viewer settings
 
-    def set_directional_light(self, direction, intensity):
-        self.global_uniforms["lightDirection"] = direction / np.linalg.norm(direction)
-        self.global_uniforms["lightIntensity"] = intensity
-
-    def set_ambient_light(self, intensity):
-        self.global_uniforms["ambientLighting"] = intensity
-
-    def link_light_to_camera(self, link=True):
-        self.global_uniforms["linkLight"] = link
-
-    def toggle_wireframe(self):
-        self.draw_wireframe = not self.draw_wireframe
-        self.update()
+    def set_render_quality(self, samples=None, render_scale=None):
+        # The sample count of the widget surface can only be set before the widget is initialized,
+        # afterwards a different sample count renders through an offscreen framebuffer.
+        if samples is not None:
+            self.samples = samples
+            if not self.isValid():
+                format = self.format()
+                format.setSamples(samples)
+                self.setFormat(format)
+                self.surface_samples = samples
+        if render_scale is not None:
+            if render_scale <= 0.0:
+                raise ValueError("The render scale must be positive")
+            self.render_scale = render_scale
+        self.request_redraw()
+
+    def set_auto_render_scale(self, enabled=True, target_fps=30, min_scale=0.25):
+        # Adjust the render scale automatically to hold the target frame rate
+        self.render_scale_controller.enabled = enabled
+        self.render_scale_controller.set_target_fps(target_fps)
+        self.render_scale_controller.min_scale = min_scale
+        if not enabled:
+            self.render_scale = 1.0
+        self.request_redraw()
+
+    def set_adaptive_quality(self, enabled=True, target_fps=30):
+        # Lower the rendering quality during camera interaction when frames are slower than target_fps
+        self.adaptive_quality.enabled = enabled
+        self.adaptive_quality.set_target_fps(target_fps)
 
     #################################################################################################
 
@@ -467,87 +317,5 @@ class ViewerWidget(QOpenGLWidget):
 
     def save_screenshot(self, path):
         self.post_draw_events.put(["save_screenshot", path])
-        self.update()
-
-    #################################################################################################
 
     #################################################################################################
-
-    # Convenience functions
-
-    def display_point_cloud(
-        self,
-        points,
-        shader="per_vertex_color",
-        uniforms={},
-        vertex_attributes={},
-        face_attributes={},
-    ):
-        if not "vertexColor" in vertex_attributes:
-            vertex_attributes["vertexColor"] = np.tile(
-                np.array([0.8, 0.2, 0.2], dtype=np.float32), (points.shape[0], 1)
-            )
-        faces = np.linspace(
-            0, points.shape[0], num=points.shape[0], endpoint=False, dtype=np.int32
-        )[:, np.newaxis]
-        mesh_id = self.add_mesh(points, faces)
-        mesh_prefab_id = self.add_mesh_prefab(
-            mesh_id,
-            shader=shader,
-            vertex_attributes=vertex_attributes,
-            face_attributes=face_attributes,
-            uniforms=uniforms,
-        )
-        mesh_instance_id = self.add_mesh_instance(mesh_prefab_id, np.eye(4))
-        return mesh_instance_id
-
-    def display_mesh(self, vertices, faces, normals):
-        vertex_attributes = {}
-        face_attributes = {}
-        face_attributes["normal"] = normals
-        uniforms = {}
-        uniforms["albedo"] = np.array([0.8, 0.8, 0.8])
-        mesh_id = self.add_mesh(vertices, faces)
-        mesh_prefab_id = self.add_mesh_prefab(
-            mesh_id,
-            shader="lambert",
-            vertex_attributes=vertex_attributes,
-            face_attributes=face_attributes,
-            uniforms=uniforms,
-        )
-        mesh_instance_id = self.add_mesh_instance(mesh_prefab_id, np.eye(4))
-        return mesh_instance_id
-
-    def display_quad_net(
-        self,
-        vertices,
-        faces,
-        shader="wireframe",
-        uniforms={"lineColor": np.array([0.8, 0.2, 0.2])},
-        vertex_attributes={},
-        face_attributes={},
-    ):
-        mesh_id = self.add_mesh(vertices, faces)
-        mesh_prefab_id = self.add_mesh_prefab(
-            mesh_id,
-            shader=shader,
-            vertex_attributes=vertex_attributes,
-            face_attributes=face_attributes,
-            uniforms=uniforms,
-        )
-        mesh_instance_id = self.add_mesh_instance(mesh_prefab_id, np.eye(4))
-        return mesh_instance_id
-
-    def add_wireframe(self, mesh_instance_id, line_color=np.array([0.0, 0.0, 0.0])):
-        self.mesh_events.put(["add_wireframe", mesh_instance_id, line_color])
-
-    def add_wireframe_(self, mesh_instance_id, line_color):
-        uniforms = {}
-        uniforms["lineColor"] = line_color
-        wireframe_mesh_prefab_index = self.add_mesh_prefab(
-            mesh_instance_id, "wireframe", fill=False, uniforms=uniforms
-        )
-        wireframe_instance_index = self.add_mesh_instance(
-            wireframe_mesh_prefab_index,
-            self.get_mesh_instance(mesh_instance_id).get_model_matrix(),
-        )
@@ -22,6 +22,7 @@ viewer.set_column_stretch(0, 1)
 viewer_widget, _ = viewer.add_viewer_widget(0, 0)
 viewer_widget.show()
 
+
 # Add a screenshot button
 def screenshot_function():
     viewer.save_screenshot(os.path.join("screenshot.png"))
@@ -42,14 +43,15 @@ instance_index = viewer_widget.add_mesh_instance(
 )
 
 
+# A vertex stream gives preallocated buffers to write the animated vertices into,
+# only the latest published frame is uploaded by the viewer.
+vertex_stream = viewer_widget.add_vertex_stream(mesh_index, vertices.shape[0])
+
+
 def animate_func():
-    global vertices, faces
     for t in range(1000):
-        moved_vertices = vertices + t * 0.002 * np.ones_like(vertices)
-        viewer_widget.update_mesh_vertices(
-            mesh_index, moved_vertices.astype(np.float32)
-        )
-        viewer_widget.update()
+        np.add(vertices, t * 0.002, out=vertex_stream.back_buffer())
+        vertex_stream.publish()
         time.sleep(0.02)
 
 
@@ -0,0 +1,43 @@
+import os
+import numpy as np
+import igl
+from PyQt5.QtWidgets import QApplication
+from PyIGL_viewer import Viewer
+
+script_folder = os.path.dirname(__file__)
+path_to_obj_file = os.path.join(script_folder, "assets", "cube.obj")
+vertices, faces = igl.read_triangle_mesh(path_to_obj_file)
+vertices -= np.mean(vertices, axis=0)
+vertices /= np.max(np.max(vertices, axis=0) - np.min(vertices, axis=0))
+
+viewer_app = QApplication(["IGL viewer"])
+viewer = Viewer()
+viewer.show()
+viewer.set_column_stretch(0, 1)
+viewer_widget, _ = viewer.add_viewer_widget(0, 0)
+viewer_widget.show()
+
+mesh_index = viewer_widget.add_mesh(vertices, faces)
+mesh_prefab_index = viewer_widget.add_mesh_prefab(mesh_index, "default")
+viewer_widget.add_mesh_instance(mesh_prefab_index, np.eye(4, dtype="f"))
+
+# Precompute a (T, N, 3) animation, it is uploaded once and played back on the GPU.
+# Only 24 keyframes are stored, the positions in between are interpolated by the vertex shader.
+times = np.linspace(0.0, 2.0 * np.pi, 24, endpoint=False)
+frames = vertices[np.newaxis] * (1.0 + 0.3 * np.sin(times))[:, np.newaxis, np.newaxis]
+viewer_widget.add_animation_clip(mesh_index, frames, frame_rate=12.0)
+
+
+def toggle_playback():
+    toggle_playback.playing = not toggle_playback.playing
+    if toggle_playback.playing:
+        viewer_widget.play_animation(mesh_index)
+    else:
+        viewer_widget.pause_animation(mesh_index)
+
+
+toggle_playback.playing = True
+viewer.add_ui_button("Play / Pause", toggle_playback)
+viewer.add_ui_button("Restart", lambda: viewer_widget.seek_animation(mesh_index, 0))
+
+viewer_app.exec()
@@ -0,0 +1,64 @@
+import os
+import threading
+import time
+import numpy as np
+import igl
+from PyQt5.QtWidgets import QApplication
+from PyIGL_viewer import Viewer
+
+script_folder = os.path.dirname(__file__)
+path_to_obj_file = os.path.join(script_folder, "assets", "cube.obj")
+vertices, faces = igl.read_triangle_mesh(path_to_obj_file)
+vertices -= np.mean(vertices, axis=0)
+vertices /= np.max(np.max(vertices, axis=0) - np.min(vertices, axis=0))
+
+viewer_app = QApplication(["IGL viewer"])
+viewer = Viewer()
+viewer.show()
+viewer.set_column_stretch(0, 1)
+viewer_widget, _ = viewer.add_viewer_widget(0, 0)
+viewer_widget.show()
+
+mesh_index = viewer_widget.add_mesh(vertices, faces)
+mesh_prefab_index = viewer_widget.add_mesh_prefab(mesh_index, "default")
+viewer_widget.add_mesh_instance(mesh_prefab_index, np.eye(4, dtype="f"))
+
+# Two blend shape targets, stretching the mesh along x and along y.
+deltas = np.zeros((2,) + vertices.shape, dtype=np.float32)
+deltas[0, :, 0] = vertices[:, 0]
+deltas[1, :, 1] = vertices[:, 1]
+viewer_widget.add_blend_shapes(mesh_index, deltas)
+
+# Two bones, the weight of the second one grows along x.
+bone_weight = np.clip(vertices[:, 0] + 0.5, 0.0, 1.0)
+bone_indices = np.tile(np.array([0, 1]), (vertices.shape[0], 1))
+bone_weights = np.stack([1.0 - bone_weight, bone_weight], axis=1)
+viewer_widget.add_skin(
+    mesh_index, bone_indices, bone_weights, np.tile(np.eye(4), (2, 1, 1))
+)
+
+
+# Each frame only sends two weights and two bone matrices to the viewer.
+def animate_func():
+    bone_matrices = np.tile(np.eye(4, dtype=np.float32), (2, 1, 1))
+    for t in range(1000):
+        angle = 0.5 * np.sin(0.05 * t)
+        bone_matrices[1, :2, :2] = [
+            [np.cos(angle), -np.sin(angle)],
+            [np.sin(angle), np.cos(angle)],
+        ]
+        viewer_widget.set_bone_matrices(mesh_index, bone_matrices.copy())
+        viewer_widget.set_blend_shape_weights(
+            mesh_index, [0.5 + 0.5 * np.sin(0.03 * t), 0.5 + 0.5 * np.cos(0.03 * t)]
+        )
+        time.sleep(0.02)
+
+
+def animate_func_async():
+    animating_thread = threading.Thread(target=animate_func, args=())
+    animating_thread.start()
+
+
+viewer.add_ui_button("Animate", animate_func_async)
+
+viewer_app.exec()
@@ -0,0 +1,39 @@
+import os
+import numpy as np
+import igl
+from PyQt5.QtWidgets import QApplication
+from PyIGL_viewer import Viewer
+
+script_folder = os.path.dirname(__file__)
+path_to_obj_file = os.path.join(script_folder, "assets", "cube.obj")
+vertices, faces = igl.read_triangle_mesh(path_to_obj_file)
+vertices -= np.mean(vertices, axis=0)
+vertices /= np.max(np.max(vertices, axis=0) - np.min(vertices, axis=0))
+
+viewer_app = QApplication(["IGL viewer"])
+viewer = Viewer()
+viewer.show()
+viewer.set_column_stretch(0, 1)
+viewer_widget, _ = viewer.add_viewer_widget(0, 0)
+viewer_widget.show()
+
+# Many small parts, each with its own mesh core. Pooled cores share a few large buffers
+# and the parts with the same shader and uniforms are drawn with a single call.
+uniforms = {
+    "albedo": np.array([0.6, 0.6, 0.8], dtype=np.float32),
+}
+grid_size = 30
+for i in range(grid_size):
+    for j in range(grid_size):
+        part_vertices = 0.02 * vertices * (1.0 + 0.5 * np.random.rand(1, 3))
+        mesh_index = viewer_widget.add_mesh(
+            part_vertices, faces, normals="face", pooled=True
+        )
+        mesh_prefab_index = viewer_widget.add_mesh_prefab(
+            mesh_index, "lambert", uniforms=uniforms
+        )
+        model = np.eye(4, dtype="f")
+        model[:2, 3] = [i / grid_size - 0.5, j / grid_size - 0.5]
+        viewer_widget.add_mesh_instance(mesh_prefab_index, model)
+
+viewer_app.exec()
@@ -10,6 +10,7 @@ path_to_obj_file = os.path.join(script_folder, "assets", "cube.obj")
 vertices, faces = igl.read_triangle_mesh(path_to_obj_file)
 
 viewer_app = QApplication(["IGL viewer"])
+# Viewer(shared_surface=True) draws all the viewer widgets as viewports of a single GL surface.
 viewer = Viewer()
 viewer.show()
 
@@ -62,6 +62,9 @@ face_attributes["normal"] = face_normals
 # vertex_normals = igl.per_vertex_normals(vertices, faces, igl.PER_VERTEX_NORMALS_WEIGHTING_TYPE_AREA).astype(np.float32)
 # vertex_attributes['normal'] = vertex_normals
 
+# Alternatively, the viewer can compute the normals itself and refresh them whenever the vertices are updated.
+# mesh_index = viewer_widget.add_mesh(vertices, faces, normals="vertex")
+
 mesh_index = viewer_widget.add_mesh(vertices, faces)
 mesh_prefab_index = viewer_widget.add_mesh_prefab(
     mesh_index,
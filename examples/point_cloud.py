@@ -0,0 +1,43 @@
+import numpy as np
+from PyQt5.QtWidgets import QApplication
+from PyIGL_viewer import Viewer
+
+# Points on a sphere and on a surrounding ring
+number_points = 2000000
+sphere_points = np.random.randn(number_points, 3).astype(np.float32)
+sphere_points /= np.linalg.norm(sphere_points, axis=1, keepdims=True)
+sphere_points *= 0.4
+
+angles = np.random.uniform(0.0, 2.0 * np.pi, number_points)
+radii = np.random.uniform(0.6, 0.7, number_points)
+ring_points = np.stack(
+    [radii * np.cos(angles), radii * np.sin(angles), np.zeros(number_points)], axis=1
+).astype(np.float32)
+
+# Create Qt application and our viewer window
+viewer_app = QApplication(["IGL viewer"])
+viewer = Viewer()
+viewer.show()
+viewer.set_column_stretch(0, 1)
+
+viewer_widget, _ = viewer.add_viewer_widget(0, 0)
+viewer_widget.show()
+
+# uint8 colors, stored as 4 bytes per point and drawn as round splats with a size in world units
+# shrinking with the distance to the camera
+sphere_colors = np.round(255.0 * (0.5 + sphere_points / 0.8)).astype(np.uint8)
+viewer_widget.display_point_cloud(
+    sphere_points,
+    colors=sphere_colors,
+    point_size=0.004,
+    perspective=True,
+    round_points=True,
+)
+
+# A single color for all the points, no color buffer is uploaded
+viewer_widget.display_point_cloud(
+    ring_points, color=np.array([0.9, 0.9, 0.9]), point_size=2
+)
+
+# Launch the Qt application
+viewer_app.exec()
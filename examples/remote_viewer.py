@@ -0,0 +1,56 @@
+import sys
+import time
+import numpy as np
+
+# Run "python remote_viewer.py" to start a viewer listening for meshes, then
+# "python remote_viewer.py client" from another terminal to push an animated mesh to it.
+# The client side only needs numpy, it does not import Qt.
+address = ("127.0.0.1", 9876)
+
+
+def run_viewer():
+    from PyQt5.QtWidgets import QApplication
+    from PyIGL_viewer import Viewer
+
+    viewer_app = QApplication(["IGL viewer"])
+    viewer = Viewer()
+    viewer.show()
+    viewer.set_column_stretch(0, 1)
+    viewer_widget, _ = viewer.add_viewer_widget(0, 0)
+    viewer_widget.show()
+    viewer.start_server(address)
+    viewer_app.exec()
+
+
+def run_client():
+    from PyIGL_viewer.remote import ViewerClient
+
+    grid = np.linspace(-0.5, 0.5, 100, dtype=np.float32)
+    x, y = np.meshgrid(grid, grid)
+    vertices = np.stack([x, y, np.zeros_like(x)], axis=2).reshape((-1, 3))
+    indices = np.arange(100 * 100).reshape((100, 100))
+    faces = np.concatenate(
+        [
+            np.stack([indices[:-1, :-1], indices[1:, :-1], indices[:-1, 1:]], axis=2),
+            np.stack([indices[1:, :-1], indices[1:, 1:], indices[:-1, 1:]], axis=2),
+        ]
+    ).reshape((-1, 3))
+
+    client = ViewerClient(address)
+    mesh_id = client.add_mesh(vertices, faces.astype(np.int32), normals="vertex")
+    prefab_id = client.add_mesh_prefab(
+        mesh_id, "lambert", uniforms={"albedo": np.array([0.8, 0.8, 0.8])}
+    )
+    client.add_mesh_instance(prefab_id, np.eye(4, dtype=np.float32))
+    for t in range(1000):
+        vertices[:, 2] = 0.1 * np.sin(10.0 * vertices[:, 0] + 0.1 * t)
+        client.update_mesh_vertices(mesh_id, vertices)
+        time.sleep(0.02)
+    client.close()
+
+
+if __name__ == "__main__":
+    if len(sys.argv) > 1 and sys.argv[1] == "client":
+        run_client()
+    else:
+        run_viewer()
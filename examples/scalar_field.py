@@ -0,0 +1,57 @@
+import os
+import numpy as np
+import igl
+from PyQt5.QtWidgets import QApplication
+from PyIGL_viewer import Viewer
+
+script_folder = os.path.dirname(__file__)
+path_to_obj_file = os.path.join(script_folder, "assets", "cube.obj")
+vertices, faces = igl.read_triangle_mesh(path_to_obj_file)
+
+bbox_min = np.min(vertices, axis=0)
+bbox_max = np.max(vertices, axis=0)
+scaling_factor = 1.0 / np.max(bbox_max - bbox_min)
+center = np.mean(vertices, axis=0)
+vertices -= center
+vertices *= scaling_factor
+
+# Create Qt application and our viewer window
+viewer_app = QApplication(["IGL viewer"])
+viewer = Viewer()
+viewer.show()
+viewer.set_column_stretch(0, 1)
+
+# Add a viewer widget to visualize 3D meshes to our viewer window
+viewer_widget, _ = viewer.add_viewer_widget(0, 0)
+viewer_widget.show()
+
+# Display a scalar field defined per vertex.
+# Only one float per vertex is uploaded, the colors are looked up in a 1D colormap texture.
+scalar_field = vertices[:, 1]
+instance_index = viewer_widget.display_scalar_field(
+    vertices, faces, scalar_field, colormap="viridis"
+)
+
+# Switching colormaps or changing the value range does not re-upload the mesh data.
+colormaps = ["viridis", "coolwarm", "jet", "gray"]
+current_colormap = [0]
+
+
+def switch_colormap():
+    current_colormap[0] = (current_colormap[0] + 1) % len(colormaps)
+    viewer_widget.set_mesh_prefab_colormap(
+        instance_index, colormaps[current_colormap[0]]
+    )
+
+
+def narrow_range():
+    viewer_widget.set_mesh_prefab_colormap_range(instance_index, -0.25, 0.25)
+
+
+viewer.add_ui_button("Switch Colormap", switch_colormap)
+viewer.add_ui_button("Narrow Range", narrow_range)
+
+viewer_widget.add_wireframe(instance_index, line_color=np.array([0.1, 0.1, 0.1]))
+
+# Launch the Qt application
+viewer_app.exec()
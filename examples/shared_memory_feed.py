@@ -0,0 +1,52 @@
+import os
+import time
+import multiprocessing
+import numpy as np
+import igl
+from PyQt5.QtWidgets import QApplication
+from PyIGL_viewer import Viewer
+from PyIGL_viewer.remote import SharedFeedWriter
+
+
+# The simulation runs in its own process and writes its frames into a shared memory block.
+def simulate(feed_name, vertices, number_frames):
+    feed = SharedFeedWriter(name=feed_name, create=False)
+    for t in range(number_frames):
+        frame = feed.begin_frame()
+        np.multiply(vertices, 1.0 + 0.2 * np.sin(0.05 * t), out=frame["position"])
+        feed.end_frame()
+        time.sleep(0.01)
+    feed.close()
+
+
+if __name__ == "__main__":
+    script_folder = os.path.dirname(__file__)
+    path_to_obj_file = os.path.join(script_folder, "assets", "cube.obj")
+    vertices, faces = igl.read_triangle_mesh(path_to_obj_file)
+    vertices -= np.mean(vertices, axis=0)
+    vertices /= np.max(np.max(vertices, axis=0) - np.min(vertices, axis=0))
+
+    viewer_app = QApplication(["IGL viewer"])
+    viewer = Viewer()
+    viewer.show()
+    viewer.set_column_stretch(0, 1)
+    viewer_widget, _ = viewer.add_viewer_widget(0, 0)
+    viewer_widget.show()
+
+    mesh_index = viewer_widget.add_mesh(vertices, faces)
+    mesh_prefab_index = viewer_widget.add_mesh_prefab(mesh_index, "default")
+    viewer_widget.add_mesh_instance(mesh_prefab_index, np.eye(4, dtype="f"))
+
+    # The feed holds the frames of the mesh positions, the viewer uploads the latest complete one.
+    feed = SharedFeedWriter({"position": (vertices.shape, np.float32)})
+    viewer_widget.add_shared_feed(mesh_index, name=feed.name)
+
+    simulation = multiprocessing.Process(
+        target=simulate, args=(feed.name, vertices, 2000)
+    )
+    simulation.start()
+
+    viewer_app.exec()
+    simulation.join()
+    feed.close()
+    feed.unlink()
@@ -0,0 +1,59 @@
+import sys
+import numpy as np
+from PyQt5.QtWidgets import QApplication
+from PyIGL_viewer import Viewer
+
+# A wavy grid with texture coordinates in [0, 1]
+grid_size = 200
+u, v = np.meshgrid(np.linspace(0.0, 1.0, grid_size), np.linspace(0.0, 1.0, grid_size))
+texture_coords = np.stack([u.ravel(), v.ravel()], axis=1)
+vertices = np.stack(
+    [
+        u.ravel() - 0.5,
+        v.ravel() - 0.5,
+        0.05 * np.sin(8.0 * u.ravel()) * np.cos(8.0 * v.ravel()),
+    ],
+    axis=1,
+)
+indices = np.arange(grid_size * grid_size).reshape((grid_size, grid_size))
+corners = [indices[:-1, :-1], indices[:-1, 1:], indices[1:, 1:], indices[1:, :-1]]
+corners = [corner.ravel() for corner in corners]
+faces = np.concatenate(
+    [
+        np.stack([corners[0], corners[1], corners[2]], axis=1),
+        np.stack([corners[0], corners[2], corners[3]], axis=1),
+    ]
+)
+
+# Create Qt application and our viewer window
+viewer_app = QApplication(["IGL viewer"])
+viewer = Viewer()
+viewer.show()
+viewer.set_column_stretch(0, 1)
+
+viewer_widget, _ = viewer.add_viewer_widget(0, 0)
+viewer_widget.show()
+second_viewer_widget, _ = viewer.add_viewer_widget(1, 0)
+second_viewer_widget.show()
+
+# An image file given on the command line, or a large procedural checkerboard.
+# Images are decoded in worker threads and streamed to the GPU over several frames,
+# the mesh is drawn with a white placeholder texture in the meantime.
+if len(sys.argv) > 1:
+    image = sys.argv[1]
+else:
+    x, y = np.meshgrid(np.arange(4096), np.arange(4096))
+    checker = ((x // 256 + y // 256) % 2).astype(np.float32)
+    image = np.stack(
+        [0.2 + 0.6 * checker, 0.4 * np.ones_like(checker), 0.8 - 0.6 * checker], axis=2
+    )
+texture = viewer_widget.load_texture(image)
+
+# Both widgets and all the prefabs share the decoded image
+viewer_widget.display_textured_mesh(vertices, faces, texture_coords, texture)
+second_viewer_widget.display_textured_mesh(
+    vertices, faces, 4.0 * texture_coords, texture
+)
+
+# Launch the Qt application
+viewer_app.exec()
@@ -0,0 +1,107 @@
+import numpy as np
+import pytest
+
+from PyIGL_viewer.mesh.encoding import (
+    INT16_MAX,
+    encode_attribute,
+    encode_positions,
+    octahedral_decode,
+    octahedral_encode,
+    position_bounds,
+    rgba_colors,
+)
+
+
+def angle_between(a, b):
+    cosines = np.sum(a * b, axis=1) / (
+        np.linalg.norm(a, axis=1) * np.linalg.norm(b, axis=1)
+    )
+    return np.arccos(np.clip(cosines, -1.0, 1.0))
+
+
+def test_octahedral_round_trip_of_random_normals():
+    rng = np.random.default_rng(0)
+    normals = rng.normal(size=(10000, 3))
+    normals /= np.linalg.norm(normals, axis=1, keepdims=True)
+    encoded = octahedral_encode(normals)
+    assert encoded.dtype == np.int16
+    assert encoded.shape == (10000, 2)
+
+    decoded = octahedral_decode(encoded)
+    np.testing.assert_allclose(np.linalg.norm(decoded, axis=1), 1.0, atol=1e-6)
+    assert np.max(angle_between(normals, decoded)) < 1e-3
+
+
+def test_octahedral_round_trip_of_axes_and_folds():
+    # Axes, and directions on the folded edges of the lower hemisphere
+    normals = np.array(
+        [
+            [1.0, 0.0, 0.0],
+            [-1.0, 0.0, 0.0],
+            [0.0, 1.0, 0.0],
+            [0.0, -1.0, 0.0],
+            [0.0, 0.0, 1.0],
+            [0.0, 0.0, -1.0],
+            [1.0, 1.0, -1.0],
+            [-1.0, 1.0, -1.0],
+            [1.0, -1.0, -1.0],
+            [-1.0, -1.0, -1.0],
+            [0.0, 1.0, -1.0],
+            [1.0, 0.0, -1.0],
+        ]
+    )
+    normals /= np.linalg.norm(normals, axis=1, keepdims=True)
+    decoded = octahedral_decode(octahedral_encode(normals))
+    assert np.max(angle_between(normals, decoded)) < 1e-3
+
+
+def test_octahedral_encoding_is_stable():
+    rng = np.random.default_rng(1)
+    normals = rng.normal(size=(1000, 3))
+    encoded = octahedral_encode(normals)
+    np.testing.assert_array_equal(
+        octahedral_encode(octahedral_decode(encoded)), encoded
+    )
+
+
+@pytest.mark.parametrize("precision, tolerance", [("half", 1e-3), ("int16", 1e-4)])
+def test_position_round_trip(precision, tolerance):
+    rng = np.random.default_rng(2)
+    vertices = rng.uniform(-10.0, 30.0, size=(1000, 3)).astype(np.float32)
+    center, half_extent = position_bounds(vertices)
+    encoded = encode_positions(vertices, center, half_extent, precision)
+    assert encoded.shape == (1000, 4)
+
+    # Decoded like the vertex shaders, int16 values are normalized
+    local_positions = encoded[:, :3].astype(np.float32)
+    if precision == "int16":
+        local_positions /= INT16_MAX
+    decoded = center + half_extent * local_positions
+    np.testing.assert_allclose(decoded, vertices, atol=tolerance * np.max(half_extent))
+
+
+def test_position_bounds_of_flat_meshes():
+    vertices = np.array([[0.0, 1.0, 2.0], [2.0, 1.0, 2.0]], dtype=np.float32)
+    center, half_extent = position_bounds(vertices)
+    np.testing.assert_allclose(center, [1.0, 1.0, 2.0])
+    np.testing.assert_allclose(half_extent, [1.0, 1.0, 1.0])
+
+
+def test_rgba_colors():
+    np.testing.assert_array_equal(
+        rgba_colors(np.array([[1.0, 0.0, 0.5]])), [[255, 0, 128, 255]]
+    )
+    packed = np.array([0x80FF0001], dtype=np.uint32)
+    np.testing.assert_array_equal(rgba_colors(packed), [[1, 0, 255, 128]])
+    with pytest.raises(ValueError):
+        rgba_colors(np.zeros((2, 2)))
+
+
+def test_encode_attribute():
+    normals = np.array([[0.0, 0.0, 1.0]])
+    assert encode_attribute("normal", normals, "full") is normals
+    assert encode_attribute("normal", normals, "compact").dtype == np.int16
+    colors = encode_attribute("vertexColor", np.array([[1.0, 0.0, 0.0]]), "compact")
+    np.testing.assert_array_equal(colors, [[255, 0, 0, 0]])
+    with pytest.raises(ValueError):
+        encode_attribute("normal", normals, "tiny")
@@ -0,0 +1,68 @@
+import numpy as np
+import pytest
+
+from PyIGL_viewer.mesh.normals import MeshNormals
+
+
+def test_face_normals_are_unit_length():
+    vertices = np.array(
+        [[0.0, 0.0, 0.0], [2.0, 0.0, 0.0], [0.0, 2.0, 0.0], [0.0, 0.0, 3.0]]
+    )
+    faces = np.array([[0, 1, 2], [0, 3, 1]])
+    normals = MeshNormals(faces, vertices.shape[0], "face").compute(vertices)
+    assert normals.dtype == np.float32
+    np.testing.assert_allclose(normals, [[0.0, 0.0, 1.0], [0.0, 1.0, 0.0]], atol=1e-6)
+
+
+def test_vertex_normals_are_area_weighted():
+    # Vertex 0 is shared by a large triangle facing +z and a small one facing +y,
+    # the larger face dominates its normal.
+    vertices = np.array(
+        [
+            [0.0, 0.0, 0.0],
+            [4.0, 0.0, 0.0],
+            [0.0, 4.0, 0.0],
+            [1.0, 0.0, 0.0],
+            [0.0, 0.0, 1.0],
+        ]
+    )
+    faces = np.array([[0, 1, 2], [0, 4, 3]])
+    normals = MeshNormals(faces, vertices.shape[0], "vertex").compute(vertices)
+
+    # Twice the face areas are 16 and 1
+    expected = np.array([0.0, 1.0, 16.0]) / np.linalg.norm([0.0, 1.0, 16.0])
+    np.testing.assert_allclose(normals[0], expected, atol=1e-6)
+    np.testing.assert_allclose(normals[1], [0.0, 0.0, 1.0], atol=1e-6)
+    np.testing.assert_allclose(normals[3], [0.0, 1.0, 0.0], atol=1e-6)
+
+
+def test_vertex_normals_follow_vertex_updates():
+    vertices = np.array([[0.0, 0.0, 0.0], [1.0, 0.0, 0.0], [0.0, 1.0, 0.0]])
+    faces = np.array([[0, 1, 2]])
+    mesh_normals = MeshNormals(faces, vertices.shape[0], "vertex")
+    np.testing.assert_allclose(
+        mesh_normals.compute(vertices), np.tile([0.0, 0.0, 1.0], (3, 1)), atol=1e-6
+    )
+
+    # Rotating the triangle around the x axis turns its normal toward -y
+    rotated = vertices[:, [0, 2, 1]]
+    np.testing.assert_allclose(
+        mesh_normals.compute(rotated), np.tile([0.0, -1.0, 0.0], (3, 1)), atol=1e-6
+    )
+
+
+def test_unreferenced_and_degenerate_vertices_get_zero_normals():
+    vertices = np.array(
+        [[0.0, 0.0, 0.0], [1.0, 0.0, 0.0], [2.0, 0.0, 0.0], [5.0, 5.0, 5.0]]
+    )
+    faces = np.array([[0, 1, 2]])
+    normals = MeshNormals(faces, vertices.shape[0], "vertex").compute(vertices)
+    assert np.all(np.isfinite(normals))
+    np.testing.assert_array_equal(normals, np.zeros((4, 3)))
+
+
+def test_invalid_arguments():
+    with pytest.raises(ValueError):
+        MeshNormals(np.array([[0, 1, 2]]), 3, "corner")
+    with pytest.raises(ValueError):
+        MeshNormals(np.array([[0, 1, 2, 3]]), 4, "face")
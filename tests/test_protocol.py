@@ -0,0 +1,124 @@
+import socket
+import threading
+
+import numpy as np
+import pytest
+
+from PyIGL_viewer.remote.protocol import (
+    FLAG_REPLY,
+    HEADER,
+    REMOTE_METHODS,
+    REPLY,
+    RemoteId,
+    decode_value,
+    receive_message,
+    send_call,
+    send_reply,
+)
+
+
+@pytest.fixture
+def connections():
+    client, server = socket.socketpair()
+    yield client, server
+    client.close()
+    server.close()
+
+
+def receive_call(connection):
+    method, flags, document, arrays = receive_message(connection)
+    args = decode_value(document["args"], arrays, RemoteId)
+    kwargs = decode_value(document["kwargs"], arrays, RemoteId)
+    return REMOTE_METHODS[method], flags, document["widget"], args, kwargs
+
+
+def test_call_round_trip(connections):
+    client, server = connections
+    vertices = np.random.default_rng(0).random((5, 3)).astype(np.float32)
+    faces = np.array([[0, 1, 2], [2, 3, 4]], dtype=np.int32)
+    colors = np.zeros((0, 4), dtype=np.uint8)
+    send_call(
+        client,
+        "add_mesh",
+        (vertices, faces),
+        {"colors": colors, "name": "mesh", "scale": np.float64(2.0)},
+        widget=1,
+        reply=True,
+    )
+
+    method, flags, widget, args, kwargs = receive_call(server)
+    assert method == "add_mesh"
+    assert flags == FLAG_REPLY
+    assert widget == 1
+    for sent, received in zip((vertices, faces), args):
+        assert received.dtype == sent.dtype
+        np.testing.assert_array_equal(received, sent)
+    assert kwargs["colors"].dtype == np.uint8
+    assert kwargs["colors"].shape == (0, 4)
+    assert kwargs["name"] == "mesh"
+    assert kwargs["scale"] == 2.0
+
+
+def test_ids_round_trip(connections):
+    client, server = connections
+    instance_id = RemoteId([3, 4 << 32, 5])
+    send_call(
+        client, "update_mesh_instance_model", (instance_id, np.eye(4)), {}, 0, False
+    )
+
+    method, flags, widget, args, kwargs = receive_call(server)
+    assert method == "update_mesh_instance_model"
+    assert flags == 0
+    assert isinstance(args[0], RemoteId)
+    assert (args[0].core_id, args[0].prefab_id, args[0].instance_id) == (
+        3,
+        4 << 32,
+        5,
+    )
+    np.testing.assert_array_equal(args[1], np.eye(4))
+
+    # The receiving side chooses how ids are rebuilt
+    send_call(client, "remove_mesh", (RemoteId([7]),), {}, 0, False)
+    document, arrays = receive_message(server)[2:]
+    assert decode_value(document["args"], arrays, tuple) == [(7,)]
+
+
+def test_large_payload(connections):
+    client, server = connections
+    vertices = np.arange(3 * 1000000, dtype=np.float32).reshape((-1, 3))
+    sender = threading.Thread(
+        target=send_call,
+        args=(client, "update_mesh_vertices", (RemoteId([1]), vertices), {}, 0, False),
+    )
+    sender.start()
+    args = receive_call(server)[3]
+    sender.join()
+    np.testing.assert_array_equal(args[1], vertices)
+
+
+def test_replies(connections):
+    client, server = connections
+    send_reply(server, result=RemoteId([2, 6]))
+    method, flags, document, arrays = receive_message(client)
+    assert method == REPLY
+    result = decode_value(document["result"], arrays, RemoteId)
+    assert (result.core_id, result.prefab_id) == (2, 6)
+
+    send_reply(server, error="Invalid mesh prefab handles")
+    document = receive_message(client)[2]
+    assert document == {"error": "Invalid mesh prefab handles"}
+
+
+def test_closed_connection(connections):
+    client, server = connections
+    client.close()
+    assert receive_message(server) is None
+
+
+def test_invalid_messages(connections):
+    client, server = connections
+    client.sendall(HEADER.pack(b"XXXX", 0, 0, 0, 0))
+    with pytest.raises(ValueError):
+        receive_message(server)
+    with pytest.raises(ValueError):
+        send_call(client, "add_mesh", (np.array([None]),), {}, 0, False)
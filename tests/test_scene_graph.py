@@ -0,0 +1,87 @@
+import numpy as np
+import pytest
+
+from PyIGL_viewer.mesh.scene_graph import SceneGraph
+from PyIGL_viewer.mesh.slot_map import handle_indices
+
+
+def translation(x, y, z):
+    matrix = np.eye(4, dtype=np.float32)
+    matrix[:3, 3] = [x, y, z]
+    return matrix
+
+
+def build_graph():
+    # root -> (left -> grandchild, right)
+    graph = SceneGraph()
+    root, left, right, grandchild = (graph.allocate_one() for _ in range(4))
+    graph.insert(root, translation(1.0, 0.0, 0.0))
+    graph.insert(left, translation(0.0, 2.0, 0.0), parent=root)
+    graph.insert(right, translation(0.0, 0.0, 3.0), parent=root)
+    graph.insert(grandchild, translation(0.0, 4.0, 0.0), parent=left)
+    return graph, root, left, right, grandchild
+
+
+def test_update_computes_world_matrices():
+    graph, root, left, right, grandchild = build_graph()
+    updated = graph.update()
+    assert np.all(updated[graph.indices([root, left, right, grandchild])])
+    np.testing.assert_allclose(
+        graph.get_world_matrix(grandchild), translation(1.0, 6.0, 0.0)
+    )
+    np.testing.assert_allclose(
+        graph.get_world_matrix(right), translation(1.0, 0.0, 3.0)
+    )
+
+
+def test_clean_graph_update_returns_none():
+    graph = build_graph()[0]
+    graph.update()
+    assert graph.update() is None
+
+
+def test_dirty_parent_propagates_to_children_only():
+    graph, root, left, right, grandchild = build_graph()
+    graph.update()
+
+    graph.set_local_matrices([left], translation(0.0, 5.0, 0.0)[np.newaxis])
+    updated = graph.update()
+    np.testing.assert_array_equal(
+        updated[graph.indices([root, left, right, grandchild])],
+        [False, True, False, True],
+    )
+    np.testing.assert_allclose(
+        graph.get_world_matrix(grandchild), translation(1.0, 9.0, 0.0)
+    )
+    np.testing.assert_allclose(
+        graph.get_world_matrix(right), translation(1.0, 0.0, 3.0)
+    )
+
+    graph.set_local_matrices([root], translation(0.0, 0.0, 0.0)[np.newaxis])
+    updated = graph.update()
+    assert np.all(updated[graph.indices([root, left, right, grandchild])])
+    np.testing.assert_allclose(
+        graph.get_world_matrix(grandchild), translation(0.0, 9.0, 0.0)
+    )
+
+
+def test_remove_drops_the_subtree():
+    graph, root, left, right, grandchild = build_graph()
+    graph.update()
+
+    removed = graph.remove(left)
+    assert sorted(removed.tolist()) == sorted(
+        handle_indices([left, grandchild]).tolist()
+    )
+    for handle in (left, grandchild):
+        with pytest.raises(KeyError):
+            graph.get_world_matrix(handle)
+    with pytest.raises(KeyError):
+        graph.set_local_matrices([grandchild], translation(0.0, 0.0, 0.0)[np.newaxis])
+
+    graph.set_local_matrices([root], translation(2.0, 0.0, 0.0)[np.newaxis])
+    updated = graph.update()
+    assert updated[graph.indices([right])[0]]
+    np.testing.assert_allclose(
+        graph.get_world_matrix(right), translation(2.0, 0.0, 3.0)
+    )
@@ -0,0 +1,102 @@
+import numpy as np
+import pytest
+
+from PyIGL_viewer.remote.shared_feed import SharedFeedReader, SharedFeedWriter
+
+
+@pytest.fixture
+def feed(tmp_path):
+    path = str(tmp_path / "feed")
+    fields = {"position": ((4, 3), np.float32), "time": ((1,), np.float64)}
+    writer = SharedFeedWriter(fields, path=path)
+    reader = SharedFeedReader(path=path)
+    yield writer, reader
+    reader.close()
+    writer.close()
+
+
+def frame_values(value):
+    return {
+        "position": np.full((4, 3), value, dtype=np.float32),
+        "time": np.array([value], dtype=np.float64),
+    }
+
+
+class OverwrittenSlot(dict):
+    # Simulates the writer reusing the slot while the reader copies it
+    def __init__(self, slot, slot_sequence):
+        super().__init__(slot)
+        self.slot_sequence = slot_sequence
+
+    def items(self):
+        self.slot_sequence[()] += 1
+        return super().items()
+
+
+def test_round_trip(feed):
+    writer, reader = feed
+    assert reader.read() is None
+    assert writer.write_frame(frame_values(1.5)) == 1
+    assert reader.has_new_frame()
+
+    values = reader.read()
+    np.testing.assert_array_equal(values["position"], frame_values(1.5)["position"])
+    np.testing.assert_array_equal(values["time"], [1.5])
+    assert reader.last_frame == 1
+    assert not reader.has_new_frame()
+    assert reader.read() is None
+
+
+def test_reader_skips_to_the_latest_frame(feed):
+    writer, reader = feed
+    for value in range(1, 6):
+        writer.write_frame(frame_values(value))
+    assert reader.read()["time"][0] == 5.0
+    assert reader.last_frame == 5
+
+
+def test_torn_frame_is_dropped(feed):
+    writer, reader = feed
+    writer.write_frame(frame_values(1.0))
+    writer.write_frame(frame_values(2.0))
+    reader.read()
+    writer.write_frame(frame_values(3.0))
+
+    # The writer laps the reader and starts frame 5 in the slot of frame 3
+    slot = 3 % writer.number_slots
+    writer.slot_sequences[slot][()] = 2 * 5 - 1
+    assert reader.read() is None
+    assert reader.last_frame == 2
+    assert reader.values["time"][0] == 2.0
+
+    # A newer complete frame in the slot does not match the header either
+    writer.slot_sequences[slot][()] = 2 * 5
+    assert reader.read() is None
+    assert reader.last_frame == 2
+
+
+def test_frame_overwritten_during_copy_is_dropped(feed):
+    writer, reader = feed
+    writer.write_frame(frame_values(1.0))
+    slot = 1 % reader.number_slots
+    original_slot = reader.slots[slot]
+    reader.slots[slot] = OverwrittenSlot(original_slot, reader.slot_sequences[slot])
+    assert reader.read() is None
+    assert reader.last_frame == 0
+
+    # The next complete frame is read
+    reader.slots[slot] = original_slot
+    writer.write_frame(frame_values(2.0))
+    assert reader.read()["time"][0] == 2.0
+    assert reader.last_frame == 2
+
+
+def test_invalid_region(tmp_path):
+    path = tmp_path / "feed"
+    path.write_bytes(bytes(8192))
+    with pytest.raises(ValueError):
+        SharedFeedReader(path=str(path))
+    with pytest.raises(ValueError):
+        SharedFeedWriter(
+            {"position": ((4, 3), np.float32)}, path=str(path), number_slots=1
+        )
@@ -0,0 +1,78 @@
+import numpy as np
+import pytest
+
+from PyIGL_viewer.mesh.mesh import InstanceTable
+from PyIGL_viewer.mesh.slot_map import SlotMap, handle_generations, handle_indices
+
+
+def test_stale_handles_raise_key_error():
+    slot_map = SlotMap()
+    handle = slot_map.allocate_one()
+    slot_map.insert(handle, "mesh")
+    assert slot_map[handle] == "mesh"
+    assert slot_map.pop(handle) == "mesh"
+
+    with pytest.raises(KeyError):
+        slot_map[handle]
+    with pytest.raises(KeyError):
+        slot_map.pop(handle)
+    assert handle not in slot_map
+    assert len(slot_map) == 0
+
+
+def test_reused_slots_get_a_new_generation():
+    slot_map = SlotMap()
+    handle = slot_map.allocate_one()
+    slot_map.insert(handle, "old")
+    slot_map.pop(handle)
+
+    new_handle = slot_map.allocate_one()
+    slot_map.insert(new_handle, "new")
+    assert handle_indices(new_handle) == handle_indices(handle)
+    assert handle_generations(new_handle) == handle_generations(handle) + 1
+    assert slot_map[new_handle] == "new"
+    with pytest.raises(KeyError):
+        slot_map[handle]
+
+
+def test_valid():
+    slot_map = SlotMap()
+    handles = slot_map.allocate(3)
+    slot_map.release([int(handle_indices(handles[1]))])
+    unknown = handles[2] + 1
+    np.testing.assert_array_equal(
+        slot_map.valid(np.append(handles, unknown)), [True, False, True, False]
+    )
+
+
+def test_clear_invalidates_handles():
+    slot_map = SlotMap()
+    handles = slot_map.allocate(2)
+    for handle in handles:
+        slot_map.insert(handle, int(handle))
+    assert sorted(slot_map.values()) == sorted(handles.tolist())
+    assert dict(slot_map.items()) == {int(handle): int(handle) for handle in handles}
+
+    slot_map.clear()
+    assert len(slot_map) == 0
+    assert not np.any(slot_map.valid(handles))
+    for handle in handles:
+        with pytest.raises(KeyError):
+            slot_map[handle]
+
+
+def test_instance_table_rejects_stale_handles():
+    table = InstanceTable()
+    handles = table.allocate(2)
+    table.insert(handles, 7, None)
+    np.testing.assert_array_equal(table.instances_of(7), handle_indices(handles))
+
+    table.remove(handles[:1])
+    with pytest.raises(KeyError):
+        table.indices(handles)
+    with pytest.raises(KeyError):
+        table.get(int(handles[0]))
+    np.testing.assert_array_equal(
+        table.indices(handles[1:]), handle_indices(handles[1:])
+    )
+    np.testing.assert_array_equal(table.instances_of(7), handle_indices(handles[1:]))